@@ -0,0 +1,74 @@
+"""
+Counts the wandb SDK calls made by WandBModelHooks.on_sample_end under different logging policies.
+
+Usage: python benchmarks/models_log_calls.py [num_samples]
+"""
+import asyncio
+import sys
+import time
+from unittest.mock import MagicMock
+
+from inspect_ai.hooks import SampleEnd
+from inspect_ai.log import EvalSample
+from inspect_ai.scorer import Score
+
+from inspect_wandb.config.settings import ModelsSettings
+from inspect_wandb.models.buffer import MetricsBuffer
+from inspect_wandb.models.hooks import WandBModelHooks
+
+POLICIES: dict[str, dict[str, float | int | None]] = {
+    "per-sample (default)": {"log_interval": None, "log_batch_size": None},
+    "batch_size=100": {"log_interval": None, "log_batch_size": 100},
+    "interval=1s": {"log_interval": 1.0, "log_batch_size": None},
+}
+
+
+def make_sample_end(index: int) -> SampleEnd:
+    return SampleEnd(
+        eval_set_id=None,
+        run_id="benchmark-run",
+        eval_id="benchmark-eval",
+        sample_id=f"sample-{index}",
+        sample=EvalSample(
+            id=index,
+            epoch=1,
+            input="input",
+            target="target",
+            scores={"score": Score(value=index % 2 == 0)},
+        ),
+    )
+
+
+async def run_policy(num_samples: int, log_interval: float | None, log_batch_size: int | None) -> tuple[int, float]:
+    hooks = WandBModelHooks()
+    hooks.run = MagicMock()
+    hooks.settings = ModelsSettings(
+        enabled=True,
+        entity="benchmark",
+        project="benchmark",
+        log_interval=log_interval,
+        log_batch_size=log_batch_size,
+    )
+    hooks._hooks_enabled = True
+    hooks._total_samples = 0
+    hooks._correct_samples = 0
+    hooks._metrics_buffer = MetricsBuffer(interval=log_interval, batch_size=log_batch_size)
+
+    samples = [make_sample_end(i) for i in range(num_samples)]
+    start = time.perf_counter()
+    for sample in samples:
+        await hooks.on_sample_end(sample)
+    hooks._flush_metrics()
+    elapsed = time.perf_counter() - start
+    return hooks.run.log.call_count, elapsed
+
+
+async def main(num_samples: int) -> None:
+    print(f"{'policy':<24}{'run.log calls':>16}{'calls/sample':>16}{'us/sample':>12}")
+    for name, policy in POLICIES.items():
+        calls, elapsed = await run_policy(num_samples, **policy)  # type: ignore[arg-type]
+        print(f"{name:<24}{calls:>16}{calls / num_samples:>16.4f}{elapsed / num_samples * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000))
@@ -0,0 +1,82 @@
+"""
+Measures the per-sample overhead of the Weave autopatcher's PatchedPlan and PatchedScorer for a 10-step agent plan,
+compared with Inspect's own Plan and an unwrapped scorer. Weave is not initialised, so this is the cost of the
+wrappers themselves rather than of tracing.
+
+Usage: python benchmarks/weave_autopatch_overhead.py [num_samples]
+"""
+import asyncio
+import sys
+import time
+
+from inspect_ai.log._transcript import Transcript, init_transcript
+from inspect_ai.model import ModelOutput
+from inspect_ai.scorer import Score, Scorer, Target, scorer, accuracy
+from inspect_ai.solver import Generate, Plan, Solver, TaskState, solver
+
+from inspect_wandb.weave.autopatcher.plan import PatchedPlan
+from inspect_wandb.weave.autopatcher.scorer import PatchedScorer
+
+NUM_STEPS = 10
+
+
+@solver
+def agent_step(step: int) -> Solver:
+    async def solve(state: TaskState, generate: Generate) -> TaskState:
+        state.metadata["step"] = step
+        return state
+
+    return solve
+
+
+@scorer(metrics=[accuracy()])
+def step_count() -> Scorer:
+    async def score(state: TaskState, target: Target) -> Score:
+        return Score(value=state.metadata["step"] == NUM_STEPS - 1)
+
+    return score
+
+
+async def generate(state: TaskState, *args: object, **kwargs: object) -> TaskState:
+    return state
+
+
+def make_state(index: int) -> TaskState:
+    return TaskState(
+        model="mockllm/model",
+        sample_id=index,
+        epoch=1,
+        input="input",
+        messages=[],
+        output=ModelOutput.from_content(model="mockllm/model", content="output"),
+    )
+
+
+async def run_sample(plan: Plan, scorer: Scorer, index: int) -> None:
+    state = await plan(make_state(index), generate)  # type: ignore[arg-type]
+    await scorer(state, Target("target"))
+
+
+async def time_samples(plan: Plan, scorer: Scorer, num_samples: int) -> float:
+    start = time.perf_counter()
+    for index in range(num_samples):
+        await run_sample(plan, scorer, index)
+    return time.perf_counter() - start
+
+
+async def main(num_samples: int) -> None:
+    init_transcript(Transcript())
+    steps = [agent_step(step) for step in range(NUM_STEPS)]
+    original_scorer = step_count()
+
+    baseline = await time_samples(Plan(steps, internal=True), original_scorer, num_samples)
+    patched = await time_samples(PatchedPlan(steps, internal=True), PatchedScorer(original_scorer), num_samples)
+
+    print(f"{'plan':<24}{'us/sample':>12}")
+    print(f"{'inspect':<24}{baseline / num_samples * 1e6:>12.1f}")
+    print(f"{'autopatched':<24}{patched / num_samples * 1e6:>12.1f}")
+    print(f"{'overhead':<24}{(patched - baseline) / num_samples * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000))
@@ -0,0 +1,117 @@
+"""
+Measures the latency WeaveEvaluationHooks.on_sample_start adds to samples which all start at once, compared with
+creating each sample's Weave call on the event loop. The Weave client does all of its usual client-side work, but
+sends requests to an in-memory trace server.
+
+Usage: python benchmarks/weave_sample_start_latency.py [num_samples]
+"""
+import asyncio
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable
+from unittest.mock import MagicMock
+
+from inspect_ai.hooks import SampleStart
+from inspect_ai.log import EvalSampleSummary
+from weave.trace.context import call_context, weave_client_context
+from weave.trace.weave_client import WeaveClient
+from weave.trace_server import trace_server_interface as tsi
+
+from inspect_wandb.config.settings import WeaveSettings
+from inspect_wandb.weave.hooks import WeaveEvaluationHooks
+from inspect_wandb.weave.utils import format_sample_display_name
+
+INPUT = "input " * 2_000
+
+
+def make_client() -> WeaveClient:
+    server = MagicMock(spec=tsi.TraceServerInterface)
+    server.obj_create.return_value = tsi.ObjCreateRes(digest="benchmark")
+    server.file_create.return_value = tsi.FileCreateRes(digest="benchmark")
+    server.call_start.return_value = tsi.CallStartRes(id="benchmark", trace_id="benchmark")
+    server.call_end.return_value = tsi.CallEndRes()
+    client = WeaveClient("benchmark", "benchmark", server, ensure_project_exists=False)
+    weave_client_context.set_weave_client_global(client)
+    return client
+
+
+def make_sample_start(index: int) -> SampleStart:
+    return SampleStart(
+        eval_set_id=None,
+        run_id="benchmark-run",
+        eval_id="benchmark-eval",
+        sample_id=f"sample-{index}",
+        summary=EvalSampleSummary(id=index, epoch=1, input=INPUT, target="target", uuid=f"sample-{index}"),
+    )
+
+
+def make_hooks(client: WeaveClient) -> WeaveEvaluationHooks:
+    hooks = WeaveEvaluationHooks()
+    hooks.settings = WeaveSettings(enabled=True, entity="benchmark", project="benchmark", autopatch=True)
+    hooks._hooks_enabled = True
+    hooks.weave_client = client
+    hooks.task_mapping["benchmark-eval"] = "benchmark"
+    return hooks
+
+
+async def create_call_on_loop(hooks: WeaveEvaluationHooks, data: SampleStart) -> None:
+    hooks.weave_client.create_call(
+        op="inspect-sample",
+        inputs={"input": data.summary.input},
+        attributes={
+            "sample_id": data.summary.id,
+            "sample_uuid": data.sample_id,
+            "epoch": data.summary.epoch,
+            "task_name": "benchmark",
+            "task_id": data.eval_id,
+            "metadata": data.summary.metadata,
+        },
+        display_name=format_sample_display_name("{task_name}-sample-{sample_id}-epoch-{epoch}", "benchmark", data.summary.id, data.summary.epoch),
+        use_stack=False,
+    )
+
+
+async def start_samples(start: Callable[[SampleStart], Awaitable[None]], samples: list[SampleStart]) -> list[float]:
+    """
+    Starts every sample at once, returning how long each waited from then until its start hook returned.
+    """
+    started_at = time.perf_counter()
+
+    async def run_sample(sample: SampleStart) -> float:
+        await start(sample)
+        return time.perf_counter() - started_at
+
+    return await asyncio.gather(*[run_sample(sample) for sample in samples])
+
+
+def report(name: str, latencies: list[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:<24}{quantiles[49] * 1e3:>10.1f}{quantiles[98] * 1e3:>10.1f}{max(latencies) * 1e3:>10.1f}")
+
+
+async def main(num_samples: int) -> None:
+    client = make_client()
+    call_context.push_call(client.create_call("Evaluation.evaluate", {}, use_stack=False))
+    samples = [make_sample_start(index) for index in range(num_samples)]
+
+    hooks = make_hooks(client)
+    on_loop = await start_samples(lambda data: create_call_on_loop(hooks, data), samples)
+
+    hooks = make_hooks(client)
+    off_loop = await start_samples(hooks.on_sample_start, samples)
+    created_at = time.perf_counter()
+    await asyncio.gather(*hooks._sample_call_starts.values())
+    created_after = time.perf_counter() - created_at
+
+    print(f"{num_samples} concurrent samples, sample start latency (ms)")
+    print(f"{'':<24}{'p50':>10}{'p99':>10}{'max':>10}")
+    report("create_call on loop", on_loop)
+    report("on_sample_start", off_loop)
+    print(f"calls created off the loop {created_after * 1e3:.1f}ms after the last sample started")
+
+    client.finish(use_progress_bar=False)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000))
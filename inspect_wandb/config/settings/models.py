@@ -12,6 +12,13 @@ class EnvironmentValidations(BaseModel):
     wandb_base_url: str | None = Field(default=None, description="The base URL of the wandb instance")
     wandb_api_key: str | None = Field(default=None, description="The API key for the wandb instance")
 
+class ModelPrice(BaseModel):
+    """
+    Price of a model's tokens, in USD per million tokens.
+    """
+    input: float = Field(default=0.0, ge=0, description="Price per million input tokens")
+    output: float = Field(default=0.0, ge=0, description="Price per million output tokens")
+
 class ModelsSettings(InspectWandBBaseSettings):
     """
     Settings model for the Models integration.
@@ -24,8 +31,20 @@ class ModelsSettings(InspectWandBBaseSettings):
 
     config: dict[str, Any] | None = Field(default=None, description="Configuration to pass directly to wandb.config for the Models integration")
     files: list[str] | None = Field(default=None, description="Files to upload to the models run. Paths should be relative to the wandb directory.")
+    upload_concurrency: int = Field(default=8, ge=1, description="Maximum number of files uploaded to the models run concurrently")
+    log_artifacts: bool = Field(default=False, description="Whether to upload each task's log to the models run as a versioned artifact when the task ends")
     viz: bool = Field(default=False, description="Whether to enable the inspect_viz extra")
     add_metadata_to_config: bool = Field(default=True, description="Whether to add eval metadata to wandb.config")
+    deduplicate_samples: bool = Field(default=False, description="Whether to skip samples already counted in the models run when an eval-set is retried, recording counted samples in the eval-set log dir")
+    log_interval: float | None = Field(default=None, ge=0, description="Minimum number of seconds between metric writes to the models run. Sample updates in between are coalesced into a single log call")
+    log_batch_size: int | None = Field(default=None, ge=1, description="Maximum number of sample updates to coalesce into a single log call to the models run")
+    sample_table: bool = Field(default=False, description="Whether to stream a table with one row per sample to the models run")
+    sample_table_chunk_size: int = Field(default=1000, ge=1, description="Number of sample rows held in memory before they are logged to the models run as one chunk of the sample table")
+    throughput_window: float | None = Field(default=None, gt=0, description="Length in seconds of the rolling window over which token and sample throughput are logged to the models run. Throughput is not logged if unset")
+    model_prices: dict[str, ModelPrice] | None = Field(default=None, description="Prices per million input and output tokens by model name (e.g. openai/gpt-4o), used to log the cost rate of each model")
+    background_writer: bool = Field(default=False, description="Whether to make wandb calls on a background writer thread instead of Inspect's event loop")
+    writer_queue_size: int = Field(default=10_000, ge=1, description="Number of queued wandb calls above which the background writer drops metric logs. Other calls are always queued, so the event loop never waits for the writer")
+    writer_drain_timeout: float | None = Field(default=60.0, ge=0, description="Seconds to wait at the end of a run for queued wandb calls to complete")
 
     tags: list[str] | None = Field(default=None, description="Tags to add to the models run")
     environment_validations: EnvironmentValidations | None = Field(default=None, description="Environment variables to validate before enabling")
@@ -1,9 +1,23 @@
 
 
 from inspect_wandb.config.settings.base import InspectWandBBaseSettings
-from pydantic import Field
+from fnmatch import fnmatchcase
+from pydantic import BaseModel, Field
+from typing import Literal
 from pydantic_settings import SettingsConfigDict
 
+class TraceFilter(BaseModel):
+    """
+    Glob patterns choosing which solvers, scorers or provider integrations are traced.
+    """
+    include: list[str] | None = Field(default=None, description="Names to trace. Everything is traced if unset")
+    exclude: list[str] | None = Field(default=None, description="Names not to trace, even if they match include")
+
+    def matches(self, name: str) -> bool:
+        if self.include is not None and not any(fnmatchcase(name, pattern) for pattern in self.include):
+            return False
+        return not any(fnmatchcase(name, pattern) for pattern in self.exclude or [])
+
 class WeaveSettings(InspectWandBBaseSettings):
     """
     Settings model for the Weave integration.
@@ -15,4 +29,19 @@ class WeaveSettings(InspectWandBBaseSettings):
     )
 
     autopatch: bool = Field(default=True, description="Whether to automatically patch Inspect with Weave calls for tracing")
-    sample_name_template: str = Field(default="{task_name}-sample-{sample_id}-epoch-{epoch}", description="Template for sample display names. Available variables: {task_name}, {sample_id}, {epoch}")
\ No newline at end of file
+    trace_solvers: TraceFilter = Field(default_factory=TraceFilter, description="Glob patterns for the registry names of solvers to trace (e.g. my_agent/*) and not to trace when autopatch is enabled")
+    trace_scorers: TraceFilter = Field(default_factory=TraceFilter, description="Glob patterns for the registry names of scorers to trace and not to trace when autopatch is enabled")
+    trace_providers: TraceFilter = Field(default_factory=TraceFilter, description="Glob patterns for the model provider integrations (e.g. openai, anthropic, llamaindex) to patch for tracing")
+    trace_model_calls: bool = Field(default=False, description="Whether to record a lightweight span for every Inspect model call when autopatch is enabled, with the model, cache hit or miss, retries, latency and token usage, whichever provider serves it")
+    trace_tool_calls: bool = Field(default=False, description="Whether to record a span with the duration and argument and result sizes of every tool call when autopatch is enabled")
+    trace_sandbox_calls: bool = Field(default=False, description="Whether to record a span with the duration, exit code and payload sizes of every sandbox exec, read_file and write_file when autopatch is enabled")
+    trace_sample_rate: float = Field(default=1.0, ge=0, le=1, description="Fraction of samples given a full trace when autopatch is enabled, chosen by hashing the sample id so every epoch of a sample is traced or skipped together. Untraced samples still log their predictions and scores")
+    sample_name_template: str = Field(default="{task_name}-sample-{sample_id}-epoch-{epoch}", description="Template for sample display names. Available variables: {task_name}, {sample_id}, {epoch}")
+    max_payload_bytes: int | None = Field(default=None, ge=256, description="Maximum size in bytes of each sample input, output, metadata and scores field sent to Weave. Larger fields are truncated, with a marker giving their full size and hash")
+    strip_images: bool = Field(default=False, description="Whether to replace images in sample inputs and outputs sent to Weave with a marker")
+    deduplicate_inputs: bool = Field(default=False, description="Whether to send each sample's input to Weave only for its first epoch, with later epochs sending a reference to it by hash")
+    stream_predictions: bool = Field(default=False, description="Whether to release each Weave prediction once it has finished, keeping only running totals for the evaluation, so memory does not grow with the number of samples")
+    sample_log_workers: int = Field(default=8, ge=1, description="Number of worker tasks logging finished samples to Weave concurrently")
+    sample_log_queue_size: int = Field(default=1000, ge=1, description="Maximum number of finished samples held in memory waiting to be logged to Weave")
+    sample_log_queue_policy: Literal["block", "drop_oldest", "spill"] = Field(default="block", description="What to do with a finished sample when the Weave logging queue is full: wait for space, drop the oldest queued sample, or spill the sample to disk")
+    drain_timeout: float | None = Field(default=60.0, ge=0, description="Seconds to wait at the end of each task (and of the run) for queued samples to be logged to Weave before logging the evaluation summary")
@@ -0,0 +1,51 @@
+import time
+from typing import Any, Callable
+
+
+class MetricsBuffer:
+    """
+    Coalesces metric updates between writes to a wandb run.
+
+    Updates are merged into a single pending dict, with later values for a key replacing earlier ones,
+    so a flush always carries the latest value of every metric seen since the previous flush.
+    If neither an interval nor a batch size is set, every update is due to be flushed immediately.
+    """
+
+    def __init__(
+        self,
+        interval: float | None = None,
+        batch_size: int | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._clock = clock
+        self._pending: dict[str, Any] = {}
+        self._pending_updates: int = 0
+        self._last_flush: float = clock()
+
+    def __len__(self) -> int:
+        return self._pending_updates
+
+    def update(self, metrics: dict[str, Any]) -> None:
+        self._pending.update(metrics)
+        self._pending_updates += 1
+
+    def should_flush(self) -> bool:
+        if self._pending_updates == 0:
+            return False
+        if self.interval is None and self.batch_size is None:
+            return True
+        if self.batch_size is not None and self._pending_updates >= self.batch_size:
+            return True
+        return self.interval is not None and self._clock() - self._last_flush >= self.interval
+
+    def flush(self) -> dict[str, Any]:
+        """
+        Returns the coalesced metrics and resets the buffer.
+        """
+        metrics = self._pending
+        self._pending = {}
+        self._pending_updates = 0
+        self._last_flush = self._clock()
+        return metrics
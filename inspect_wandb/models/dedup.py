@@ -0,0 +1,73 @@
+import hashlib
+import logging
+from array import array
+from pathlib import Path
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+LEDGER_DIR = Path(".inspect_wandb") / "samples"
+
+
+class SampleLedger:
+    """
+    Record of the samples already counted in a wandb run, so that samples re-run by eval-set retries are only counted once.
+
+    Each sample is stored as a 64-bit hash of its (task_id, sample id, epoch). New keys are appended to a binary file of
+    unsigned 64-bit integers on `flush()`, which is reloaded when the run is resumed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._keys: set[int] = set()
+        self._pending = array("Q")
+        if path.exists():
+            keys = array("Q")
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                keys.frombytes(data[:len(data) - len(data) % keys.itemsize])
+            except OSError as e:
+                logger.warning(f"Could not read sample ledger {path}, samples will not be deduplicated: {e}")
+            self._keys.update(keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @classmethod
+    def for_run(cls, run_id: str, log_dir: str | None = None) -> "SampleLedger":
+        """
+        Returns the ledger for a run, stored beside the eval-set log dir if it is local, or in the working directory otherwise.
+        """
+        if log_dir is not None:
+            location = urlparse(log_dir)
+            if location.scheme in ("", "file"):
+                local_dir = Path(location.path if location.scheme == "file" else log_dir)
+                return cls(local_dir / ".inspect_wandb" / f"{run_id}.samples")
+        return cls(LEDGER_DIR / f"{run_id}.samples")
+
+    @staticmethod
+    def key(task_id: str, sample_id: int | str, epoch: int) -> int:
+        digest = hashlib.blake2b(f"{task_id}\0{sample_id}\0{epoch}".encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def add(self, key: int) -> bool:
+        """
+        Records a sample, returning False if it has already been counted.
+        """
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        self._pending.append(key)
+        return True
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "ab") as f:
+                self._pending.tofile(f)
+            self._pending = array("Q")
+        except OSError as e:
+            logger.warning(f"Could not write sample ledger {self.path}: {e}")
@@ -1,19 +1,32 @@
+import asyncio
 import logging
-from pathlib import Path
+from concurrent.futures import Future
+from functools import partial
 from typing import Any
 from typing_extensions import override
 
 import wandb
-from inspect_ai.hooks import Hooks, RunEnd, SampleEnd, TaskStart, EvalSetStart
-from inspect_ai.log import EvalSample
+from inspect_ai.hooks import Hooks, ModelUsageData, RunEnd, SampleEnd, TaskStart, TaskEnd, EvalSetStart
+from inspect_ai.log import EvalLog, EvalSample
 from inspect_ai.scorer import CORRECT
 from inspect_wandb.config.settings import ModelsSettings
 from inspect_wandb.config.extras_manager import INSTALLED_EXTRAS
+from inspect_wandb.models.buffer import MetricsBuffer
+from inspect_wandb.models.dedup import SampleLedger
+from inspect_wandb.models.writer import WandBWriter
+from inspect_wandb.models.uploads import FileUploader, UploadManifest, eval_log_artifact
+from inspect_wandb.models.stats import SCORES_PREFIX, ScoreAggregator, TaskMetrics
+from inspect_wandb.models.tables import SAMPLE_TABLE_KEY, SampleTable
+from inspect_wandb.models.throughput import ThroughputTracker
+from inspect_wandb.shared.utils import format_wandb_id_string
 if INSTALLED_EXTRAS["viz"]:
     from inspect_wandb.viz.inspect_viz_writer import InspectVizWriter
 
 logger = logging.getLogger(__name__)
 
+# Summary key recording which task_id each task's metric namespace belongs to, so that resumed runs keep them apart
+TASK_PREFIXES_KEY = "task_prefixes"
+
 class Metric:
     ACCURACY: str = "accuracy"
     SAMPLES: str = "samples"
@@ -30,6 +43,17 @@ class WandBModelHooks(Hooks):
     _active_runs: dict[str, dict[str, bool | BaseException | None]] = {}
 
     def __init__(self):
+        self._metrics_buffer = MetricsBuffer()
+        self._writer = WandBWriter()
+        self._score_aggregator = ScoreAggregator()
+        self._task_metrics: dict[str, TaskMetrics] = {}
+        self._artifact_uploads: set[asyncio.Task[None]] = set()
+        self._sample_table: SampleTable | None = None
+        self._throughput: ThroughputTracker | None = None
+        self._sample_ledger: SampleLedger | None = None
+        self._task_ids: dict[str, str] = {}
+        # The task_id whose metrics use each namespace, so that tasks which share a name and model get separate namespaces
+        self._task_prefixes: dict[str, str] = {}
         if INSTALLED_EXTRAS["viz"]:
             self.viz_writer = InspectVizWriter()
         else:
@@ -60,37 +84,49 @@ class WandBModelHooks(Hooks):
         if data.exception is not None:
             self._active_runs[data.run_id]["exception"] = data.exception
 
-        self._log_summary(data)
+        self._flush_metrics()
+        self._flush_sample_table()
+        summary_written = self._log_summary(data)
+        if self._sample_ledger is not None:
+            summary_written.add_done_callback(partial(self._flush_sample_ledger, self._sample_ledger))
+        self._task_metrics.clear()
+        self._task_ids.clear()
+        self._task_prefixes.clear()
 
         if self.settings is not None and self.settings.viz and self.viz_writer is not None:
             await self.viz_writer.log_scores_heatmap(data, self.run)
 
         if self.settings is not None and self.settings.files:
-            for file in self.settings.files:
-                file_path = Path(file)
-                if file_path.exists():
-                    try:
-                        self.run.save(str(file), policy="now")  # TODO: fix wandb Symlinked warning for folder upload
-                        logger.info(f"Successfully saved {file} to wandb")
-                    except Exception as e:
-                        logger.warning(f"Failed to save {file} to wandb: {e}")
-                else:
-                    logger.warning(f"File or folder '{file}' does not exist. Skipping wandb upload.")
+            uploader = FileUploader(
+                self.run,
+                UploadManifest.for_run(self.run.id),
+                max_workers=self.settings.upload_concurrency,
+            )
+            await asyncio.to_thread(uploader.upload, self.settings.files)
+
+        if self._artifact_uploads:
+            await asyncio.gather(*self._artifact_uploads)
 
         if data.exception is not None and isinstance(data.exception, KeyboardInterrupt):
             logger.error("Inspect exited due to KeyboardInterrupt")
-            self.run.finish(exit_code=1)
+            self._writer.submit(self.run.finish, exit_code=1)
         elif data.exception is not None and isinstance(data.exception, SystemExit):
             logger.error(f"SystemExit running eval set: {data.exception}")
-            self.run.finish(exit_code=3)
+            self._writer.submit(self.run.finish, exit_code=3)
         elif (last_run:= all([not run["running"] for run in self._active_runs.values()])) and data.exception is not None:
             logger.error("Inspect exited due to exception")
-            self.run.finish(exit_code=2)
+            self._writer.submit(self.run.finish, exit_code=2)
         elif not(all(log.status == "success" for log in data.logs)) and last_run:
             logger.warning("One or more tasks failed, may retry if eval-set")
-            self.run.finish(exit_code=4)
+            self._writer.submit(self.run.finish, exit_code=4)
         elif last_run:
-            self.run.finish(exit_code=0)
+            self._writer.submit(self.run.finish, exit_code=0)
+
+        drain_timeout = self.settings.writer_drain_timeout if self.settings is not None else None
+        if not await self._writer.drain(timeout=drain_timeout):
+            logger.warning(f"Timed out after {drain_timeout}s waiting for wandb writes to complete, {self._writer.queue_depth} calls still queued")
+        if all(not run["running"] for run in self._active_runs.values()):
+            self._writer.stop()
 
         self._wandb_initialized = False
 
@@ -127,7 +163,14 @@ class WandBModelHooks(Hooks):
 
         # Lazy initialization: only init WandB when first task starts
         if not self._wandb_initialized:
-            self.run = wandb.init(
+            # The previous run's writer may still be running its queued calls, including run.finish
+            await asyncio.to_thread(self._writer.join, self.settings.writer_drain_timeout)
+            if self.settings.background_writer and not self._writer.running:
+                self._writer = WandBWriter(max_queue_size=self.settings.writer_queue_size)
+                self._writer.start()
+
+            self.run = await self._writer.call(
+                wandb.init,
                 id=wandb_run_id, 
                 name=f"Inspect eval-set: {self.eval_set_log_dir}" if self._is_eval_set else None,
                 entity=self.settings.entity, 
@@ -135,19 +178,33 @@ class WandBModelHooks(Hooks):
                 resume="allow"
             ) 
 
+            if self._is_eval_set and data.eval_set_id is not None and self.settings.deduplicate_samples:
+                self._sample_ledger = SampleLedger.for_run(data.eval_set_id, self.eval_set_log_dir)
             if self.run.summary:
                 self._total_samples = int(self.run.summary.get("samples_total", 0))
                 self._correct_samples = int(self.run.summary.get("samples_correct", 0))
+            self._score_aggregator = ScoreAggregator.from_summary(self.run.summary) if self.run.summary else ScoreAggregator()
+            self._task_prefixes = self._restore_task_prefixes()
 
             if self.settings.add_metadata_to_config and data.spec.metadata is not None:
-                self.run.config.update(
+                self._writer.submit(
+                    self.run.config.update,
                     {k: v for k,v in data.spec.metadata.items() if k != "inspect_wandb_models_config"},
                     allow_val_change=True
                 )
             if self.settings.config:
-                self.run.config.update(self.settings.config, allow_val_change=True)
+                self._writer.submit(self.run.config.update, self.settings.config, allow_val_change=True)
 
-            _ = self.run.define_metric(step_metric=Metric.SAMPLES, name=Metric.ACCURACY)
+            self._writer.submit(self.run.define_metric, step_metric=Metric.SAMPLES, name=Metric.ACCURACY)
+            self._writer.submit(self.run.define_metric, step_metric=Metric.SAMPLES, name=f"{SCORES_PREFIX}/*")
+            self._metrics_buffer = MetricsBuffer(
+                interval=self.settings.log_interval,
+                batch_size=self.settings.log_batch_size,
+            )
+            if self.settings.throughput_window is not None:
+                self._throughput = ThroughputTracker(self.settings.throughput_window, prices=self.settings.model_prices)
+            if self.settings.sample_table:
+                self._sample_table = SampleTable(chunk_size=self.settings.sample_table_chunk_size)
             self._wandb_initialized = True
             logger.info(f"WandB initialized for task {data.spec.task}")
         
@@ -156,38 +213,163 @@ class WandBModelHooks(Hooks):
                 f"inspect_model:{data.spec.model}",
                 f"inspect_dataset:{data.spec.dataset.name}",
             )
-            if self.run.tags:
-                self.run.tags = self.run.tags + inspect_tags
-            else:
-                self.run.tags = inspect_tags
-
-            if self.settings.tags is not None and self.run.tags is not None:
-                self.run.tags = self.run.tags + tuple(self.settings.tags)
+            self._writer.submit(self._add_tags, inspect_tags + tuple(self.settings.tags or ()))
 
             data.spec.metadata = (data.spec.metadata or {}) | {"wandb_run_url": self.run.url}
 
+        self._register_task_metrics(data)
+
+    @override
+    async def on_task_end(self, data: TaskEnd) -> None:
+        """
+        Hook to run at the end of each inspect task.
+        If enabled, queues the task's log to be logged as an artifact on the wandb writer, while other tasks are still running.
+        """
+        if not self._hooks_enabled or not self._wandb_initialized:
+            return
+        assert self.settings is not None
+        if self.settings.log_artifacts and data.log.location:
+            upload = asyncio.create_task(self._writer.call(self._log_eval_artifact, data.log))
+            self._artifact_uploads.add(upload)
+            upload.add_done_callback(self._artifact_uploads.discard)
+
+    @override
+    async def on_model_usage(self, data: ModelUsageData) -> None:
+        if self._hooks_enabled and self._throughput is not None:
+            self._throughput.add_usage(data.model_name, data.usage)
+
     @override
     async def on_sample_end(self, data: SampleEnd) -> None:
         # Skip if hooks are disabled for this run
         if not self._hooks_enabled:
             return
-            
+
+        # Every sample counts towards the flush cadence, so latency and throughput are logged even if no sample is scored
+        self._metrics_buffer.update(self._add_sample(data))
+        if self._metrics_buffer.should_flush():
+            self._flush_metrics()
+
+    def _add_sample(self, data: SampleEnd) -> dict[str, Any]:
+        """
+        Records a finished sample, returning its score metrics if it is counted and scored.
+        """
+        if self._throughput is not None:
+            self._throughput.add_sample(data.sample.model_usage)
+        if self._sample_table is not None:
+            self._sample_table.add(data.eval_id, data.sample)
+            if self._sample_table.full():
+                self._flush_sample_table()
+        if self._sample_ledger is not None and data.sample.error is not None:
+            logger.debug(f"Sample {data.sample.id} (epoch {data.sample.epoch}) errored, leaving it to be counted by an eval-set retry")
+            return {}
+        if self._already_counted(data):
+            logger.debug(f"Sample {data.sample.id} (epoch {data.sample.epoch}) already counted in this run, skipping")
+            return {}
+
         self._total_samples += 1
-        if data.sample.scores:
-            self._correct_samples += int(self._is_correct(data.sample))
-            self.run.log(
-                {Metric.SAMPLES: self._total_samples, Metric.ACCURACY: self._accuracy()}
-            )
+        if (task_metrics := self._task_metrics.get(data.eval_id)) is not None:
+            task_metrics.add_latency(data.sample.total_time, data.sample.working_time)
+        if not data.sample.scores:
+            return {}
+        correct = self._is_correct(data.sample)
+        self._correct_samples += int(correct)
+        metrics = (
+            {Metric.SAMPLES: self._total_samples, Metric.ACCURACY: self._accuracy()}
+            | self._score_aggregator.add(data.sample.scores)
+        )
+        if task_metrics is not None:
+            metrics |= task_metrics.add(data.sample.scores, correct)
+        return metrics
+
+    def _already_counted(self, data: SampleEnd) -> bool:
+        """
+        Checks whether a sample has already been counted in this run, e.g. by an earlier attempt of a retried eval-set.
+        Samples are identified by the task's task_id rather than eval_id, since eval_id changes on each retry.
+        """
+        if self._sample_ledger is None or (task_id := self._task_ids.get(data.eval_id)) is None:
+            return False
+        return not self._sample_ledger.add(SampleLedger.key(task_id, data.sample.id, data.sample.epoch))
 
-    def _log_summary(self, data: RunEnd) -> None:
+    def _register_task_metrics(self, data: TaskStart) -> None:
+        """
+        Creates the counters for a task, namespaced by task and model, with the task's own step metric.
+        Tasks running concurrently in an eval-set each get separate metrics in the shared run. Another task with the same
+        name and model (e.g. with different task args) is namespaced with the start of its task_id as well. Which task
+        each namespace belongs to is kept in the run summary, so a task resumed in a later run gets the same namespace.
+        """
+        prefix = f"{format_wandb_id_string(data.spec.task)}/{format_wandb_id_string(data.spec.model)}"
+        if self._task_prefixes.setdefault(prefix, data.spec.task_id) != data.spec.task_id:
+            prefix = f"{prefix}-{data.spec.task_id[:8]}"
+            self._task_prefixes[prefix] = data.spec.task_id
+        task_metrics = TaskMetrics.from_summary(prefix, self.run.summary)
+        self._task_metrics[data.eval_id] = task_metrics
+        self._task_ids[data.eval_id] = data.spec.task_id
+        if self._sample_table is not None:
+            self._sample_table.register_task(data.eval_id, data.spec.task, data.spec.model)
+        self._writer.submit(self.run.define_metric, task_metrics.step_metric)
+        self._writer.submit(self.run.define_metric, f"{prefix}/*", step_metric=task_metrics.step_metric)
+
+    def _restore_task_prefixes(self) -> dict[str, str]:
+        """
+        Restores the task_id each metric namespace was assigned to from a (resumed) wandb run summary.
+        """
+        if not self.run.summary:
+            return {}
+        try:
+            previous = dict(self.run.summary.get(TASK_PREFIXES_KEY) or {})
+            return {str(prefix): str(task_id) for prefix, task_id in previous.items()}
+        except (TypeError, ValueError):
+            return {}
+
+    def _flush_metrics(self) -> None:
+        metrics = self._metrics_buffer.flush()
+        for task_metrics in self._task_metrics.values():
+            metrics |= task_metrics.latency_metrics()
+        if self._throughput is not None:
+            metrics |= self._throughput.metrics()
+        if metrics:
+            self._writer.submit(self.run.log, metrics, droppable=True)
+
+    def _log_eval_artifact(self, log: EvalLog) -> None:
+        try:
+            self.run.log_artifact(eval_log_artifact(log), aliases=["latest", log.status])
+            logger.info(f"Logged {log.location} to wandb as an artifact")
+        except Exception as e:
+            logger.warning(f"Failed to log {log.location} to wandb as an artifact: {e}")
+
+    def _flush_sample_table(self) -> None:
+        if self._sample_table is not None and (table := self._sample_table.flush()) is not None:
+            self._writer.submit(self.run.log, {SAMPLE_TABLE_KEY: table})
+
+    def _add_tags(self, tags: tuple[str, ...]) -> None:
+        self.run.tags = (self.run.tags or ()) + tags
+
+    def _log_summary(self, data: RunEnd) -> Future[None]:
         summary = {
             "samples_total": self._total_samples,
             "samples_correct": self._correct_samples,
             "accuracy": self._accuracy(),
             "logs": [log.location for log in data.logs],
-        }
-        self.run.summary.update(summary)
+        } | self._score_aggregator.summary()
+        for task_metrics in self._task_metrics.values():
+            summary |= task_metrics.summary()
+        if self._task_prefixes:
+            summary[TASK_PREFIXES_KEY] = dict(self._task_prefixes)
+        if self._writer.running:
+            summary["writer_dropped_events"] = self._writer.dropped_events
+            summary["writer_max_queue_depth"] = self._writer.max_queue_depth
+        summary_written = self._writer.submit(self.run.summary.update, summary)
         logger.info(f"WandB Summary: {summary}")
+        return summary_written
+
+    @staticmethod
+    def _flush_sample_ledger(ledger: SampleLedger, summary_written: Future[None]) -> None:
+        """
+        Persists the samples counted in this run once the summary holding their counts has been written, so that the ledger
+        never records samples whose counts were lost.
+        """
+        if not summary_written.cancelled() and summary_written.exception() is None:
+            ledger.flush()
 
     def _is_correct(self, sample: EvalSample) -> bool:
         if not sample.scores:
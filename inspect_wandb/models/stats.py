@@ -0,0 +1,307 @@
+import math
+from dataclasses import dataclass, field
+from typing import Any, Mapping
+from inspect_ai.scorer import CORRECT, INCORRECT, NOANSWER, PARTIAL, Score, Value
+
+SCORES_PREFIX = "scores"
+LATENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+_STRING_SCORE_VALUES = {CORRECT: 1.0, INCORRECT: 0.0, PARTIAL: 0.5, NOANSWER: 0.0}
+_LATENCY_FIELDS = ("total_time", "working_time")
+_MIN_SKETCH_VALUE = 1e-9
+
+
+class RunningStat:
+    """
+    Running count, mean and variance of a stream of values, updated in O(1) with Welford's algorithm.
+    """
+
+    __slots__ = ("count", "mean", "_m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, variance: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self._m2 = variance * count
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> float:
+        """
+        Population variance of the values seen so far.
+        """
+        return self._m2 / self.count if self.count else 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {"count": self.count, "mean": self.mean, "variance": self.variance}
+
+
+class ScoreAggregator:
+    """
+    Keeps a RunningStat for every scorer, and for every key of dict-valued scores (as `scorer/key`).
+    Score values which can't be interpreted as numbers are skipped.
+    """
+
+    def __init__(self, prefix: str = SCORES_PREFIX):
+        self.prefix = prefix
+        self.stats: dict[str, RunningStat] = {}
+
+    def add(self, scores: Mapping[str, Score]) -> dict[str, float]:
+        """
+        Adds a sample's scores, returning the updated metrics to log.
+        """
+        metrics: dict[str, float] = {}
+        for scorer, score in scores.items():
+            for name, value in flatten_score_value(scorer, score.value):
+                stat = self.stats.get(name)
+                if stat is None:
+                    stat = self.stats[name] = RunningStat()
+                stat.add(value)
+                metrics[f"{self.prefix}/{name}/mean"] = stat.mean
+                metrics[f"{self.prefix}/{name}/variance"] = stat.variance
+        return metrics
+
+    def summary(self) -> dict[str, float]:
+        return {
+            f"{self.prefix}/{name}/{field}": value
+            for name, stat in self.stats.items()
+            for field, value in stat.to_dict().items()
+        }
+
+    @classmethod
+    def from_summary(cls, summary: Any, prefix: str = SCORES_PREFIX) -> "ScoreAggregator":
+        """
+        Restores the aggregates written by `summary()` to a (resumed) wandb run summary.
+        """
+        aggregator = cls(prefix)
+        for key in list(summary.keys()):
+            if not (isinstance(key, str) and key.startswith(f"{prefix}/") and key.endswith("/count")):
+                continue
+            name = key[len(prefix) + 1:-len("/count")]
+            try:
+                aggregator.stats[name] = RunningStat(
+                    count=int(summary.get(key)),
+                    mean=float(summary.get(f"{prefix}/{name}/mean")),
+                    variance=float(summary.get(f"{prefix}/{name}/variance")),
+                )
+            except (TypeError, ValueError):
+                continue
+        return aggregator
+
+
+class QuantileSketch:
+    """
+    Mergeable quantile sketch (DDSketch) over positive values, such as sample latencies.
+
+    Values are counted in logarithmic buckets, so every quantile is estimated to within `relative_accuracy` of its true value.
+    Memory is bounded by `max_buckets`: once it is reached, the lowest buckets are collapsed together, which keeps the
+    upper quantiles accurate. Sketches with the same relative accuracy can be merged, e.g. across retried eval-set attempts.
+    """
+
+    __slots__ = ("relative_accuracy", "max_buckets", "count", "zero_count", "buckets", "_gamma", "_log_gamma")
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"relative_accuracy must be between 0 and 1, got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.count: int = 0
+        self.zero_count: int = 0
+        self.buckets: dict[int, int] = {}
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value <= _MIN_SKETCH_VALUE:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge quantile sketches with different relative accuracy")
+        self.count += other.count
+        self.zero_count += other.zero_count
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def quantile(self, q: float) -> float | None:
+        return self.quantiles((q,))[0]
+
+    def quantiles(self, qs: tuple[float, ...]) -> list[float | None]:
+        """
+        Estimates several quantiles in a single pass over the buckets. `qs` must be in ascending order.
+        """
+        if self.count == 0:
+            return [None] * len(qs)
+        results: list[float | None] = []
+        ranks = iter(q * (self.count - 1) for q in qs)
+        rank = next(ranks, None)
+        seen = self.zero_count
+        while rank is not None and seen > rank:
+            results.append(0.0)
+            rank = next(ranks, None)
+        for index in sorted(self.buckets):
+            if rank is None:
+                break
+            seen += self.buckets[index]
+            while rank is not None and seen > rank:
+                results.append(2 * self._gamma ** index / (self._gamma + 1))
+                rank = next(ranks, None)
+        return results
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zero_count": self.zero_count,
+            "buckets": {str(index): count for index, count in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Any, max_buckets: int = 2048) -> "QuantileSketch":
+        """
+        Restores a sketch written by `to_dict()`, from a dict or a (resumed) wandb run summary entry.
+        """
+        sketch = cls(relative_accuracy=float(data["relative_accuracy"]), max_buckets=max_buckets)
+        sketch.zero_count = int(data.get("zero_count", 0))
+        sketch.buckets = {int(index): int(count) for index, count in dict(data.get("buckets", {})).items()}
+        sketch.count = sketch.zero_count + sum(sketch.buckets.values())
+        if len(sketch.buckets) > max_buckets:
+            sketch._collapse()
+        return sketch
+
+    def _collapse(self) -> None:
+        indexes = sorted(self.buckets)
+        excess = indexes[:len(indexes) - self.max_buckets + 1]
+        self.buckets[excess[-1]] = sum(self.buckets.pop(index) for index in excess[:-1]) + self.buckets[excess[-1]]
+
+
+@dataclass(slots=True)
+class TaskMetrics:
+    """
+    Sample counters and score aggregates for a single task, logged under `prefix`.
+    """
+
+    prefix: str
+    total_samples: int = 0
+    correct_samples: int = 0
+    scores: ScoreAggregator = field(init=False)
+    latency: dict[str, QuantileSketch] = field(init=False)
+    _latency_updated: bool = field(default=False, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self.scores = ScoreAggregator(prefix=f"{self.prefix}/{SCORES_PREFIX}")
+        self.latency = {name: QuantileSketch() for name in _LATENCY_FIELDS}
+
+    @property
+    def step_metric(self) -> str:
+        return f"{self.prefix}/samples"
+
+    def accuracy(self) -> float:
+        return self.correct_samples / self.total_samples if self.total_samples else 0.0
+
+    def add(self, scores: Mapping[str, Score], correct: bool) -> dict[str, float]:
+        """
+        Adds a sample's scores, returning the updated metrics to log.
+        """
+        self.total_samples += 1
+        self.correct_samples += int(correct)
+        return {
+            self.step_metric: self.total_samples,
+            f"{self.prefix}/accuracy": self.accuracy(),
+        } | self.scores.add(scores)
+
+    def add_latency(self, total_time: float | None, working_time: float | None) -> None:
+        for name, value in zip(_LATENCY_FIELDS, (total_time, working_time)):
+            if value is not None:
+                self.latency[name].add(value)
+                self._latency_updated = True
+
+    def latency_metrics(self) -> dict[str, float]:
+        """
+        Returns the latency quantiles if any latencies have been added since they were last returned.
+        """
+        if not self._latency_updated:
+            return {}
+        self._latency_updated = False
+        return self._latency_quantiles()
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            f"{self.prefix}/samples_total": self.total_samples,
+            f"{self.prefix}/samples_correct": self.correct_samples,
+            f"{self.prefix}/accuracy": self.accuracy(),
+        } | self.scores.summary() | self._latency_quantiles() | {
+            f"{self.prefix}/{name}/sketch": sketch.to_dict() for name, sketch in self.latency.items() if sketch.count
+        }
+
+    def _latency_quantiles(self) -> dict[str, float]:
+        return {
+            f"{self.prefix}/{name}/p{round(q * 100)}": value
+            for name, sketch in self.latency.items()
+            for q, value in zip(LATENCY_QUANTILES, sketch.quantiles(LATENCY_QUANTILES))
+            if value is not None
+        }
+
+    @classmethod
+    def from_summary(cls, prefix: str, summary: Any) -> "TaskMetrics":
+        """
+        Restores the counters and aggregates written by `summary()` to a (resumed) wandb run summary.
+        """
+        try:
+            total_samples = int(summary.get(f"{prefix}/samples_total", 0))
+            correct_samples = int(summary.get(f"{prefix}/samples_correct", 0))
+        except (TypeError, ValueError):
+            total_samples, correct_samples = 0, 0
+        task_metrics = cls(prefix=prefix, total_samples=total_samples, correct_samples=correct_samples)
+        task_metrics.scores = ScoreAggregator.from_summary(summary, prefix=task_metrics.scores.prefix)
+        for name, sketch in task_metrics.latency.items():
+            previous = summary.get(f"{prefix}/{name}/sketch")
+            if previous is None:
+                continue
+            try:
+                sketch.merge(QuantileSketch.from_dict(previous))
+            except (AttributeError, KeyError, TypeError, ValueError):
+                continue
+        return task_metrics
+
+
+def score_value_to_float(value: Value | None) -> float | None:
+    """
+    Converts a score value to a float, or None if it is not numeric or not finite (e.g. NaN, or the string "inf").
+    """
+    if isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        if value in _STRING_SCORE_VALUES:
+            return _STRING_SCORE_VALUES[value]
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+    else:
+        return None
+    return number if math.isfinite(number) else None
+
+
+def flatten_score_value(scorer: str, value: Value) -> list[tuple[str, float]]:
+    if isinstance(value, Mapping):
+        return [
+            (f"{scorer}/{key}", number)
+            for key, item in value.items()
+            if (number := score_value_to_float(item)) is not None
+        ]
+    number = score_value_to_float(value)
+    return [(scorer, number)] if number is not None else []
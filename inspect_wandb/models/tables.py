@@ -0,0 +1,69 @@
+from typing import Any
+
+import wandb
+from inspect_ai.log import EvalSample
+
+from inspect_wandb.models.stats import flatten_score_value
+
+SAMPLE_TABLE_KEY = "sample_table"
+
+_BASE_COLUMNS = ["task", "model", "sample_id", "epoch", "total_time", "working_time", "total_tokens", "error"]
+
+
+class SampleTable:
+    """
+    Streams one row per sample to a wandb run as a series of fixed-size tables, so memory use is bounded by `chunk_size`
+    rather than the number of samples in the run. Each chunk is logged under the same key, and can be viewed as a single
+    merged table in the wandb UI.
+
+    Rows only hold primitive values taken from the sample, and scorer columns (`score/<scorer>`) are added per chunk for the
+    scorers seen in it.
+    """
+
+    def __init__(self, chunk_size: int = 1000):
+        self.chunk_size = chunk_size
+        self.rows_logged: int = 0
+        self._rows: list[dict[str, Any]] = []
+        self._score_columns: dict[str, None] = {}
+        self._tasks: dict[str, tuple[str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def register_task(self, eval_id: str, task: str, model: str) -> None:
+        self._tasks[eval_id] = (task, model)
+
+    def add(self, eval_id: str, sample: EvalSample) -> None:
+        task, model = self._tasks.get(eval_id, (None, None))
+        row: dict[str, Any] = {
+            "task": task,
+            "model": model,
+            "sample_id": str(sample.id),
+            "epoch": sample.epoch,
+            "total_time": sample.total_time,
+            "working_time": sample.working_time,
+            "total_tokens": sum(usage.total_tokens for usage in sample.model_usage.values()),
+            "error": sample.error.message if sample.error is not None else None,
+        }
+        for scorer, score in (sample.scores or {}).items():
+            for name, value in flatten_score_value(scorer, score.value):
+                column = f"score/{name}"
+                row[column] = value
+                self._score_columns[column] = None
+        self._rows.append(row)
+
+    def full(self) -> bool:
+        return len(self._rows) >= self.chunk_size
+
+    def flush(self) -> wandb.Table | None:
+        """
+        Returns the pending rows as a table and resets the chunk, or None if there are no pending rows.
+        """
+        if not self._rows:
+            return None
+        columns = _BASE_COLUMNS + list(self._score_columns)
+        table = wandb.Table(columns=columns, data=[[row.get(column) for column in columns] for row in self._rows])
+        self.rows_logged += len(self._rows)
+        self._rows = []
+        self._score_columns = {}
+        return table
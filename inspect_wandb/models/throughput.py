@@ -0,0 +1,133 @@
+import time
+from collections import deque
+from typing import Callable, Mapping
+
+from inspect_ai.model import ModelUsage
+
+from inspect_wandb.config.settings.models import ModelPrice
+from inspect_wandb.shared.utils import format_wandb_id_string
+
+THROUGHPUT_PREFIX = "throughput"
+
+
+class RateWindow:
+    """
+    Sums of a fixed set of values over a rolling time window, kept in a ring buffer of at most `capacity` entries.
+    If the buffer fills up within the window, rates are computed over the span of the entries it still holds.
+    Running totals of each value are updated as entries are added and evicted, so rates cost nothing per entry.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        capacity: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+        start: float | None = None,
+    ):
+        self.window = window
+        self._clock = clock
+        self._start = clock() if start is None else start
+        self._entries: deque[tuple[float, tuple[float, ...]]] = deque(maxlen=capacity)
+        self._totals: list[float] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, *values: float) -> None:
+        if len(self._entries) == self._entries.maxlen:
+            self._evict()
+        if not self._totals:
+            self._totals = [0.0] * len(values)
+        for index, value in enumerate(values):
+            self._totals[index] += value
+        self._entries.append((self._clock(), values))
+
+    def rates(self) -> tuple[float, ...] | None:
+        """
+        Returns the per-second rate of each value over the window, or None if there are no entries in the window.
+        """
+        now = self._clock()
+        while self._entries and self._entries[0][0] < now - self.window:
+            self._evict()
+        if not self._entries:
+            return None
+        elapsed = min(self.window, now - self._start)
+        if len(self._entries) == self._entries.maxlen:
+            elapsed = min(elapsed, now - self._entries[0][0])
+        if elapsed <= 0:
+            return None
+        return tuple(total / elapsed for total in self._totals)
+
+    def _evict(self) -> None:
+        _, values = self._entries.popleft()
+        if not self._entries:
+            # Resets the totals rather than leaving floating point error from the subtractions
+            self._totals = []
+            return
+        for index, value in enumerate(values):
+            self._totals[index] -= value
+
+
+class ThroughputTracker:
+    """
+    Rolling per-model token throughput (and cost rate, for models with a price), plus sample throughput for the run.
+    Metrics are only returned if usage or samples have been recorded since they were last returned.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        prices: Mapping[str, ModelPrice] | None = None,
+        capacity: int = 4096,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window = window
+        self.prices = dict(prices or {})
+        self._capacity = capacity
+        self._clock = clock
+        self._models: dict[str, RateWindow] = {}
+        self._start = clock()
+        self._samples = RateWindow(window, capacity, clock, start=self._start)
+        self._updated: bool = False
+
+    def add_usage(self, model: str, usage: ModelUsage) -> None:
+        rate_window = self._models.get(model)
+        if rate_window is None:
+            rate_window = self._models[model] = RateWindow(self.window, self._capacity, self._clock, start=self._start)
+        price = self.prices.get(model)
+        rate_window.add(
+            usage.input_tokens,
+            usage.output_tokens,
+            usage.total_tokens,
+            _cost(usage, price) if price is not None else 0.0,
+        )
+        self._updated = True
+
+    def add_sample(self, model_usage: Mapping[str, ModelUsage]) -> None:
+        self._samples.add(1, sum(usage.total_tokens for usage in model_usage.values()))
+        self._updated = True
+
+    def metrics(self) -> dict[str, float]:
+        if not self._updated:
+            return {}
+        self._updated = False
+        metrics: dict[str, float] = {}
+        for model, rate_window in self._models.items():
+            if (rates := rate_window.rates()) is None:
+                continue
+            prefix = f"{THROUGHPUT_PREFIX}/{format_wandb_id_string(model)}"
+            input_rate, output_rate, total_rate, cost_rate = rates
+            metrics[f"{prefix}/input_tokens_per_sec"] = input_rate
+            metrics[f"{prefix}/output_tokens_per_sec"] = output_rate
+            metrics[f"{prefix}/total_tokens_per_sec"] = total_rate
+            if model in self.prices:
+                metrics[f"{prefix}/cost_per_sec"] = cost_rate
+        if (sample_rates := self._samples.rates()) is not None:
+            samples_rate, tokens_rate = sample_rates
+            metrics[f"{THROUGHPUT_PREFIX}/samples_per_sec"] = samples_rate
+            metrics[f"{THROUGHPUT_PREFIX}/tokens_per_sample"] = tokens_rate / samples_rate
+        return metrics
+
+
+def _cost(usage: ModelUsage, price: ModelPrice) -> float:
+    return (usage.input_tokens * price.input + usage.output_tokens * price.output) / 1_000_000
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterator
+from urllib.parse import urlparse
+
+import wandb
+from inspect_ai.log import EvalLog
+
+from inspect_wandb.shared.utils import format_wandb_id_string
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_DIR = Path(".inspect_wandb") / "uploads"
+
+
+class UploadManifest:
+    """
+    Local record of the files already handed to a wandb run with `run.save`, as (path, size, mtime, hash) entries.
+
+    A file is considered already uploaded if its size and mtime are unchanged, or if its size and content hash are unchanged.
+    Hashes are computed lazily, only for a recorded file whose mtime has changed but not its size.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._entries: dict[str, tuple[int, int, str | None]] = {}
+        self._lock = threading.Lock()
+        if path.exists():
+            try:
+                self._entries = {k: tuple(v) for k, v in json.loads(path.read_text()).items()}  # type: ignore[misc]
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read upload manifest {path}, all files will be uploaded: {e}")
+
+    @classmethod
+    def for_run(cls, run_id: str) -> "UploadManifest":
+        return cls(MANIFEST_DIR / f"{run_id}.json")
+
+    def is_uploaded(self, file: Path, stat: os.stat_result) -> tuple[bool, str | None]:
+        """
+        Returns whether the file is already uploaded, along with its content hash if known.
+        The hash is only computed if the file was recorded with the same size but a different mtime, so new and resized
+        files are not read.
+        """
+        entry = self._entries.get(str(file.resolve()))
+        if entry is None or entry[0] != stat.st_size:
+            return False, None
+        if entry[1] == stat.st_mtime_ns:
+            return True, entry[2]
+        digest = _file_digest(file)
+        return entry[2] == digest, digest
+
+    def record(self, file: Path, stat: os.stat_result, digest: str | None) -> None:
+        with self._lock:
+            self._entries[str(file.resolve())] = (stat.st_size, stat.st_mtime_ns, digest)
+
+    def save(self) -> None:
+        with self._lock:
+            entries = dict(self._entries)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(entries))
+        tmp_path.replace(self.path)
+
+
+class FileUploader:
+    """
+    Saves files and folders to a wandb run with bounded concurrency, skipping files recorded in the run's upload manifest.
+    Folders are expanded lazily while uploads are in flight, so only `max_workers` files are pending at any time.
+    Files are checked against the manifest and saved on the worker threads. This bypasses the background writer: `run.save`
+    only hands the file to wandb's thread-safe interface for its own uploader process, and the run is finished only after
+    `upload` returns, so the saves need no ordering with the run's other calls.
+    """
+
+    def __init__(self, run: wandb.Run, manifest: UploadManifest, max_workers: int = 8):
+        self.run = run
+        self.manifest = manifest
+        self.max_workers = max_workers
+        self.uploaded: int = 0
+        self.skipped: int = 0
+        self._lock = threading.Lock()
+
+    def upload(self, paths: list[str]) -> None:
+        pending: set[Future] = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inspect-wandb-upload") as executor:
+            for path in paths:
+                root = Path(path)
+                if not root.exists():
+                    logger.warning(f"File or folder '{path}' does not exist. Skipping wandb upload.")
+                    continue
+                for file, base_path in _expand(root):
+                    if len(pending) >= self.max_workers:
+                        _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    pending.add(executor.submit(self._upload_file, file, base_path))
+            wait(pending)
+        self.manifest.save()
+        logger.info(f"Saved {self.uploaded} files to wandb, skipped {self.skipped} files already saved to this run")
+
+    def _upload_file(self, file: Path, base_path: str | None) -> None:
+        try:
+            stat = file.stat()
+            uploaded, digest = self.manifest.is_uploaded(file, stat)
+            if uploaded:
+                self.manifest.record(file, stat, digest)
+                with self._lock:
+                    self.skipped += 1
+                return
+            if base_path is None:
+                self.run.save(str(file), policy="now")
+            else:
+                self.run.save(str(file), base_path=base_path, policy="now")
+            self.manifest.record(file, stat, digest)
+            with self._lock:
+                self.uploaded += 1
+            logger.info(f"Successfully saved {file} to wandb")
+        except Exception as e:
+            logger.warning(f"Failed to save {file} to wandb: {e}")
+
+
+def eval_log_artifact(log: EvalLog) -> wandb.Artifact:
+    """
+    Builds a versioned artifact for a task's log, named by task and model so that reruns and eval-set retries of the
+    same task are logged as new versions of one artifact. Remote logs (e.g. on S3) are added as references.
+    """
+    artifact = wandb.Artifact(
+        name=f"{format_wandb_id_string(log.eval.task)}-{format_wandb_id_string(log.eval.model)}",
+        type="inspect-log",
+        metadata={
+            "eval_id": log.eval.eval_id,
+            "task": log.eval.task,
+            "model": log.eval.model,
+            "status": log.status,
+        },
+    )
+    location = urlparse(log.location)
+    if location.scheme in ("", "file"):
+        path = location.path if location.scheme == "file" else log.location
+        artifact.add_file(path, name=Path(path).name)
+    else:
+        artifact.add_reference(log.location)
+    return artifact
+
+
+def _expand(root: Path) -> Iterator[tuple[Path, str | None]]:
+    """
+    Yields the files to upload for a path, with the base path to save folder contents relative to.
+    """
+    if root.is_file():
+        yield root, None
+        return
+    base_path = str(root.parent)
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file():
+                    yield Path(entry.path), base_path
+
+
+def _file_digest(file: Path) -> str:
+    with open(file, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WandBWriter:
+    """
+    Runs wandb SDK calls in order on a single background thread, so that slow wandb I/O does not stall Inspect's event loop.
+
+    Calls are placed on a queue which never blocks the caller. Once `max_queue_size` calls are queued, droppable calls
+    (e.g. metric logs) are dropped and counted, while all other calls are still queued. Until the writer is started,
+    and once its thread has exited after `stop`, calls are run inline on the calling thread.
+    """
+
+    def __init__(self, max_queue_size: int = 10_000):
+        self.max_queue_size = max_queue_size
+        self._queue: deque[tuple[Future, Callable[..., Any], tuple, dict]] = deque()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        # Whether the thread is taking calls, which it does until it has run every call submitted before it exits
+        self._accepting: bool = False
+        self._stopping: bool = False
+        self.dropped_events: int = 0
+        self.max_queue_depth: int = 0
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the writer has been started and not stopped, although a stopped writer's thread may still be running queued calls.
+        """
+        return self._accepting and not self._stopping
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def start(self) -> None:
+        if self._accepting:
+            return
+        self._accepting = True
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="inspect-wandb-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the writer thread once all submitted calls have run, including any submitted while it is stopping.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+
+    def join(self, timeout: float | None = None) -> None:
+        """
+        Waits for the thread of a stopped writer to exit, returning at once if the writer has not been stopped.
+        """
+        if self._thread is not None and self._stopping:
+            self._thread.join(timeout)
+
+    def submit(self, fn: Callable[..., T], *args: Any, droppable: bool = False, **kwargs: Any) -> "Future[T]":
+        future: Future[T] = Future()
+        future.add_done_callback(self._log_failure)
+        with self._condition:
+            if self._accepting:
+                if droppable and len(self._queue) >= self.max_queue_size:
+                    self.dropped_events += 1
+                    future.cancel()
+                    return future
+                self._queue.append((future, fn, args, kwargs))
+                self.max_queue_depth = max(self.max_queue_depth, len(self._queue))
+                self._condition.notify()
+                return future
+        self._execute(future, fn, args, kwargs)
+        return future
+
+    async def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Submits a call to the writer and awaits its result without blocking the event loop.
+        Until the writer is started, and once its thread has exited, the call runs on a worker thread instead of inline.
+        """
+        if not self._accepting:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    async def drain(self, timeout: float | None = None) -> bool:
+        """
+        Waits until all previously submitted calls have run, returning False if the timeout expires first.
+        """
+        if not self._accepting:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.wrap_future(self.submit(lambda: None)), timeout)
+            return True
+        except TimeoutError:
+            return False
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopping:
+                    self._condition.wait()
+                if not self._queue:
+                    # Calls submitted from now on are run inline, after every call queued before them
+                    self._accepting = False
+                    return
+                item = self._queue.popleft()
+            self._execute(*item)
+
+    @staticmethod
+    def _execute(future: Future, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    @staticmethod
+    def _log_failure(future: Future) -> None:
+        if not future.cancelled() and (e := future.exception()) is not None:
+            logger.warning(f"wandb call failed: {e}")
@@ -1,3 +1,5 @@
-from inspect_wandb.weave.autopatcher.patcher import autopatch_inspect, reset_autopatch_inspect, get_inspect_patcher, CustomAutopatchSettings
+from inspect_wandb.weave.autopatcher.patcher import autopatch_inspect, reset_autopatch_inspect, get_inspect_patcher, get_model_patcher, get_tool_patcher, get_sandbox_patcher, CustomAutopatchSettings
+from inspect_wandb.weave.autopatcher.inspect import release_patched_task, set_trace_filters
+from inspect_wandb.weave.autopatcher.sample_calls import register_sample_call, unregister_sample_call, get_sample_call
 
-__all__ = ["autopatch_inspect", "reset_autopatch_inspect", "get_inspect_patcher", "CustomAutopatchSettings"]
\ No newline at end of file
+__all__ = ["autopatch_inspect", "reset_autopatch_inspect", "get_inspect_patcher", "get_model_patcher", "get_tool_patcher", "get_sandbox_patcher", "CustomAutopatchSettings", "register_sample_call", "unregister_sample_call", "get_sample_call", "release_patched_task", "set_trace_filters"]
\ No newline at end of file
@@ -12,9 +12,52 @@ from inspect_ai._eval.task.run import task_run_sample
 from inspect_ai._eval.task.log import TaskLogger
 from inspect_ai._eval.task.run import EvalSampleSource, SampleErrorHandler
 from inspect_ai.scorer import Scorer
+from inspect_wandb.config.settings.weave import TraceFilter
 from inspect_wandb.weave.autopatcher.plan import PatchedPlan
 from inspect_wandb.weave.autopatcher.scorer import PatchedScorer
 
+# Solvers and scorers to trace, set by the Weave hooks from their settings
+_trace_filters: dict[str, TraceFilter] = {}
+
+# Patched plan and scorers by task id, built for a task's first sample and released by the Weave hooks when the task ends
+_patched_tasks: dict[str, tuple[Plan, list[Scorer] | None, PatchedPlan, list[Scorer] | None]] = {}
+
+
+def set_trace_filters(solvers: TraceFilter, scorers: TraceFilter) -> None:
+    _trace_filters["solvers"] = solvers
+    _trace_filters["scorers"] = scorers
+    _patched_tasks.clear()
+
+
+def patch_plan_and_scorers(task_id: str, plan: Plan, scorers: list[Scorer] | None) -> tuple[PatchedPlan, list[Scorer] | None]:
+    """
+    Returns the patched plan and scorers for a task, reusing them across its samples while the plan and scorers are unchanged.
+    """
+    cached = _patched_tasks.get(task_id)
+    if cached is not None and cached[0] is plan and cached[1] is scorers:
+        return cached[2], cached[3]
+
+    patched_plan = PatchedPlan(
+        plan.steps, plan.finish, plan.cleanup, plan.name, internal=True, solver_filter=_trace_filters.get("solvers")
+    )
+    
+    # Create patched scorers using PatchedScorer class
+    if scorers:
+        patched_scorers: list[Scorer] | None = [
+            PatchedScorer(scorer, scorer_filter=_trace_filters.get("scorers"))
+            for scorer in scorers
+        ]
+    else:
+        patched_scorers = None
+
+    _patched_tasks[task_id] = (plan, scorers, patched_plan, patched_scorers)
+    return patched_plan, patched_scorers
+
+
+def release_patched_task(task_id: str) -> None:
+    _patched_tasks.pop(task_id, None)
+
+
 async def patched_task_run_sample(
     *,
     task_name: str,
@@ -43,16 +86,7 @@ async def patched_task_run_sample(
     run_id: str,
     task_id: str,
 ) -> dict[str, SampleScore] | None:
-        patched_plan = PatchedPlan(plan.steps, plan.finish, plan.cleanup, plan.name, internal=True)
-        
-        # Create patched scorers using PatchedScorer class
-        if scorers:
-            patched_scorers: list[Scorer] | None = [
-                PatchedScorer(scorer)
-                for scorer in scorers
-            ]
-        else:
-            patched_scorers = None
+        patched_plan, patched_scorers = patch_plan_and_scorers(task_id, plan, scorers)
 
         return await task_run_sample(
             task_name=task_name,
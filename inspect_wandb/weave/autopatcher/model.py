@@ -0,0 +1,48 @@
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable
+from inspect_ai.model import Model, ModelOutput
+from pydantic import BaseModel
+from tenacity import RetryCallState
+from inspect_wandb.weave.autopatcher.spans import span
+
+# Retries of the model call currently being traced, counted by the patched retry logger
+_retries: ContextVar[list[int] | None] = ContextVar("inspect_wandb_model_retries", default=None)
+
+GenerateFn = Callable[..., Awaitable[tuple[ModelOutput, BaseModel]]]
+
+
+def patched_model_generate(original_generate: GenerateFn) -> GenerateFn:
+    """
+    Wraps `Model._generate` to record one span per model call, whichever provider serves it, with the model name,
+    cache hit or miss, retry count, latency and token usage. Inputs and outputs are not recorded.
+    """
+    async def _generate(self: Model, *args: Any, **kwargs: Any) -> tuple[ModelOutput, BaseModel]:
+        retries = [0]
+        token = _retries.set(retries)
+        try:
+            async with span("inspect-model-generate", {"model": str(self), "role": self.role}, display_name=str(self)) as span_output:
+                output, event = await original_generate(self, *args, **kwargs)
+                cache = getattr(event, "cache", None)
+                span_output.update({
+                    "cache": "hit" if cache == "read" else "miss" if cache == "write" else None,
+                    "retries": retries[0],
+                    "model_time": output.time,
+                    "usage": output.usage.model_dump(exclude_none=True) if output.usage else None,
+                })
+        finally:
+            _retries.reset(token)
+        return output, event
+
+    return _generate
+
+
+def patched_log_model_retry(original_log_model_retry: Callable[[str, RetryCallState], None]) -> Callable[[str, RetryCallState], None]:
+    """
+    Wraps Inspect's model retry logger to count the retries of the model call being traced.
+    """
+    def log_model_retry(model_name: str, retry_state: RetryCallState) -> None:
+        if (retries := _retries.get()) is not None:
+            retries[0] += 1
+        original_log_model_retry(model_name, retry_state)
+
+    return log_model_retry
@@ -0,0 +1,29 @@
+from typing import Any, Callable
+import weave
+from weave.trace.op import Op
+from inspect_ai._util.registry import registry_info
+
+# Attribute holding an object's Weave ops by name prefix. Storing ops on the wrapped solver or scorer itself means
+# they are built once per object, and freed with it, so solvers created per sample do not accumulate in a cache
+OPS_ATTR = "__inspect_wandb_weave_ops__"
+
+
+def cached_op(fn: Callable[..., Any], prefix: str = "", name: str | None = None) -> Op:
+    """
+    Returns a Weave op for a solver or scorer, building it on first use. The op is named `name` if given,
+    otherwise `<prefix><registry name>`.
+    """
+    key = name if name is not None else prefix
+    ops: dict[str, Op] | None = getattr(fn, OPS_ATTR, None)
+    if ops is not None and (op := ops.get(key)) is not None:
+        return op
+    op = weave.op(name=name if name is not None else f"{prefix}{registry_info(fn).name}")(fn)
+    try:
+        if ops is None:
+            ops = {}
+            setattr(fn, OPS_ATTR, ops)
+        ops[key] = op
+    except (AttributeError, TypeError):
+        # Objects which don't accept attributes are wrapped on every call
+        pass
+    return op
@@ -3,6 +3,8 @@ from weave.integrations.patcher import SymbolPatcher, MultiPatcher
 from weave.trace.autopatch import AutopatchSettings, IntegrationSettings
 from pydantic import Field
 from inspect_wandb.weave.autopatcher.inspect import patched_task_run_sample
+from inspect_wandb.weave.autopatcher.model import patched_model_generate, patched_log_model_retry
+from inspect_wandb.weave.autopatcher.tools import patched_call_tool, patched_sandbox_exec, patched_sandbox_read_file, patched_sandbox_write_file
 
 inspect_patcher = MultiPatcher(
     [
@@ -14,9 +16,65 @@ inspect_patcher = MultiPatcher(
     ]
 )
 
+# Provider-agnostic spans for Inspect's model calls, applied on top of the inspect patcher when enabled
+model_patcher = MultiPatcher(
+    [
+        SymbolPatcher(
+            lambda: importlib.import_module("inspect_ai.model._model"),
+            "Model._generate",
+            patched_model_generate,
+        ),
+        SymbolPatcher(
+            lambda: importlib.import_module("inspect_ai.model._model"),
+            "log_model_retry",
+            patched_log_model_retry,
+        ),
+    ]
+)
+
+# Spans for tool calls, and for sandbox commands and file transfers, applied on top of the inspect patcher when enabled
+tool_patcher = MultiPatcher(
+    [
+        SymbolPatcher(
+            lambda: importlib.import_module("inspect_ai.model._call_tools"),
+            "call_tool",
+            patched_call_tool,
+        ),
+    ]
+)
+
+sandbox_patcher = MultiPatcher(
+    [
+        SymbolPatcher(
+            lambda: importlib.import_module("inspect_ai.util._sandbox.events"),
+            "SandboxEnvironmentProxy.exec",
+            patched_sandbox_exec,
+        ),
+        SymbolPatcher(
+            lambda: importlib.import_module("inspect_ai.util._sandbox.events"),
+            "SandboxEnvironmentProxy.read_file",
+            patched_sandbox_read_file,
+        ),
+        SymbolPatcher(
+            lambda: importlib.import_module("inspect_ai.util._sandbox.events"),
+            "SandboxEnvironmentProxy.write_file",
+            patched_sandbox_write_file,
+        ),
+    ]
+)
+
 def get_inspect_patcher(settings: IntegrationSettings | None = None) -> MultiPatcher:
     return inspect_patcher
 
+def get_model_patcher() -> MultiPatcher:
+    return model_patcher
+
+def get_tool_patcher() -> MultiPatcher:
+    return tool_patcher
+
+def get_sandbox_patcher() -> MultiPatcher:
+    return sandbox_patcher
+
 class CustomAutopatchSettings(AutopatchSettings):
     inspect: IntegrationSettings = Field(default_factory=IntegrationSettings)
 
@@ -1,41 +1,62 @@
-import weave
-from inspect_ai.solver import Generate, Plan, TaskState
+from typing import Any, Awaitable, Callable
+from inspect_ai.solver import Generate, Plan, Solver, TaskState
 from inspect_ai.solver._transcript import solver_transcript
 from inspect_ai.solver._plan import logger
 from inspect_ai._util.registry import registry_info
+from inspect_wandb.config.settings.weave import TraceFilter
+from inspect_wandb.weave.autopatcher.ops import cached_op
+from inspect_wandb.weave.autopatcher.sample_calls import sample_tracing
 
 class PatchedPlan(Plan):
+    def __init__(
+        self,
+        steps: Solver | list[Solver],
+        finish: Solver | None = None,
+        cleanup: Callable[[TaskState], Awaitable[None]] | None = None,
+        name: str | None = None,
+        internal: bool = False,
+        solver_filter: TraceFilter | None = None,
+    ) -> None:
+        super().__init__(steps, finish, cleanup, name, internal)
+        solver_filter = solver_filter or TraceFilter()
+        # Solvers excluded from tracing are run directly, without an op wrapper
+        self._steps = [self._traced(solver, solver_filter) for solver in self.steps]
+        self._finish = self._traced(self.finish, solver_filter) if self.finish else None
+
+    @staticmethod
+    def _traced(solver: Solver, solver_filter: TraceFilter) -> Callable[..., Any]:
+        return cached_op(solver) if solver_filter.matches(registry_info(solver).name) else solver
+
     async def __call__(self, state: TaskState, generate: Generate) -> TaskState:
-        try:
-            # execute steps
-            for _, solver in enumerate(self.steps):
-
-                # run solver
-                async with solver_transcript(solver, state) as st:
-                    solver_name = registry_info(solver).name
-                    state = await weave.op(name=solver_name)(solver)(state, generate)
-                    st.complete(state)
-
-                # check for completed
-                if state.completed:
-                    # exit loop
-                    break
-
-            # execute finish
-            if self.finish:
-                async with solver_transcript(self.finish, state) as st:
-                    finish_name = registry_info(self.finish).name
-                    state = await weave.op(name=finish_name)(self.finish)(state, generate)
-                    st.complete(state)
-
-        finally:
-            # always do cleanup if we have one
-            if self.cleanup:
-                try:
-                    await weave.op(name="inspect_sample_cleanup")(self.cleanup)(state)
-                except Exception as ex:
-                    logger.warning(
-                        f"Exception occurred during plan cleanup: {ex}", exc_info=ex
-                    )
+        with sample_tracing(state.uuid):
+            try:
+                # execute steps
+                for solver, traced_solver in zip(self.steps, self._steps):
+
+                    # run solver
+                    async with solver_transcript(solver, state) as st:
+                        state = await traced_solver(state, generate)
+                        st.complete(state)
+
+                    # check for completed
+                    if state.completed:
+                        # exit loop
+                        break
+
+                # execute finish
+                if self.finish and self._finish:
+                    async with solver_transcript(self.finish, state) as st:
+                        state = await self._finish(state, generate)
+                        st.complete(state)
+
+            finally:
+                # always do cleanup if we have one
+                if self.cleanup:
+                    try:
+                        await cached_op(self.cleanup, name="inspect_sample_cleanup")(state)
+                    except Exception as ex:
+                        logger.warning(
+                            f"Exception occurred during plan cleanup: {ex}", exc_info=ex
+                        )
 
         return state
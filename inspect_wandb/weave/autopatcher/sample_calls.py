@@ -0,0 +1,25 @@
+from contextlib import AbstractContextManager, nullcontext
+from weave.trace.context.call_context import set_tracing_enabled
+from weave.trace.weave_client import Call
+
+# Sample calls by sample uuid, so patched scorers can find their sample's call without scanning the evaluation's children
+_sample_calls: dict[str, Call] = {}
+
+
+def register_sample_call(sample_uuid: str, call: Call) -> None:
+    _sample_calls[sample_uuid] = call
+
+
+def unregister_sample_call(sample_uuid: str) -> None:
+    _sample_calls.pop(sample_uuid, None)
+
+
+def get_sample_call(sample_uuid: str) -> Call | None:
+    return _sample_calls.get(sample_uuid)
+
+
+def sample_tracing(sample_uuid: str) -> AbstractContextManager[None]:
+    """
+    Context for running part of a sample, which disables Weave tracing if the sample has no call (i.e. it was not sampled for tracing).
+    """
+    return nullcontext() if sample_uuid in _sample_calls else set_tracing_enabled(False)
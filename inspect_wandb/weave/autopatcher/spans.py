@@ -0,0 +1,41 @@
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+from weave.trace.context import weave_client_context
+from weave.trace.context.call_context import get_tracing_enabled
+
+
+@asynccontextmanager
+async def span(op: str, inputs: dict[str, Any], display_name: str | None = None) -> AsyncIterator[dict[str, Any]]:
+    """
+    Records a lightweight Weave call under the current call, for timing part of a sample without capturing its full
+    inputs and outputs. Yields a dict which the caller fills in with the span's output, to which the duration is added.
+    Does nothing if there is no Weave client or tracing is disabled.
+    """
+    output: dict[str, Any] = {}
+    client = weave_client_context.get_weave_client()
+    if client is None or not get_tracing_enabled():
+        yield output
+        return
+
+    call = client.create_call(op=op, inputs=inputs, display_name=display_name)
+    start = time.monotonic()
+    try:
+        yield output
+    except BaseException as e:
+        client.finish_call(call, output=output | {"duration": time.monotonic() - start}, exception=e)
+        raise
+    client.finish_call(call, output=output | {"duration": time.monotonic() - start})
+
+
+def payload_size(value: Any) -> int:
+    """
+    Size of a payload in characters (or bytes), without serializing structured values.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, list):
+        return sum(payload_size(item) for item in value)
+    return len(str(value))
@@ -0,0 +1,62 @@
+import json
+from typing import Any, Awaitable, Callable
+from inspect_ai.model import ChatMessage, ModelOutput
+from inspect_ai.tool import ToolCall, ToolResult
+from inspect_ai.util import ExecResult
+from inspect_ai.util._sandbox.service import SERVICES_DIR
+from inspect_wandb.weave.autopatcher.spans import span, payload_size
+
+CallToolFn = Callable[..., Awaitable[tuple[ToolResult, list[ChatMessage], ModelOutput | None, str | None]]]
+
+
+def patched_call_tool(original_call_tool: CallToolFn) -> CallToolFn:
+    """
+    Wraps Inspect's `call_tool` to record a span per tool call, with its duration and argument and result sizes.
+    """
+    async def call_tool(tools: list[Any], message: str, call: ToolCall, *args: Any, **kwargs: Any) -> tuple[ToolResult, list[ChatMessage], ModelOutput | None, str | None]:
+        inputs = {"tool": call.function, "arguments_size": len(json.dumps(call.arguments, default=str))}
+        async with span("inspect-tool-call", inputs, display_name=f"tool_{call.function}") as span_output:
+            result = await original_call_tool(tools, message, call, *args, **kwargs)
+            span_output["result_size"] = payload_size(result[0])
+        return result
+
+    return call_tool
+
+
+def patched_sandbox_exec(original_exec: Callable[..., Awaitable[ExecResult[str]]]) -> Callable[..., Awaitable[ExecResult[str]]]:
+    """
+    Wraps `SandboxEnvironmentProxy.exec` to record a span per command, with its duration, exit code and payload sizes.
+    Commands run by Inspect's sandbox services are not recorded.
+    """
+    async def exec(self: Any, cmd: list[str], input: str | bytes | None = None, *args: Any, **kwargs: Any) -> ExecResult[str]:
+        if any(SERVICES_DIR in c for c in cmd):
+            return await original_exec(self, cmd, input, *args, **kwargs)
+        inputs = {"command": cmd[0] if cmd else None, "input_size": payload_size(input)}
+        async with span("inspect-sandbox-exec", inputs) as span_output:
+            result = await original_exec(self, cmd, input, *args, **kwargs)
+            span_output.update({
+                "returncode": result.returncode,
+                "stdout_size": payload_size(result.stdout),
+                "stderr_size": payload_size(result.stderr),
+            })
+        return result
+
+    return exec
+
+
+def patched_sandbox_read_file(original_read_file: Callable[..., Awaitable[str | bytes]]) -> Callable[..., Awaitable[str | bytes]]:
+    async def read_file(self: Any, file: str, *args: Any, **kwargs: Any) -> str | bytes:
+        async with span("inspect-sandbox-read-file", {"file": file}) as span_output:
+            contents = await original_read_file(self, file, *args, **kwargs)
+            span_output["size"] = payload_size(contents)
+        return contents
+
+    return read_file
+
+
+def patched_sandbox_write_file(original_write_file: Callable[..., Awaitable[None]]) -> Callable[..., Awaitable[None]]:
+    async def write_file(self: Any, file: str, contents: str | bytes) -> None:
+        async with span("inspect-sandbox-write-file", {"file": file, "size": payload_size(contents)}):
+            await original_write_file(self, file, contents)
+
+    return write_file
@@ -1,13 +1,19 @@
 from __future__ import annotations
-from typing import Any, TypeVar, Union
+from types import MethodType
+from typing import Any, Callable, Mapping, TypeVar, Union, cast
+import json
 import logging
 
 import weave
+from pydantic import Field, PrivateAttr
 from weave.trace.context import call_context
+from weave.flow.scorer import Scorer
+from weave.trace.op import op
 from weave.trace.weave_client import Call
-from weave.evaluation.eval_imperative import  EvaluationLogger, current_predict_call, IMPERATIVE_EVAL_MARKER
-from weave.evaluation.eval_imperative import ScoreLogger, _set_current_output, _set_current_summary
+from weave.evaluation.eval_imperative import  EvaluationLogger, current_predict_call, current_score, IMPERATIVE_EVAL_MARKER, IMPERATIVE_SCORE_MARKER
+from weave.evaluation.eval_imperative import ScoreLogger, _cast_to_cls, _set_current_output, _set_current_score, _set_current_summary, global_scorer_cache
 from weave.trace.api import attributes
+from weave.utils.dict_utils import sum_dict_leaves
 
 
 
@@ -19,13 +25,75 @@ ScoreType = Union[float, bool, dict]
 
 logger = logging.getLogger(__name__)
 
+BATCH_SCORER_NAME = "inspect_scores"
+
+
+class InspectScoreLogger(ScoreLogger):
+    """
+    A ScoreLogger which can log all of a prediction's scores at once.
+    """
+
+    _on_finish: Callable[[InspectScoreLogger], None] | None = PrivateAttr(default=None)
+
+    async def alog_scores(self, scores: Mapping[str, ScoreType], score_attributes: dict[str, Any] | None = None) -> None:
+        """
+        Log a batch of scores as a single score call on the prediction, with one feedback entry holding every score.
+
+        Each score is still captured individually, so it appears under its own name in the prediction's output when the
+        prediction is finished. `score_attributes` are added to the score call, e.g. the metadata of each Inspect scorer.
+        """
+        if self._has_finished:
+            raise ValueError("Cannot log scores after finish has been called")
+        if not scores:
+            return
+
+        scorer = global_scorer_cache.get_scorer(json.dumps(BATCH_SCORER_NAME), _batch_scorer)
+
+        # attach the score feedback to the predict call
+        with call_context.set_call_stack([self.evaluate_call, self.predict_and_score_call]):
+            with _set_current_score(dict(scores)):
+                with attributes(IMPERATIVE_SCORE_MARKER | (score_attributes or {})):
+                    await self.predict_call.apply_scorer(scorer)
+
+        self._captured_scores.update(scores)
+
+    def finish(self) -> None:
+        super().finish()
+        if self._on_finish is not None:
+            self._on_finish(self)
+
+
+def _batch_scorer() -> Scorer:
+    scorer = _cast_to_cls(Scorer)(BATCH_SCORER_NAME)
+
+    @op(name=BATCH_SCORER_NAME, enable_code_capture=False)
+    def score_method(self: Scorer, *, output: Any, inputs: Any) -> ScoreType:
+        return cast(ScoreType, current_score.get())
+
+    scorer.__dict__["score"] = MethodType(score_method, scorer)
+    return scorer
+
 class CustomEvaluationLogger(EvaluationLogger):
     """
     This class is a modified version of the EvaluationLogger class which allows for the parent call to be specified.
     This allows us to specify an Inspect specific call as the parent when autopatching Inspect.
+
+    With `stream_predictions`, finished predictions are not kept until the evaluation is finalized. Instead, the
+    finished calls under the evaluation are released and their summaries (token usage and status counts) are added to
+    a running total, so the logger's memory does not grow with the number of samples. Predictions are released once
+    they finish, and other calls under the evaluation (e.g. sample calls) once passed to `release_call` after finishing.
     """
 
-    def log_prediction(self, inputs: dict, output: Any, parent_call: Call | None = None) -> ScoreLogger:
+    stream_predictions: bool = Field(default=False, description="Whether to release each prediction once it has finished")
+
+    # Predictions which have not finished yet, ids of finished calls not yet released, and the summed summaries of the
+    # released calls, when streaming
+    _open_predictions: dict[int, InspectScoreLogger] = PrivateAttr(default_factory=dict)
+    _finished_call_ids: set[str] = PrivateAttr(default_factory=set)
+    _released_summary: dict[str, Any] = PrivateAttr(default_factory=dict)
+    _released_calls: int = PrivateAttr(default=0)
+
+    def log_prediction(self, inputs: dict, output: Any, parent_call: Call | None = None) -> InspectScoreLogger:
         """Log a prediction to the Evaluation, and return a reference.
 
         The reference can be used to log scores which are attached to the specific
@@ -52,13 +120,77 @@ class CustomEvaluationLogger(EvaluationLogger):
             if predict_call is None:
                 raise ValueError("predict_call should not be None")
 
-            pred = ScoreLogger(
+            pred = InspectScoreLogger(
                 predict_and_score_call=predict_and_score_call,
                 evaluate_call=parent_call if parent_call is not None else self._evaluate_call,
                 predict_call=predict_call,
             )
-            self._accumulated_predictions.append(pred)
+            if self.stream_predictions:
+                pred._on_finish = self._release_prediction
+                self._open_predictions[id(pred)] = pred
+            else:
+                self._accumulated_predictions.append(pred)
             return pred
+
+    def release_call(self, call: Call) -> None:
+        """
+        Releases a call under the evaluation once `finish_call` has returned for it, when streaming predictions.
+        A call's `ended_at` is set before its summary, so calls finished on other threads are only released once
+        confirmed finished here. Calls elsewhere in the trace (e.g. predictions under a sample call) are ignored, since
+        they are released along with their ancestor under the evaluation.
+        """
+        if not self.stream_predictions or call.id is None or self._evaluate_call is None or call.parent_id != self._evaluate_call.id:
+            return
+        self._finished_call_ids.add(call.id)
+        self._release_finished_calls()
+
+    def _release_prediction(self, pred: InspectScoreLogger) -> None:
+        self._open_predictions.pop(id(pred), None)
+        self.release_call(pred.predict_and_score_call)
+
+    def _release_finished_calls(self) -> None:
+        """
+        Removes the calls under the evaluation call which are confirmed finished, adding their summaries to the running
+        total which is rolled up into the evaluation's summary when it finishes.
+        """
+        assert self._evaluate_call is not None
+        children = self._evaluate_call._children
+        finished = [child for child in children if child.id in self._finished_call_ids]
+        if not finished:
+            return
+        self._finished_call_ids.difference_update(child.id for child in finished if child.id is not None)
+        self._released_summary = sum_dict_leaves([self._released_summary, *[child.summary or {} for child in finished]])
+        self._released_calls += len(finished)
+        # Calls may be created under the evaluation from other threads, so remove finished calls in place
+        for child in finished:
+            children.remove(child)
+
+    def _cleanup_predictions(self) -> None:
+        if self._is_finalized:
+            return
+        super()._cleanup_predictions()
+        for pred in list(self._open_predictions.values()):
+            try:
+                pred.finish()
+            except Exception:
+                # Best effort, as in EvaluationLogger
+                pass
+
+    def _finalize_evaluation(self, output: Any = None, exception: BaseException | None = None) -> None:
+        if self.stream_predictions and not self._is_finalized and self._evaluate_call is not None:
+            self._cleanup_predictions()
+            self._release_finished_calls()
+            # Stands in for the released calls when the evaluation's summary is computed from its children
+            self._evaluate_call._children.append(Call(
+                _op_name="",
+                trace_id=self._evaluate_call.trace_id,
+                project_id=self._evaluate_call.project_id,
+                parent_id=self._evaluate_call.id,
+                inputs={},
+                summary=self._released_summary,
+            ))
+            logger.debug(f"Released {self._released_calls} finished calls from evaluation {self.name}")
+        super()._finalize_evaluation(output=output, exception=exception)
         
     def log_summary(
         self,
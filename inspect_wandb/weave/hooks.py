@@ -1,18 +1,20 @@
-from typing import Any
+import asyncio
+import sys
+from typing import Any, Callable
 from inspect_ai.hooks import Hooks, RunEnd, SampleEnd, SampleStart, TaskStart, TaskEnd, EvalSetStart, EvalSetEnd
 import weave
 from weave.trace.settings import UserSettings
-from inspect_wandb.weave.utils import format_score_types, format_sample_display_name
+from inspect_wandb.weave.utils import format_score_types, format_sample_display_name, should_trace_sample, truncate_payload, payload_digest, model_integrations, IMPORTED_INTEGRATIONS
 from inspect_wandb.shared.utils import format_wandb_id_string as format_model_name
 from inspect_wandb.config.settings import WeaveSettings
 from logging import getLogger
-from inspect_wandb.weave.autopatcher import get_inspect_patcher, CustomAutopatchSettings
-from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger
+from inspect_wandb.weave.autopatcher import get_inspect_patcher, get_model_patcher, get_tool_patcher, get_sandbox_patcher, CustomAutopatchSettings, register_sample_call, unregister_sample_call, release_patched_task, set_trace_filters
+from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger, ScoreType
+from inspect_wandb.weave.sample_queue import SampleLogQueue
 from inspect_wandb.exceptions import WeaveEvaluationException
-from weave.trace.weave_client import Call
+from weave.trace.weave_client import Call, generate_id
 from weave.trace.context import call_context
 from typing_extensions import override
-import asyncio
 from weave.trace.autopatch import IntegrationSettings, OpSettings
 from weave import integrations
 
@@ -26,11 +28,17 @@ class WeaveEvaluationHooks(Hooks):
     weave_eval_loggers: dict[str, CustomEvaluationLogger] = {}
     settings: WeaveSettings | None = None
     sample_calls: dict[str, Call] = {}
+    # Creation of each sample call, which runs off the event loop while the sample runs
+    _sample_call_starts: dict[str, asyncio.Task[Call]] = {}
     task_mapping: dict[str, str] = {}
     _weave_initialized: bool = False
     _hooks_enabled: bool | None = None
     _eval_set: bool = False
     _eval_set_log_dir: str | None = None
+    _sample_queue: SampleLogQueue | None = None
+    _patched_integrations: frozenset[str] = frozenset()
+    # Digest and first epoch of each sample's input, by eval id and sample id
+    _sample_inputs: dict[str, dict[int | str, tuple[str, int]]] = {}
 
     @override
     def enabled(self) -> bool:
@@ -47,7 +55,7 @@ class WeaveEvaluationHooks(Hooks):
     async def on_eval_set_end(self, data: EvalSetEnd) -> None:
         self.weave_client.finish(use_progress_bar=False)
         if self.settings is not None and self.settings.autopatch:
-            get_inspect_patcher().undo_patch()
+            self._undo_autopatch()
 
 
     @override
@@ -55,6 +63,14 @@ class WeaveEvaluationHooks(Hooks):
         # Only proceed with cleanup if Weave was actually initialized
         if not self._weave_initialized:
             return
+
+        if self._sample_queue is not None:
+            drain_timeout = self.settings.drain_timeout if self.settings is not None else None
+            if not await self._sample_queue.drain(timeout=drain_timeout):
+                logger.warning(f"Timed out after {drain_timeout}s waiting for samples to be logged to Weave, {self._sample_queue.pending()} samples were not logged")
+            await self._sample_queue.stop()
+            logger.info(f"Weave sample logging queue: {self._sample_queue.gauges()}")
+            self._sample_queue = None
             
         # Finalize all active loggers
         for weave_eval_logger in self.weave_eval_loggers.values():
@@ -71,14 +87,22 @@ class WeaveEvaluationHooks(Hooks):
                 else:
                     weave_eval_logger.finish()
         
+        # Samples interrupted before they ended are never unregistered by on_sample_end
+        for sample_id in self.sample_calls:
+            unregister_sample_call(sample_id)
+        self.sample_calls.clear()
+        await asyncio.gather(*self._sample_call_starts.values(), return_exceptions=True)
+        self._sample_call_starts.clear()
+
         # Clear the loggers dict and task mapping
         self.weave_eval_loggers.clear()
         self.task_mapping.clear()
+        self._sample_inputs.clear()
 
         if not self._eval_set:
             self.weave_client.finish(use_progress_bar=False)
             if self.settings is not None and self.settings.autopatch:
-                get_inspect_patcher().undo_patch()
+                self._undo_autopatch()
 
 
     @override
@@ -108,16 +132,20 @@ class WeaveEvaluationHooks(Hooks):
                     implicitly_patch_integrations=False
                 ),
             )
-            self._autopatch(model=data.spec.model)
+            self._autopatch()
             self._weave_initialized = True
             logger.info(f"Weave initialized for task {data.spec.task}")
+
+        # Patch integrations for this task's model providers, including any model roles
+        self._patch_integrations([data.spec.model, *[role.model for role in (data.spec.model_roles or {}).values()]])
         
         model_name = format_model_name(data.spec.model) 
         weave_eval_logger = CustomEvaluationLogger(
             name=data.spec.task,
             dataset=data.spec.dataset.name or "test_dataset", # TODO: set a default dataset name
             model=model_name,
-            eval_attributes=self._get_eval_metadata(data, self._eval_set_log_dir)
+            eval_attributes=self._get_eval_metadata(data, self._eval_set_log_dir),
+            stream_predictions=self.settings.stream_predictions
         )
         
         self.weave_eval_loggers[data.eval_id] = weave_eval_logger
@@ -137,11 +165,23 @@ class WeaveEvaluationHooks(Hooks):
 
     @override
     async def on_task_end(self, data: TaskEnd) -> None:
+        # The task's samples have all run, so its patched plan and scorers are no longer needed
+        release_patched_task(data.eval_id)
+
         if not self._hooks_enabled:
             return
             
         weave_eval_logger = self.weave_eval_loggers.get(data.eval_id)
         assert weave_eval_logger is not None
+
+        # Samples from this task may still be queued for logging, so wait for them before the summary finalizes the evaluation
+        if self._sample_queue is not None and self._sample_queue.pending(data.eval_id):
+            assert self.settings is not None
+            if not await self._sample_queue.drain(data.eval_id, timeout=self.settings.drain_timeout):
+                logger.warning(
+                    f"Timed out after {self.settings.drain_timeout}s waiting for samples of task {data.log.eval.task} to be logged to Weave, "
+                    f"{self._sample_queue.pending(data.eval_id)} samples will be missing from the evaluation"
+                )
         
         summary: dict = {}
         if data.log and data.log.results:
@@ -153,40 +193,102 @@ class WeaveEvaluationHooks(Hooks):
                         summary[scorer_name][metric_name] = metric.value
             summary["sample_count"] = data.log.results.total_samples
         weave_eval_logger.log_summary(summary)
+        self._sample_inputs.pop(data.eval_id, None)
 
     @override
     async def on_sample_start(self, data: SampleStart) -> None:
         if not self._hooks_enabled:
             return
         
-        if self.settings is not None and self.settings.autopatch:
+        # Untraced samples get no sample call, so the patched plan and scorers run them with tracing disabled
+        if self.settings is not None and self.settings.autopatch and should_trace_sample(data.summary.id, self.settings.trace_sample_rate):
             task_name = self.task_mapping.get(data.eval_id, "unknown_task")
-            self.sample_calls[data.sample_id] = self.weave_client.create_call(
-                op="inspect-sample",
-                inputs={"input": data.summary.input},
+            parent = call_context.get_current_call()
+            # The sample's spans are parented to a call with a pre-generated id, so the sample can start while
+            # the call itself is created off the event loop
+            sample_call = Call(
+                _op_name="inspect-sample",
+                project_id=self.weave_client._project_id(),
+                trace_id=parent.trace_id if parent is not None else generate_id(),
+                parent_id=parent.id if parent is not None else None,
+                id=generate_id(),
+                inputs={"input": self._input_payload(data.eval_id, data.summary.id, data.summary.epoch, data.summary.input)},
                 attributes={
                     "sample_id": data.summary.id, 
                     "sample_uuid": data.sample_id, 
                     "epoch": data.summary.epoch,
                     "task_name": task_name,
                     "task_id": data.eval_id,
-                    "metadata": data.summary.metadata,
+                    "metadata": self._payload(data.summary.metadata),
                 },
-                display_name=format_sample_display_name(self.settings.sample_name_template, task_name, data.summary.id, data.summary.epoch)
+                thread_id=call_context.get_thread_id(),
             )
+            sample_call.display_name = format_sample_display_name(self.settings.sample_name_template, task_name, data.summary.id, data.summary.epoch)
+            self._sample_call_starts[data.sample_id] = asyncio.create_task(self._start_sample_call(sample_call, parent))
+            self.sample_calls[data.sample_id] = sample_call
+            call_context.push_call(sample_call)
+            register_sample_call(data.sample_id, sample_call)
 
     @override
     async def on_sample_end(self, data: SampleEnd) -> None:
         if not self._hooks_enabled:
             return
 
-        task = asyncio.create_task(self._log_sample_to_weave_async(data))
-        task.add_done_callback(self._handle_weave_task_result)
+        # The sample has been scored, so patched scorers no longer need its call
+        unregister_sample_call(data.sample_id)
 
-    def _handle_weave_task_result(self, task: asyncio.Task) -> None:
-        """Handle results/exceptions from Weave logging tasks"""
-        if (e:= task.exception()):
-            raise e
+        # Created on first use, since the queue is bound to the event loop of the current run
+        if self._sample_queue is None:
+            assert self.settings is not None
+            self._sample_queue = SampleLogQueue(
+                self._log_sample_to_weave_async,
+                workers=self.settings.sample_log_workers,
+                max_size=self.settings.sample_log_queue_size,
+                policy=self.settings.sample_log_queue_policy,
+                on_drop=self._finish_dropped_sample,
+            )
+        await self._sample_queue.put(data)
+
+    async def _start_sample_call(self, sample_call: Call, parent: Call | None) -> Call:
+        """
+        Creates the sample's Weave call in a worker thread, with the id of the call its spans are parented to.
+        """
+        assert sample_call.attributes is not None
+        if parent is None:
+            # A stand-in root with no id, so the call starts a new trace with the trace_id its spans already use
+            parent = Call(_op_name="", project_id=sample_call.project_id, trace_id=sample_call.trace_id, parent_id=None, inputs={})
+        call = await asyncio.to_thread(
+            self.weave_client.create_call,
+            op="inspect-sample",
+            inputs=sample_call.inputs,
+            parent=parent,
+            attributes=sample_call.attributes,
+            display_name=sample_call.display_name,
+            use_stack=False,
+            _call_id_override=sample_call.id,
+        )
+        # Share the spans started so far (and later) under the sample, so they are rolled up into its summary when it finishes
+        call._children = sample_call._children
+        return call
+
+    def _finish_dropped_sample(self, data: SampleEnd) -> None:
+        """
+        Finishes the sample's Weave call for a sample dropped from the logging queue, so it is not left running.
+        """
+        logger.warning(f"Weave sample logging queue is full, dropped sample {data.sample.id} (epoch {data.sample.epoch})")
+        if self.sample_calls.pop(data.sample_id, None) is None:
+            return
+
+        def finish_call(start: asyncio.Task[Call]) -> None:
+            if not start.cancelled() and start.exception() is None:
+                self.weave_client.finish_call(
+                    start.result(),
+                    exception=WeaveEvaluationException(message="Sample not logged to Weave", error="Weave sample logging queue was full")
+                )
+                if (weave_eval_logger := self.weave_eval_loggers.get(data.eval_id)) is not None:
+                    weave_eval_logger.release_call(start.result())
+
+        self._sample_call_starts.pop(data.sample_id).add_done_callback(finish_call)
 
     async def _log_sample_to_weave_async(self, data: SampleEnd) -> None:
         """
@@ -202,36 +304,32 @@ class WeaveEvaluationHooks(Hooks):
         input_value = data.sample.input
         with weave.attributes({"sample_id": sample_id, "epoch": epoch}):
             sample_score_logger = weave_eval_logger.log_prediction(
-                inputs={"input": input_value},
-                output=data.sample.output.completion,
-                parent_call=self.sample_calls[data.sample_id] if self.settings is not None and self.settings.autopatch else None
+                inputs={"input": self._input_payload(data.eval_id, sample_id, epoch, input_value)},
+                output=self._payload(data.sample.output.completion),
+                parent_call=self.sample_calls.get(data.sample_id) if self.settings is not None and self.settings.autopatch else None
             )
 
+        scores: dict[str, ScoreType] = {}
+        score_attributes: dict[str, Any] = {}
         if data.sample.scores is not None:
             for k,v in data.sample.scores.items():
+                scores[k] = format_score_types(v.value)
                 score_metadata = (v.metadata or {}) | ({"explanation": v.explanation} if v.explanation is not None else {})
-                with weave.attributes(score_metadata):
-                    await sample_score_logger.alog_score(
-                        scorer=k,
-                        score=format_score_types(v.value)
-                    )
+                if score_metadata:
+                    score_attributes[k] = score_metadata
 
         # Total time
         if (
             hasattr(data.sample, "total_time")
             and data.sample.total_time is not None
         ):
-            await sample_score_logger.alog_score(
-                scorer="total_time", score=data.sample.total_time
-            )
+            scores["total_time"] = data.sample.total_time
 
         # Total tokens
         if hasattr(data.sample, "model_usage") and data.sample.model_usage:
             for model_name, usage in data.sample.model_usage.items():
                 if usage.total_tokens is not None:
-                    await sample_score_logger.alog_score(
-                        scorer="total_tokens", score=usage.total_tokens
-                    )
+                    scores["total_tokens"] = usage.total_tokens
                     break
 
         # Number of tools
@@ -241,33 +339,57 @@ class WeaveEvaluationHooks(Hooks):
             and "Annotator Metadata" in data.sample.metadata
             and "Number of tools" in data.sample.metadata["Annotator Metadata"]
         ):
-            await sample_score_logger.alog_score(
-                scorer="num_tool_calls",
-                score=int(
-                    data.sample.metadata["Annotator Metadata"]["Number of tools"]
-                ),
+            scores["num_tool_calls"] = int(
+                data.sample.metadata["Annotator Metadata"]["Number of tools"]
             )
 
+        # All scores are logged in one batch, and the prediction is finished once
         if not getattr(sample_score_logger, '_has_finished', False):
+            await sample_score_logger.alog_scores(scores, score_attributes=score_attributes)
             sample_score_logger.finish()
 
         if self.settings is not None and self.settings.autopatch:
-            if data.sample_id in self.sample_calls:
+            if self.sample_calls.pop(data.sample_id, None) is not None:
+                sample_call = await self._sample_call_starts.pop(data.sample_id)
                 model_tokens = {
                     format_model_name(model_name): usage.total_tokens
                     for model_name, usage in data.sample.model_usage.items()
                 }
 
-                self.weave_client.finish_call(
-                    self.sample_calls[data.sample_id],
+                await asyncio.to_thread(
+                    self.weave_client.finish_call,
+                    sample_call,
                     output={
-                        "output": data.sample.output.completion,
-                        "scores": data.sample.scores,
+                        "output": self._payload(data.sample.output.completion),
+                        "scores": self._payload(data.sample.scores),
                         "total_time": data.sample.total_time,
                         "token_usage": model_tokens
                     }
                 )
-                self.sample_calls.pop(data.sample_id)
+                weave_eval_logger.release_call(sample_call)
+
+    def _payload(self, value: Any) -> Any:
+        """
+        Applies the size limit and image stripping settings to a value sent to Weave.
+        """
+        if self.settings is None:
+            return value
+        return truncate_payload(value, self.settings.max_payload_bytes, self.settings.strip_images)
+
+    def _input_payload(self, eval_id: str, sample_id: int | str, epoch: int, input: Any) -> Any:
+        """
+        Returns a sample's input to send to Weave. With `deduplicate_inputs`, only the first epoch of a sample to start
+        sends its full input, and other epochs send a reference to it.
+        """
+        if self.settings is None or not self.settings.deduplicate_inputs:
+            return self._payload(input)
+        sample_inputs = self._sample_inputs.setdefault(eval_id, {})
+        if (first := sample_inputs.get(sample_id)) is None:
+            first = sample_inputs[sample_id] = (payload_digest(input), epoch)
+        digest, first_epoch = first
+        if epoch == first_epoch:
+            return self._payload(input)
+        return {"input_ref": f"sha256:{digest}", "epoch": first_epoch}
 
     def _extract_settings_overrides_from_eval_metadata(self, data: TaskStart) -> dict[str, Any] | None:
         """
@@ -310,10 +432,39 @@ class WeaveEvaluationHooks(Hooks):
         
         return eval_metadata
 
-    def _autopatch(self, model: str) -> None:
+    def _autopatch(self) -> None:
+        assert self.settings is not None
+        if self.settings.autopatch:
+            set_trace_filters(solvers=self.settings.trace_solvers, scorers=self.settings.trace_scorers)
+            get_inspect_patcher(CustomAutopatchSettings().inspect).attempt_patch()
+            if self.settings.trace_model_calls:
+                get_model_patcher().attempt_patch()
+            if self.settings.trace_tool_calls:
+                get_tool_patcher().attempt_patch()
+            if self.settings.trace_sandbox_calls:
+                get_sandbox_patcher().attempt_patch()
+
+    def _undo_autopatch(self) -> None:
+        for patcher in (get_inspect_patcher(), get_model_patcher(), get_tool_patcher(), get_sandbox_patcher()):
+            patcher.undo_patch()
+
+    def _patch_integrations(self, models: list[str]) -> None:
+        """
+        Patches the Weave integrations used by the given models' providers, plus those for other supported SDKs which
+        have been imported. Integrations are only patched once, so only new providers are patched as later tasks start.
+        """
         assert self.settings is not None
-        if model.startswith("openrouter"):
-            openai_settings=IntegrationSettings(
+        required: list[tuple[str | None, str]] = [(model, integration) for model in models for integration in model_integrations(model)]
+        required += [(None, integration) for integration, module in IMPORTED_INTEGRATIONS.items() if module in sys.modules]
+        for model, integration in required:
+            if integration in self._patched_integrations or not self.settings.trace_providers.matches(integration):
+                continue
+            self._patch_integration(integration, model)
+            self._patched_integrations = self._patched_integrations | {integration}
+
+    def _patch_integration(self, integration: str, model: str | None) -> None:
+        if integration == "openai" and model is not None and model.startswith("openrouter"):
+            openai_settings = IntegrationSettings(
                 op_settings=OpSettings(
                     name="openrouter.api.call"
                 )
@@ -323,14 +474,15 @@ class WeaveEvaluationHooks(Hooks):
         autopatch_settings = CustomAutopatchSettings(
             openai=openai_settings
         )
-        integrations.patch_openai(autopatch_settings.openai)
-        integrations.patch_anthropic(autopatch_settings.anthropic)
-        integrations.patch_google_genai(autopatch_settings.google_genai)
-        integrations.patch_groq(autopatch_settings.groq)
-        integrations.patch_huggingface(autopatch_settings.huggingface)
-        integrations.patch_mistral(autopatch_settings.mistral)
-        integrations.patch_vertexai(autopatch_settings.vertexai)
-        integrations.patch_cohere(autopatch_settings.cohere)
-        integrations.patch_llamaindex()
-        if self.settings.autopatch:
-            get_inspect_patcher(autopatch_settings.inspect).attempt_patch()
+        integration_patches: dict[str, Callable[[], Any]] = {
+            "openai": lambda: integrations.patch_openai(autopatch_settings.openai),
+            "anthropic": lambda: integrations.patch_anthropic(autopatch_settings.anthropic),
+            "google_genai": lambda: integrations.patch_google_genai(autopatch_settings.google_genai),
+            "groq": lambda: integrations.patch_groq(autopatch_settings.groq),
+            "huggingface": lambda: integrations.patch_huggingface(autopatch_settings.huggingface),
+            "mistral": lambda: integrations.patch_mistral(autopatch_settings.mistral),
+            "vertexai": lambda: integrations.patch_vertexai(autopatch_settings.vertexai),
+            "cohere": lambda: integrations.patch_cohere(autopatch_settings.cohere),
+            "llamaindex": integrations.patch_llamaindex,
+        }
+        integration_patches[integration]()
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+from collections import deque
+from logging import getLogger
+from pathlib import Path
+from typing import Awaitable, Callable, Literal
+from inspect_ai.hooks import SampleEnd
+from inspect_ai.log import EvalSample
+
+logger = getLogger(__name__)
+
+QueuePolicy = Literal["block", "drop_oldest", "spill"]
+
+
+class SampleLogQueue:
+    """
+    Bounded queue of finished samples, consumed by a fixed number of worker tasks which log them to Weave.
+
+    When the queue is full, `policy` decides what happens to a new sample:
+    - "block": `put` waits for space, applying backpressure to Inspect's sample loop
+    - "drop_oldest": the oldest queued sample is dropped (and passed to `on_drop`) to make space
+    - "spill": the sample is written to disk, and moved back to the queue as space becomes free
+
+    Spill files left when the queue is stopped are deleted, as is the temporary spill directory (if `spill_dir` is not
+    given) once the queue is stopped or fully drained.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[SampleEnd], Awaitable[None]],
+        workers: int = 8,
+        max_size: int = 1000,
+        policy: QueuePolicy = "block",
+        on_drop: Callable[[SampleEnd], None] | None = None,
+        spill_dir: Path | None = None,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.max_size = max_size
+        self.policy = policy
+        self.on_drop = on_drop
+        self.spill_dir = spill_dir
+        self._owns_spill_dir: bool = False
+        self.dropped: int = 0
+        self.spilled: int = 0
+        self.max_depth: int = 0
+        self.last_lag: float = 0.0
+        self.max_lag: float = 0.0
+        self._queue: asyncio.Queue[tuple[float, SampleEnd]] = asyncio.Queue(maxsize=max_size)
+        self._spill_files: deque[Path] = deque()
+        self._spill_count: int = 0
+        self._worker_tasks: list[asyncio.Task[None]] = []
+        self._unfinished: int = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._unfinished_by_eval: dict[str, int] = {}
+        self._eval_idle: dict[str, asyncio.Event] = {}
+
+    @property
+    def depth(self) -> int:
+        """
+        Number of samples waiting to be logged, in memory or spilled to disk.
+        """
+        return self._queue.qsize() + len(self._spill_files)
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._worker_tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._worker_tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def put(self, data: SampleEnd) -> None:
+        self.start()
+        self._unfinished += 1
+        self._idle.clear()
+        self._unfinished_by_eval[data.eval_id] = self._unfinished_by_eval.get(data.eval_id, 0) + 1
+        self._eval_idle.setdefault(data.eval_id, asyncio.Event()).clear()
+        item = (time.monotonic(), data)
+        try:
+            if not self._queue.full() or self.policy == "block":
+                await self._queue.put(item)
+            elif self.policy == "drop_oldest":
+                _, oldest = self._queue.get_nowait()
+                self.dropped += 1
+                self._finish_item(oldest)
+                if self.on_drop is not None:
+                    self.on_drop(oldest)
+                self._queue.put_nowait(item)
+            else:
+                await self._spill(item)
+        except BaseException:
+            # The sample never reached the queue (e.g. the put was cancelled while blocked), so drain must not wait for it
+            self._finish_item(data)
+            raise
+        self.max_depth = max(self.max_depth, self.depth)
+        if self._spill_files and not self._queue.full():
+            # Shielded, since samples being moved back to the queue are already counted as queued
+            await asyncio.shield(self._unspill())
+
+    def pending(self, eval_id: str | None = None) -> int:
+        """
+        Number of samples queued or being logged, for a single task if `eval_id` is given.
+        """
+        if eval_id is None:
+            return self._unfinished
+        return self._unfinished_by_eval.get(eval_id, 0)
+
+    async def drain(self, eval_id: str | None = None, timeout: float | None = None) -> bool:
+        """
+        Waits until every queued sample (or every sample of the task with `eval_id`) has been logged,
+        returning False if the timeout expires first. Workers keep logging samples from other tasks in the meantime.
+        """
+        if eval_id is None:
+            idle = self._idle
+        elif (eval_idle := self._eval_idle.get(eval_id)) is not None:
+            idle = eval_idle
+        else:
+            return True
+        try:
+            await asyncio.wait_for(idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        # No sample is queued or being spilled, so nothing can still be using the spill directory
+        if eval_id is None and self._unfinished == 0:
+            await self._remove_spill_files()
+        return True
+
+    async def stop(self) -> None:
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        await self._remove_spill_files()
+
+    def gauges(self) -> dict[str, float]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+        }
+
+    async def _work(self) -> None:
+        while True:
+            enqueued_at, data = await self._queue.get()
+            if self._spill_files:
+                await self._unspill()
+            self.last_lag = time.monotonic() - enqueued_at
+            self.max_lag = max(self.max_lag, self.last_lag)
+            try:
+                await self.handler(data)
+            except Exception as e:
+                logger.error(f"Failed to log sample {data.sample.id} (epoch {data.sample.epoch}) to Weave: {e}")
+            finally:
+                self._finish_item(data)
+
+    def _finish_item(self, data: SampleEnd) -> None:
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._idle.set()
+        self._unfinished_by_eval[data.eval_id] -= 1
+        if self._unfinished_by_eval[data.eval_id] == 0:
+            del self._unfinished_by_eval[data.eval_id]
+            self._eval_idle.pop(data.eval_id).set()
+
+    async def _spill(self, item: tuple[float, SampleEnd]) -> None:
+        if self.spill_dir is None:
+            self.spill_dir = Path(tempfile.mkdtemp(prefix="inspect_wandb_weave_"))
+            self._owns_spill_dir = True
+        self._spill_count += 1
+        path = self.spill_dir / f"{self._spill_count}.json"
+        await asyncio.to_thread(_write_spill_file, path, item)
+        self._spill_files.append(path)
+        self.spilled += 1
+
+    async def _unspill(self) -> None:
+        """
+        Moves spilled samples back into the in-memory queue while it has space.
+        """
+        while self._spill_files and not self._queue.full():
+            path = self._spill_files.popleft()
+            try:
+                item = await asyncio.to_thread(_read_spill_file, path)
+            except BaseException:
+                self._spill_files.appendleft(path)
+                raise
+            try:
+                self._queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # A producer filled the queue while the file was read, so the sample stays spilled
+                self._spill_files.appendleft(path)
+                return
+            path.unlink(missing_ok=True)
+
+    async def _remove_spill_files(self) -> None:
+        spill_files, self._spill_files = list(self._spill_files), deque()
+        spill_dir = self.spill_dir if self._owns_spill_dir else None
+        if spill_dir is not None:
+            self.spill_dir, self._owns_spill_dir = None, False
+        if spill_files or spill_dir is not None:
+            await asyncio.to_thread(_remove_spill_files, spill_files, spill_dir)
+
+
+def _write_spill_file(path: Path, item: tuple[float, SampleEnd]) -> None:
+    enqueued_at, data = item
+    path.write_text(json.dumps({
+        "enqueued_at": enqueued_at,
+        "eval_set_id": data.eval_set_id,
+        "run_id": data.run_id,
+        "eval_id": data.eval_id,
+        "sample_id": data.sample_id,
+        "sample": data.sample.model_dump_json(),
+    }))
+
+
+def _read_spill_file(path: Path) -> tuple[float, SampleEnd]:
+    spilled = json.loads(path.read_text())
+    return spilled["enqueued_at"], SampleEnd(
+        eval_set_id=spilled["eval_set_id"],
+        run_id=spilled["run_id"],
+        eval_id=spilled["eval_id"],
+        sample_id=spilled["sample_id"],
+        sample=EvalSample.model_validate_json(spilled["sample"]),
+    )
+
+
+def _remove_spill_files(spill_files: list[Path], spill_dir: Path | None) -> None:
+    for path in spill_files:
+        path.unlink(missing_ok=True)
+    if spill_dir is not None:
+        shutil.rmtree(spill_dir, ignore_errors=True)
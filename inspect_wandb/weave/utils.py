@@ -1,3 +1,7 @@
+import hashlib
+import json
+from typing import Any
+from pydantic_core import to_jsonable_python
 from weave.evaluation.eval_imperative import ScoreType
 from inspect_ai.scorer import Value
 from typing import Sequence, Mapping
@@ -5,6 +9,53 @@ from logging import getLogger
 
 utils_logger = getLogger(__name__)
 
+# Weave integrations for the SDK used by each Inspect model provider. Providers whose SDK Weave has no integration for
+# (e.g. azureai uses azure.ai.inference, and hf runs transformers locally) map to none
+PROVIDER_INTEGRATIONS: dict[str, list[str]] = {
+    "openai": ["openai"],
+    "openai-api": ["openai"],
+    "openrouter": ["openai"],
+    "together": ["openai"],
+    "fireworks": ["openai"],
+    "sambanova": ["openai"],
+    "grok": ["openai"],
+    "perplexity": ["openai"],
+    "cf": ["openai"],
+    "vllm": ["openai"],
+    "sglang": ["openai"],
+    "ollama": ["openai"],
+    "llama-cpp-python": ["openai"],
+    "anthropic": ["anthropic"],
+    "google": ["google_genai"],
+    "groq": ["groq"],
+    "mistral": ["mistral"],
+    "azureai": [],
+    "bedrock": [],
+    "goodfire": [],
+    "hf": [],
+    "transformer_lens": [],
+    "mockllm": [],
+    "none": [],
+}
+
+# Weave integrations for SDKs no Inspect provider uses, which are patched once their module is imported (e.g. by a solver)
+IMPORTED_INTEGRATIONS: dict[str, str] = {
+    "vertexai": "vertexai",
+    "cohere": "cohere",
+    "llamaindex": "llama_index",
+    "huggingface": "huggingface_hub",
+}
+
+def model_integrations(model: str) -> list[str]:
+    """
+    Weave integrations to patch for a model, from its provider prefix. Models from unknown providers may use any SDK,
+    so every provider integration is patched for them.
+    """
+    provider = model.split("/", 1)[0]
+    if provider in PROVIDER_INTEGRATIONS:
+        return PROVIDER_INTEGRATIONS[provider]
+    return sorted({integration for integrations in PROVIDER_INTEGRATIONS.values() for integration in integrations})
+
 def format_score_types(score_value: Value) -> ScoreType:
     if isinstance(score_value, str):
         return {"score": score_value}
@@ -38,3 +89,97 @@ def format_sample_display_name(template: str, task_name: str, sample_id: int | s
         return template.format(task_name=task_name, sample_id=sample_id, epoch=epoch)
     except (KeyError, ValueError):
         return f"{task_name}-sample-{sample_id}-epoch-{epoch}"
+
+
+def should_trace_sample(sample_id: int | str, rate: float) -> bool:
+    """
+    Decide whether a sample is traced, keeping `rate` of samples.
+
+    The decision hashes the sample id, so it is the same for every epoch of a sample and across runs.
+
+    Args:
+        sample_id: ID of the sample (numeric or string)
+        rate: Fraction of samples to trace, between 0 and 1
+
+    Returns:
+        Whether the sample should be traced
+    """
+    if rate >= 1:
+        return True
+    if rate <= 0:
+        return False
+    digest = hashlib.blake2b(str(sample_id).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") < rate * 2**64
+
+
+IMAGE_STRIPPED = "[image stripped]"
+
+def payload_digest(value: Any) -> str:
+    """
+    SHA-256 hex digest of a value's JSON representation.
+    """
+    return hashlib.sha256(json.dumps(to_jsonable_python(value, fallback=str)).encode()).hexdigest()
+
+def truncate_payload(value: Any, max_bytes: int | None, strip_images: bool = False) -> Any:
+    """
+    Bound the size of a value before it is sent to Weave.
+
+    Values are converted to JSON-compatible data. Images (image content and `data:image/` URIs) are replaced with a
+    marker if `strip_images` is set. A string longer than `max_bytes` (as JSON) is cut to fit with a truncation marker,
+    and any other value that is too large is replaced with its size, hash and a preview cut to fit. The result is at most
+    `max_bytes` as JSON, with only the marker (itself cut to fit) kept if `max_bytes` is too small for anything more.
+
+    Args:
+        value: The value to send to Weave
+        max_bytes: Maximum size of the value as JSON, or None for no limit
+        strip_images: Whether to replace images with a marker
+
+    Returns:
+        The value, or a truncated version of it
+    """
+    if max_bytes is None and not strip_images:
+        return value
+    payload = to_jsonable_python(value, fallback=str)
+    if strip_images:
+        payload = _strip_images(payload)
+    if max_bytes is None:
+        return payload
+    encoded = json.dumps(payload).encode()
+    if len(encoded) <= max_bytes:
+        return payload
+    digest = hashlib.sha256(encoded).hexdigest()
+    marker = f"...[truncated {len(encoded)} bytes, sha256:{digest}]"
+    if isinstance(payload, str):
+        return _truncate_string(payload, max_bytes, marker)
+    summary = {"truncated": True, "bytes": len(encoded), "sha256": digest, "preview": ""}
+    # The preview can use the bytes left over by the summary, including the empty preview's quotes
+    preview_bytes = max_bytes - len(json.dumps(summary).encode()) + 2
+    if preview_bytes < 2:
+        return _truncate_string("", max_bytes, marker)
+    return summary | {"preview": _truncate_string(encoded.decode(), preview_bytes)}
+
+def _truncate_string(text: str, max_bytes: int, marker: str = "") -> str:
+    """
+    Longest prefix of a string which, followed by `marker`, is at most `max_bytes` as JSON (including quotes and escapes).
+    """
+    if len(json.dumps(marker).encode()) > max_bytes:
+        return _truncate_string(marker, max_bytes) if marker else ""
+    low, high = 0, min(len(text), max_bytes)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if len(json.dumps(text[:middle] + marker).encode()) <= max_bytes:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low] + marker
+
+def _strip_images(payload: Any) -> Any:
+    if isinstance(payload, str):
+        return IMAGE_STRIPPED if payload.startswith("data:image/") else payload
+    if isinstance(payload, list):
+        return [_strip_images(item) for item in payload]
+    if isinstance(payload, dict):
+        if payload.get("type") == "image" and "image" in payload:
+            return payload | {"image": IMAGE_STRIPPED}
+        return {k: _strip_images(v) for k, v in payload.items()}
+    return payload
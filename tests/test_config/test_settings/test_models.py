@@ -21,6 +21,18 @@ class TestModelsSettings:
         assert settings.files is None
         assert settings.viz is False
         assert settings.add_metadata_to_config is True
+        assert settings.log_interval is None
+        assert settings.log_batch_size is None
+        assert settings.background_writer is False
+        assert settings.writer_queue_size == 10_000
+        assert settings.writer_drain_timeout == 60.0
+        assert settings.upload_concurrency == 8
+        assert settings.log_artifacts is False
+        assert settings.sample_table is False
+        assert settings.sample_table_chunk_size == 1000
+        assert settings.throughput_window is None
+        assert settings.model_prices is None
+        assert settings.deduplicate_samples is False
         assert settings.tags is None
         assert settings.environment_validations is None
         assert settings.entity == "test-entity"
@@ -143,6 +155,38 @@ class TestModelsSettings:
         finally:
             os.chdir(original_cwd)
     
+    def test_model_prices_from_pyproject_toml(self, tmp_path: Path) -> None:
+        # Given
+        pyproject_content = """
+        [tool.inspect-wandb.models]
+        throughput_window = 30
+
+        [tool.inspect-wandb.models.model_prices."openai/gpt-4o"]
+        input = 2.5
+        output = 10
+        """
+        pyproject_path = tmp_path / "pyproject.toml"
+        pyproject_path.write_text(pyproject_content)
+        
+        wandb_dir = tmp_path / "wandb"
+        wandb_dir.mkdir()
+        
+        original_cwd = os.getcwd()
+        
+        # When
+        try:
+            os.chdir(tmp_path)
+            with patch('inspect_wandb.config.wandb_settings_source.wandb_dir', return_value=str(wandb_dir)):
+                settings = ModelsSettings()
+                
+        # Then
+            assert settings.throughput_window == 30.0
+            assert settings.model_prices is not None
+            assert settings.model_prices["openai/gpt-4o"].input == 2.5
+            assert settings.model_prices["openai/gpt-4o"].output == 10.0
+        finally:
+            os.chdir(original_cwd)
+    
     def test_pyproject_toml_alias_names(self, tmp_path: Path) -> None:
         # Given
         pyproject_content = """
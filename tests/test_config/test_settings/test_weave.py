@@ -1,4 +1,5 @@
 from inspect_wandb.config.settings import WeaveSettings
+from inspect_wandb.config.settings.weave import TraceFilter
 from unittest.mock import patch
 from pathlib import Path
 import os
@@ -16,7 +17,22 @@ class TestWeaveSettings:
         # Then
         assert settings.enabled is True
         assert settings.autopatch is True
+        assert settings.trace_sample_rate == 1.0
+        assert settings.trace_model_calls is False
+        assert settings.trace_tool_calls is False
+        assert settings.trace_sandbox_calls is False
+        assert settings.trace_solvers == TraceFilter()
+        assert settings.trace_scorers == TraceFilter()
+        assert settings.trace_providers == TraceFilter()
         assert settings.sample_name_template == "{task_name}-sample-{sample_id}-epoch-{epoch}"
+        assert settings.max_payload_bytes is None
+        assert settings.strip_images is False
+        assert settings.deduplicate_inputs is False
+        assert settings.stream_predictions is False
+        assert settings.sample_log_workers == 8
+        assert settings.sample_log_queue_size == 1000
+        assert settings.sample_log_queue_policy == "block"
+        assert settings.drain_timeout == 60.0
         assert settings.entity == "test-entity"
         assert settings.project == "test-project"
     
@@ -151,4 +167,50 @@ class TestWeaveSettings:
             assert settings_field.project == settings_alias.project == "test-project"
             assert settings_field.enabled == settings_alias.enabled
         finally:
-            os.chdir(original_cwd)
\ No newline at end of file
+            os.chdir(original_cwd)
+
+class TestTraceFilter:
+
+    def test_matches_everything_by_default(self) -> None:
+        # Given
+        trace_filter = TraceFilter()
+
+        # When / Then
+        assert trace_filter.matches("inspect_ai/generate")
+        assert trace_filter.matches("openai")
+
+    def test_matches_include_and_exclude_globs(self) -> None:
+        # Given
+        trace_filter = TraceFilter(include=["my_agent/*", "inspect_ai/generate"], exclude=["my_agent/helper_*"])
+
+        # When / Then
+        assert trace_filter.matches("my_agent/plan")
+        assert trace_filter.matches("inspect_ai/generate")
+        assert not trace_filter.matches("my_agent/helper_format")
+        assert not trace_filter.matches("inspect_ai/system_message")
+
+    def test_parses_filters_from_pyproject_toml(self, tmp_path: Path) -> None:
+        # Given
+        pyproject_content = """
+        [tool.inspect-wandb.weave.trace_solvers]
+        exclude = ["my_agent/helper_*"]
+
+        [tool.inspect-wandb.weave.trace_providers]
+        include = ["openai", "anthropic"]
+        """
+        (tmp_path / "pyproject.toml").write_text(pyproject_content)
+        (tmp_path / "wandb").mkdir()
+        original_cwd = os.getcwd()
+
+        # When
+        try:
+            os.chdir(tmp_path)
+            with patch('inspect_wandb.config.wandb_settings_source.wandb_dir', return_value=str(tmp_path / "wandb")):
+                settings = WeaveSettings.model_validate({})
+
+        # Then
+            assert settings.trace_solvers.exclude == ["my_agent/helper_*"]
+            assert settings.trace_providers.include == ["openai", "anthropic"]
+            assert not settings.trace_providers.matches("groq")
+        finally:
+            os.chdir(original_cwd)
@@ -0,0 +1,45 @@
+from inspect_wandb.models.buffer import MetricsBuffer
+
+
+class TestMetricsBuffer:
+
+    def test_flushes_every_update_when_no_policy_is_set(self) -> None:
+        # Given
+        buffer = MetricsBuffer()
+
+        # When
+        buffer.update({"samples": 1})
+
+        # Then
+        assert buffer.should_flush()
+        assert buffer.flush() == {"samples": 1}
+        assert not buffer.should_flush()
+
+    def test_coalesces_updates_until_batch_size(self) -> None:
+        # Given
+        buffer = MetricsBuffer(batch_size=2)
+
+        # When
+        buffer.update({"samples": 1, "accuracy": 1.0})
+        first_check = buffer.should_flush()
+        buffer.update({"samples": 2, "accuracy": 0.5})
+
+        # Then
+        assert not first_check
+        assert buffer.should_flush()
+        assert buffer.flush() == {"samples": 2, "accuracy": 0.5}
+        assert len(buffer) == 0
+
+    def test_flushes_once_interval_has_elapsed(self) -> None:
+        # Given
+        now = [0.0]
+        buffer = MetricsBuffer(interval=5.0, clock=lambda: now[0])
+
+        # When
+        buffer.update({"samples": 1})
+        before_interval = buffer.should_flush()
+        now[0] = 5.0
+
+        # Then
+        assert not before_interval
+        assert buffer.should_flush()
@@ -0,0 +1,77 @@
+from pathlib import Path
+
+from inspect_wandb.models.dedup import SampleLedger
+
+
+class TestSampleLedger:
+
+    def test_sample_only_counted_once(self, tmp_path: Path) -> None:
+        # Given
+        ledger = SampleLedger(tmp_path / "run.samples")
+        key = SampleLedger.key("task-id", 1, 1)
+
+        # When
+        first = ledger.add(key)
+        second = ledger.add(key)
+
+        # Then
+        assert first
+        assert not second
+        assert len(ledger) == 1
+
+    def test_keys_distinguish_task_sample_and_epoch(self) -> None:
+        # Given
+        keys = {
+            SampleLedger.key("task-a", 1, 1),
+            SampleLedger.key("task-b", 1, 1),
+            SampleLedger.key("task-a", 2, 1),
+            SampleLedger.key("task-a", 1, 2),
+            SampleLedger.key("task-a", "1", 2),
+        }
+
+        # Then
+        assert len(keys) == 4
+        assert all(0 <= key < 2 ** 64 for key in keys)
+
+    def test_flushed_keys_reloaded_by_resumed_run(self, tmp_path: Path) -> None:
+        # Given
+        path = tmp_path / "run.samples"
+        ledger = SampleLedger(path)
+        ledger.add(SampleLedger.key("task-id", 1, 1))
+        ledger.flush()
+        ledger.add(SampleLedger.key("task-id", 2, 1))
+        ledger.flush()
+        ledger.flush()
+
+        # When
+        resumed = SampleLedger(path)
+
+        # Then
+        assert path.stat().st_size == 16
+        assert not resumed.add(SampleLedger.key("task-id", 1, 1))
+        assert not resumed.add(SampleLedger.key("task-id", 2, 1))
+        assert resumed.add(SampleLedger.key("task-id", 3, 1))
+
+    def test_partially_written_key_is_ignored(self, tmp_path: Path) -> None:
+        # Given
+        path = tmp_path / "run.samples"
+        ledger = SampleLedger(path)
+        ledger.add(SampleLedger.key("task-id", 1, 1))
+        ledger.flush()
+        with open(path, "ab") as f:
+            f.write(b"\x01\x02\x03")
+
+        # When
+        resumed = SampleLedger(path)
+
+        # Then
+        assert len(resumed) == 1
+
+    def test_stored_beside_local_log_dir(self, tmp_path: Path) -> None:
+        # When
+        local = SampleLedger.for_run("eval-set-id", str(tmp_path / "logs"))
+        remote = SampleLedger.for_run("eval-set-id", "s3://bucket/logs")
+
+        # Then
+        assert local.path == tmp_path / "logs" / ".inspect_wandb" / "eval-set-id.samples"
+        assert remote.path == Path(".inspect_wandb") / "samples" / "eval-set-id.samples"
@@ -1,15 +1,27 @@
+import asyncio
+import dataclasses
+import threading
+import time
 from inspect_wandb.models.hooks import WandBModelHooks
 from inspect_wandb.config.settings import ModelsSettings
 from unittest.mock import patch, MagicMock, PropertyMock
+from pathlib import Path
 import pytest
 from wandb.sdk.wandb_run import Run
 from wandb.sdk.wandb_config import Config
 from wandb.sdk.wandb_summary import Summary
 from typing import Callable
-from inspect_ai.hooks import TaskStart, SampleEnd, RunEnd
-from inspect_ai.log import EvalSample
+from inspect_ai.hooks import ModelUsageData, TaskStart, TaskEnd, SampleEnd, RunEnd
+from inspect_ai.log import EvalError, EvalLog, EvalSample
+from inspect_ai.model import ModelUsage
 from inspect_ai.scorer import Score 
 from inspect_wandb.models.hooks import Metric
+from inspect_wandb.models.buffer import MetricsBuffer
+from inspect_wandb.models.dedup import SampleLedger
+from inspect_wandb.models.writer import WandBWriter
+from inspect_wandb.models.stats import TaskMetrics
+from inspect_wandb.models.tables import SAMPLE_TABLE_KEY, SampleTable
+from inspect_wandb.models.throughput import ThroughputTracker
 
 @pytest.fixture(scope="function")
 def mock_wandb_run() -> Run:
@@ -22,6 +34,7 @@ def mock_wandb_run() -> Run:
     mock_run.summary.update = MagicMock()
     mock_run.save = MagicMock()
     mock_run.finish = MagicMock()
+    mock_run.id = "test-wandb-run-id"
     
     # Mock the url property using PropertyMock
     type(mock_run).url = PropertyMock(return_value="mock_wandb_url")
@@ -70,9 +83,84 @@ class TestWandBModelHooks:
             assert hooks._wandb_initialized is True
             assert hooks.run is mock_wandb_run
             hooks.run.config.update.assert_not_called()
-            hooks.run.define_metric.assert_called_once_with(step_metric=Metric.SAMPLES, name=Metric.ACCURACY)
+            hooks.run.define_metric.assert_any_call(step_metric=Metric.SAMPLES, name=Metric.ACCURACY)
+            hooks.run.define_metric.assert_any_call(step_metric=Metric.SAMPLES, name="scores/*")
+            hooks.run.define_metric.assert_any_call("test_task/mockllm__model/samples")
+            hooks.run.define_metric.assert_any_call("test_task/mockllm__model/*", step_metric="test_task/mockllm__model/samples")
+            assert hooks._task_metrics["test_eval_id"].prefix == "test_task/mockllm__model"
             assert hooks.run.tags == ("inspect_task:test_task", "inspect_model:mockllm/model", "inspect_dataset:test-dataset")
 
+    @pytest.mark.asyncio
+    async def test_new_run_waits_for_previous_run_to_finish_on_writer(self, mock_wandb_run: Run, create_task_start: Callable[dict | None, TaskStart], initialise_wandb: None, monkeypatch: pytest.MonkeyPatch) -> None:
+        """
+        Test that a new run is only initialized once the previous run's writer thread has finished its queued calls.
+        """
+        monkeypatch.setenv("INSPECT_WANDB_MODELS_BACKGROUND_WRITER", "True")
+        hooks = WandBModelHooks()
+        hooks._writer.start()
+        calls: list[str] = []
+        hooks._writer.submit(lambda: (time.sleep(0.1), calls.append("finish")))
+        hooks._writer.stop()
+
+        def mock_init(**kwargs) -> Run:
+            calls.append("init")
+            return mock_wandb_run
+
+        with patch('inspect_wandb.models.hooks.wandb.init', mock_init):
+            await hooks.on_task_start(create_task_start())
+        hooks._writer.stop()
+
+        assert calls == ["finish", "init"]
+
+    @pytest.mark.asyncio
+    async def test_tasks_with_same_name_and_model_get_separate_namespaces(self, mock_wandb_run: Run, create_task_start: Callable[dict | None, TaskStart], initialise_wandb: None) -> None:
+        """
+        Test that tasks sharing a name and model (e.g. a sweep over task args) don't share metrics, while a retry of a task does.
+        """
+        hooks = WandBModelHooks()
+        task_start = create_task_start()
+        task_starts = [
+            dataclasses.replace(task_start, eval_id=eval_id, spec=task_start.spec.model_copy(update={"task_id": task_id}))
+            for eval_id, task_id in [("eval-a", "task-id-a"), ("eval-b", "task-id-b"), ("eval-a-retry", "task-id-a")]
+        ]
+
+        with patch('inspect_wandb.models.hooks.wandb.init', MagicMock(return_value=mock_wandb_run)):
+            for task_start in task_starts:
+                await hooks.on_task_start(task_start)
+
+        assert hooks._task_metrics["eval-a"].prefix == "test_task/mockllm__model"
+        assert hooks._task_metrics["eval-b"].prefix == "test_task/mockllm__model-task-id-"
+        assert hooks._task_metrics["eval-a-retry"].prefix == "test_task/mockllm__model"
+        hooks.run.define_metric.assert_any_call("test_task/mockllm__model-task-id-/*", step_metric="test_task/mockllm__model-task-id-/samples")
+
+    @pytest.mark.asyncio
+    async def test_task_resumed_in_later_run_keeps_its_namespace(self, mock_wandb_run: Run, create_task_start: Callable[dict | None, TaskStart], initialise_wandb: None) -> None:
+        """
+        Test that a task namespaced by its task_id in one run gets the same namespace when only it is resumed in a later run.
+        """
+        # Given
+        task_start = create_task_start()
+        task_start_a, task_start_b = [
+            dataclasses.replace(task_start, eval_id=eval_id, spec=task_start.spec.model_copy(update={"task_id": task_id}))
+            for eval_id, task_id in [("eval-a", "task-id-a"), ("eval-b", "task-id-b")]
+        ]
+        first_run = WandBModelHooks()
+        with patch('inspect_wandb.models.hooks.wandb.init', MagicMock(return_value=mock_wandb_run)):
+            await first_run.on_task_start(task_start_a)
+            await first_run.on_task_start(task_start_b)
+        await first_run.on_run_end(RunEnd(eval_set_id=None, run_id="test_run_id", exception=None, logs=[]))
+        summary = mock_wandb_run.summary.update.call_args.args[0]
+
+        # When
+        resumed_run = MagicMock(summary=summary)
+        second_run = WandBModelHooks()
+        with patch('inspect_wandb.models.hooks.wandb.init', MagicMock(return_value=resumed_run)):
+            await second_run.on_task_start(dataclasses.replace(task_start_b, eval_id="eval-b-retry"))
+
+        # Then
+        assert summary["task_prefixes"] == {"test_task/mockllm__model": "task-id-a", "test_task/mockllm__model-task-id-": "task-id-b"}
+        assert second_run._task_metrics["eval-b-retry"].prefix == "test_task/mockllm__model-task-id-"
+
     @pytest.mark.asyncio
     async def test_wandb_config_updated_on_task_start_if_settings_config_is_set(self, mock_wandb_run: Run, create_task_start: Callable[dict | None, TaskStart], initialise_wandb: None) -> None:
         """
@@ -94,7 +182,7 @@ class TestWandBModelHooks:
             assert hooks._wandb_initialized is True
             assert hooks.run is mock_wandb_run
             hooks.run.config.update.assert_called_once_with({"test": "test"}, allow_val_change=True)
-            hooks.run.define_metric.assert_called_once_with(step_metric=Metric.SAMPLES, name=Metric.ACCURACY)
+            hooks.run.define_metric.assert_any_call(step_metric=Metric.SAMPLES, name=Metric.ACCURACY)
             assert hooks.run.tags == ("inspect_task:test_task", "inspect_model:mockllm/model", "inspect_dataset:test-dataset")
 
     @pytest.mark.asyncio
@@ -184,7 +272,7 @@ class TestWandBModelHooks:
             assert hooks._wandb_initialized is True
             assert hooks.run is mock_wandb_run
             hooks.run.config.update.assert_not_called()
-            hooks.run.define_metric.assert_called_once_with(step_metric=Metric.SAMPLES, name=Metric.ACCURACY)
+            hooks.run.define_metric.assert_any_call(step_metric=Metric.SAMPLES, name=Metric.ACCURACY)
             expected_tags = ("inspect_task:test_task", "inspect_model:mockllm/model", "inspect_dataset:test-dataset", "custom-tag1", "custom-tag2")
             assert hooks.run.tags == expected_tags
 
@@ -223,10 +311,574 @@ class TestWandBModelHooks:
         )
 
         # Then
-        hooks.run.log.assert_called_once_with({Metric.SAMPLES: 10, Metric.ACCURACY: 0.5})
+        hooks.run.log.assert_called_once_with({
+            Metric.SAMPLES: 10,
+            Metric.ACCURACY: 0.5,
+            "scores/score/mean": 1.0,
+            "scores/score/variance": 0.0,
+        })
         assert hooks._total_samples == 10
         assert hooks._correct_samples == 5
 
+    @pytest.mark.asyncio
+    async def test_sample_metrics_coalesced_until_batch_size_reached(self, mock_wandb_run: Run) -> None:
+        """
+        Test that on_sample_end only writes to wandb once the configured batch size is reached.
+        """
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project",
+            log_batch_size=3
+        )
+        hooks._metrics_buffer = MetricsBuffer(batch_size=3)
+        hooks._hooks_enabled = True
+
+        # When
+        for value in [True, False, True]:
+            await hooks.on_sample_end(
+                SampleEnd(
+                    eval_set_id=None,
+                    run_id="test-run-id",
+                    eval_id="test-eval-id",
+                    sample_id="test-sample-id",
+                    sample=EvalSample(
+                        id="test-sample-id",
+                        epoch=1,
+                        scores={"score": Score(value=value)},
+                        input="test-input",
+                        target="test-target"
+                    )
+                )
+            )
+
+        # Then
+        hooks.run.log.assert_called_once()
+        assert hooks.run.log.call_args.args[0] == pytest.approx({
+            Metric.SAMPLES: 3,
+            Metric.ACCURACY: 2 / 3,
+            "scores/score/mean": 2 / 3,
+            "scores/score/variance": 2 / 9,
+        })
+
+    @pytest.mark.asyncio
+    async def test_sample_table_logged_in_chunks_with_remainder_on_run_end(self, mock_wandb_run: Run) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project",
+            sample_table=True,
+            sample_table_chunk_size=2
+        )
+        hooks._sample_table = SampleTable(chunk_size=2)
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+        hooks._active_runs = {"test-run-id": {"running": True, "exception": None}}
+
+        # When
+        for index in range(3):
+            await hooks.on_sample_end(
+                SampleEnd(
+                    eval_set_id=None,
+                    run_id="test-run-id",
+                    eval_id="test-eval-id",
+                    sample_id=f"test-sample-{index}",
+                    sample=EvalSample(
+                        id=index,
+                        epoch=1,
+                        scores={"score": Score(value=True)},
+                        input="test-input",
+                        target="test-target"
+                    )
+                )
+            )
+        await hooks.on_run_end(
+            RunEnd(
+                eval_set_id=None,
+                run_id="test-run-id",
+                exception=None,
+                logs=[]
+            )
+        )
+
+        # Then
+        tables = [call.args[0][SAMPLE_TABLE_KEY] for call in hooks.run.log.call_args_list if SAMPLE_TABLE_KEY in call.args[0]]
+        assert [len(table.data) for table in tables] == [2, 1]
+        assert hooks._sample_table.rows_logged == 3
+        assert len(hooks._sample_table) == 0
+
+    @pytest.mark.asyncio
+    async def test_pending_metrics_flushed_on_run_end(self, mock_wandb_run: Run) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project"
+        )
+        hooks._metrics_buffer = MetricsBuffer(interval=60)
+        hooks._metrics_buffer.update({Metric.SAMPLES: 10, Metric.ACCURACY: 0.5})
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+        hooks._active_runs = {"test-run": {"running": True, "exception": None}}
+
+        # When
+        await hooks.on_run_end(
+            RunEnd(
+                eval_set_id=None,
+                run_id="test-run",
+                exception=None,
+                logs=[]
+            )
+        )
+
+        # Then
+        hooks.run.log.assert_called_once_with({Metric.SAMPLES: 10, Metric.ACCURACY: 0.5})
+        assert len(hooks._metrics_buffer) == 0
+
+    @pytest.mark.asyncio
+    async def test_on_sample_end_does_not_wait_for_slow_wandb_log_with_background_writer(self, mock_wandb_run: Run) -> None:
+        """
+        Test that on_sample_end returns without waiting on wandb when the background writer is running.
+        """
+        import time
+
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.run.log.side_effect = lambda *args, **kwargs: time.sleep(0.2)
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project",
+            background_writer=True
+        )
+        hooks._writer = WandBWriter()
+        hooks._writer.start()
+        hooks._hooks_enabled = True
+
+        # When
+        start_time = time.time()
+        await hooks.on_sample_end(
+            SampleEnd(
+                eval_set_id=None,
+                run_id="test-run-id",
+                eval_id="test-eval-id",
+                sample_id="test-sample-id",
+                sample=EvalSample(
+                    id="test-sample-id",
+                    epoch=1,
+                    scores={"score": Score(value=True)},
+                    input="test-input",
+                    target="test-target"
+                )
+            )
+        )
+        duration = time.time() - start_time
+        drained = await hooks._writer.drain(timeout=5)
+        hooks._writer.stop()
+
+        # Then
+        assert duration < 0.1
+        assert drained
+        hooks.run.log.assert_called_once_with({
+            Metric.SAMPLES: 1,
+            Metric.ACCURACY: 1.0,
+            "scores/score/mean": 1.0,
+            "scores/score/variance": 0.0,
+        })
+
+    @pytest.mark.asyncio
+    async def test_per_scorer_aggregates_logged_on_sample_end(self, mock_wandb_run: Run) -> None:
+        """
+        Test that on_sample_end logs running aggregates for each scorer and each key of dict-valued scores.
+        """
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project"
+        )
+        hooks._total_samples = 0
+        hooks._correct_samples = 0
+        hooks._hooks_enabled = True
+
+        # When
+        await hooks.on_sample_end(
+            SampleEnd(
+                eval_set_id=None,
+                run_id="test-run-id",
+                eval_id="test-eval-id",
+                sample_id="test-sample-id",
+                sample=EvalSample(
+                    id="test-sample-id",
+                    epoch=1,
+                    scores={
+                        "match": Score(value="C"),
+                        "rubric": Score(value={"style": 0.5, "facts": 1, "comment": "good"}),
+                    },
+                    input="test-input",
+                    target="test-target"
+                )
+            )
+        )
+
+        # Then
+        hooks.run.log.assert_called_once_with({
+            Metric.SAMPLES: 1,
+            Metric.ACCURACY: 1.0,
+            "scores/match/mean": 1.0,
+            "scores/match/variance": 0.0,
+            "scores/rubric/style/mean": 0.5,
+            "scores/rubric/style/variance": 0.0,
+            "scores/rubric/facts/mean": 1.0,
+            "scores/rubric/facts/variance": 0.0,
+        })
+
+    @pytest.mark.asyncio
+    async def test_per_scorer_aggregates_written_to_summary_on_run_end(self, mock_wandb_run: Run) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project"
+        )
+        hooks._total_samples = 2
+        hooks._correct_samples = 1
+        hooks._score_aggregator.add({"match": Score(value=1.0)})
+        hooks._score_aggregator.add({"match": Score(value=0.0)})
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+        hooks._active_runs = {"test-run": {"running": True, "exception": None}}
+
+        # When
+        await hooks.on_run_end(
+            RunEnd(
+                eval_set_id=None,
+                run_id="test-run",
+                exception=None,
+                logs=[]
+            )
+        )
+
+        # Then
+        hooks.run.summary.update.assert_called_once_with({
+            "samples_total": 2,
+            "samples_correct": 1,
+            "accuracy": 0.5,
+            "logs": [],
+            "scores/match/count": 2,
+            "scores/match/mean": 0.5,
+            "scores/match/variance": 0.25,
+        })
+
+    @pytest.mark.asyncio
+    async def test_concurrent_tasks_logged_under_separate_namespaces(self, mock_wandb_run: Run) -> None:
+        """
+        Test that samples from different tasks in the same run update separate, namespaced counters.
+        """
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project"
+        )
+        hooks._total_samples = 0
+        hooks._correct_samples = 0
+        hooks._task_metrics = {
+            "eval-a": TaskMetrics(prefix="task_a/mockllm__model"),
+            "eval-b": TaskMetrics(prefix="task_b/mockllm__model"),
+        }
+        hooks._hooks_enabled = True
+
+        def sample_end(eval_id: str, value: bool) -> SampleEnd:
+            return SampleEnd(
+                eval_set_id=None,
+                run_id="test-run-id",
+                eval_id=eval_id,
+                sample_id="test-sample-id",
+                sample=EvalSample(
+                    id="test-sample-id",
+                    epoch=1,
+                    scores={"score": Score(value=value)},
+                    input="test-input",
+                    target="test-target"
+                )
+            )
+
+        # When
+        await hooks.on_sample_end(sample_end("eval-a", True))
+        await hooks.on_sample_end(sample_end("eval-b", False))
+        await hooks.on_sample_end(sample_end("eval-a", False))
+
+        # Then
+        last_logged = hooks.run.log.call_args.args[0]
+        assert last_logged[Metric.SAMPLES] == 3
+        assert last_logged["task_a/mockllm__model/samples"] == 2
+        assert last_logged["task_a/mockllm__model/accuracy"] == 0.5
+        assert "task_b/mockllm__model/samples" not in last_logged
+        assert hooks._task_metrics["eval-b"].total_samples == 1
+        assert hooks._task_metrics["eval-b"].accuracy() == 0.0
+
+    @pytest.mark.asyncio
+    async def test_latency_quantiles_logged_per_task_on_flush(self, mock_wandb_run: Run) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project",
+            log_batch_size=3
+        )
+        hooks._metrics_buffer = MetricsBuffer(batch_size=3)
+        hooks._task_metrics = {"eval-a": TaskMetrics(prefix="task_a/mockllm__model")}
+        hooks._hooks_enabled = True
+
+        # When
+        for total_time in [1.0, 2.0, 10.0]:
+            await hooks.on_sample_end(
+                SampleEnd(
+                    eval_set_id=None,
+                    run_id="test-run-id",
+                    eval_id="eval-a",
+                    sample_id="test-sample-id",
+                    sample=EvalSample(
+                        id="test-sample-id",
+                        epoch=1,
+                        scores={"score": Score(value=True)},
+                        input="test-input",
+                        target="test-target",
+                        total_time=total_time,
+                        working_time=total_time / 2
+                    )
+                )
+            )
+
+        # Then
+        hooks.run.log.assert_called_once()
+        logged = hooks.run.log.call_args.args[0]
+        assert logged["task_a/mockllm__model/total_time/p50"] == pytest.approx(2.0, rel=0.01)
+        assert logged["task_a/mockllm__model/working_time/p50"] == pytest.approx(1.0, rel=0.01)
+
+    @pytest.mark.asyncio
+    async def test_latency_and_throughput_logged_for_unscored_samples(self, mock_wandb_run: Run) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks._metrics_buffer = MetricsBuffer(batch_size=2)
+        hooks._task_metrics = {"eval-a": TaskMetrics(prefix="task_a/mockllm__model")}
+        hooks._throughput = ThroughputTracker(window=60.0)
+        hooks._hooks_enabled = True
+
+        # When
+        for index in range(2):
+            await hooks.on_sample_end(
+                SampleEnd(
+                    eval_set_id=None,
+                    run_id="test-run-id",
+                    eval_id="eval-a",
+                    sample_id=f"test-sample-id-{index}",
+                    sample=EvalSample(id=index, epoch=1, input="test-input", target="test-target", total_time=1.0, working_time=0.5)
+                )
+            )
+
+        # Then
+        hooks.run.log.assert_called_once()
+        logged = hooks.run.log.call_args.args[0]
+        assert logged["task_a/mockllm__model/total_time/p50"] == pytest.approx(1.0, rel=0.01)
+        assert "throughput/samples_per_sec" in logged
+        assert Metric.ACCURACY not in logged
+
+    @pytest.mark.asyncio
+    async def test_model_throughput_logged_on_flush(self, mock_wandb_run: Run) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project",
+            throughput_window=60.0
+        )
+        now = [0.0]
+        hooks._throughput = ThroughputTracker(window=60.0, clock=lambda: now[0])
+        hooks._hooks_enabled = True
+
+        # When
+        now[0] = 2.0
+        await hooks.on_model_usage(
+            ModelUsageData(
+                model_name="mockllm/model",
+                usage=ModelUsage(input_tokens=30, output_tokens=10, total_tokens=40),
+                call_duration=1.0
+            )
+        )
+        await hooks.on_sample_end(
+            SampleEnd(
+                eval_set_id=None,
+                run_id="test-run-id",
+                eval_id="test-eval-id",
+                sample_id="test-sample-id",
+                sample=EvalSample(
+                    id="test-sample-id",
+                    epoch=1,
+                    scores={"score": Score(value=True)},
+                    input="test-input",
+                    target="test-target",
+                    model_usage={"mockllm/model": ModelUsage(input_tokens=30, output_tokens=10, total_tokens=40)}
+                )
+            )
+        )
+
+        # Then
+        logged = hooks.run.log.call_args.args[0]
+        assert logged["throughput/mockllm__model/input_tokens_per_sec"] == 15.0
+        assert logged["throughput/mockllm__model/output_tokens_per_sec"] == 5.0
+        assert logged["throughput/samples_per_sec"] == 0.5
+        assert logged["throughput/tokens_per_sample"] == 40.0
+        assert "throughput/mockllm__model/cost_per_sec" not in logged
+
+    @pytest.mark.asyncio
+    async def test_samples_rerun_by_eval_set_retry_not_counted_twice(self, mock_wandb_run: Run, tmp_path: Path) -> None:
+        # Given
+        def sample_end(eval_id: str, sample_id: int, value: bool) -> SampleEnd:
+            return SampleEnd(
+                eval_set_id="test-eval-set",
+                run_id="test-run-id",
+                eval_id=eval_id,
+                sample_id=f"test-sample-{sample_id}",
+                sample=EvalSample(
+                    id=sample_id,
+                    epoch=1,
+                    scores={"score": Score(value=value)},
+                    input="test-input",
+                    target="test-target"
+                )
+            )
+
+        def attempt_hooks(eval_id: str) -> WandBModelHooks:
+            hooks = WandBModelHooks()
+            hooks.run = mock_wandb_run
+            hooks.settings = ModelsSettings(
+                enabled=True, 
+                entity="test-entity", 
+                project="test-project"
+            )
+            hooks._hooks_enabled = True
+            hooks._sample_ledger = SampleLedger.for_run("test-eval-set", str(tmp_path))
+            hooks._task_ids = {eval_id: "test-task-id"}
+            return hooks
+
+        first_attempt = attempt_hooks("eval-attempt-1")
+        await first_attempt.on_sample_end(sample_end("eval-attempt-1", 1, True))
+        first_attempt._sample_ledger.flush()
+
+        # When
+        retry = attempt_hooks("eval-attempt-2")
+        retry._total_samples = first_attempt._total_samples
+        retry._correct_samples = first_attempt._correct_samples
+        await retry.on_sample_end(sample_end("eval-attempt-2", 1, True))
+        await retry.on_sample_end(sample_end("eval-attempt-2", 2, False))
+
+        # Then
+        assert retry._total_samples == 2
+        assert retry._correct_samples == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("summary_written", [True, False])
+    async def test_sample_ledger_persisted_only_once_summary_written(self, mock_wandb_run: Run, task_end_eval_log: EvalLog, tmp_path: Path, summary_written: bool) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True,
+            entity="test-entity",
+            project="test-project",
+            deduplicate_samples=True
+        )
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+        hooks._active_runs = {"test-run": {"running": True, "exception": None}}
+        hooks._sample_ledger = SampleLedger.for_run("test-eval-set", str(tmp_path))
+        hooks._task_ids = {"test-eval": "test-task-id"}
+        if not summary_written:
+            hooks.run.summary.update.side_effect = RuntimeError("wandb unavailable")
+        await hooks.on_sample_end(
+            SampleEnd(
+                eval_set_id="test-eval-set",
+                run_id="test-run",
+                eval_id="test-eval",
+                sample_id="test-sample-1",
+                sample=EvalSample(id=1, epoch=1, input="test-input", target="test-target")
+            )
+        )
+        await hooks.on_task_end(
+            TaskEnd(
+                eval_set_id="test-eval-set",
+                run_id="test-run",
+                eval_id="test-eval",
+                log=task_end_eval_log
+            )
+        )
+        assert not hooks._sample_ledger.path.exists()
+
+        # When
+        await hooks.on_run_end(
+            RunEnd(
+                eval_set_id="test-eval-set",
+                run_id="test-run",
+                exception=None,
+                logs=[]
+            )
+        )
+
+        # Then
+        assert len(SampleLedger.for_run("test-eval-set", str(tmp_path))) == int(summary_written)
+
+    @pytest.mark.asyncio
+    async def test_errored_samples_not_counted_when_deduplicating(self, mock_wandb_run: Run, tmp_path: Path) -> None:
+        # Given
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks._hooks_enabled = True
+        hooks._sample_ledger = SampleLedger.for_run("test-eval-set", str(tmp_path))
+        hooks._task_ids = {"test-eval": "test-task-id"}
+
+        # When
+        await hooks.on_sample_end(
+            SampleEnd(
+                eval_set_id="test-eval-set",
+                run_id="test-run",
+                eval_id="test-eval",
+                sample_id="test-sample-1",
+                sample=EvalSample(
+                    id=1,
+                    epoch=1,
+                    input="test-input",
+                    target="test-target",
+                    error=EvalError(message="test-error", traceback="", traceback_ansi="")
+                )
+            )
+        )
+
+        # Then
+        assert hooks._total_samples == 0
+        assert len(hooks._sample_ledger) == 0
+
     @pytest.mark.asyncio
     async def test_summary_logged_on_run_end(self, mock_wandb_run: Run) -> None:
         # Given
@@ -262,9 +914,119 @@ class TestWandBModelHooks:
         })
 
     @pytest.mark.asyncio
-    async def test_files_saved_on_run_end_when_file_exists(self, mock_wandb_run: Run) -> None:
+    async def test_task_log_uploaded_as_artifact_on_task_end_and_awaited_before_finish(self, mock_wandb_run: Run, task_end_eval_log: EvalLog, tmp_path: Path) -> None:
+        # Given
+        log_file = tmp_path / "test_task.eval"
+        log_file.write_text("log")
+        task_end_eval_log.location = str(log_file)
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project",
+            log_artifacts=True
+        )
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+        hooks._active_runs = {"test-run": {"running": True, "exception": None}}
+
+        # When
+        await hooks.on_task_end(
+            TaskEnd(
+                eval_set_id=None,
+                run_id="test-run",
+                eval_id="test-eval",
+                log=task_end_eval_log
+            )
+        )
+        await hooks.on_run_end(
+            RunEnd(
+                eval_set_id=None,
+                run_id="test-run",
+                exception=None,
+                logs=[]
+            )
+        )
+
+        # Then
+        hooks.run.log_artifact.assert_called_once()
+        artifact = hooks.run.log_artifact.call_args.args[0]
+        assert artifact.name == "test_task-mockllm__model"
+        assert artifact.type == "inspect-log"
+        assert "test_task.eval" in artifact.manifest.entries
+        assert hooks._artifact_uploads == set()
+        hooks.run.finish.assert_called_once_with(exit_code=0)
+
+    @pytest.mark.asyncio
+    async def test_task_log_artifact_logged_on_writer_thread(self, mock_wandb_run: Run, task_end_eval_log: EvalLog, tmp_path: Path) -> None:
+        # Given
+        log_file = tmp_path / "test_task.eval"
+        log_file.write_text("log")
+        task_end_eval_log.location = str(log_file)
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True,
+            entity="test-entity",
+            project="test-project",
+            log_artifacts=True
+        )
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+        hooks._writer.start()
+        threads: list[str] = []
+        hooks.run.log_artifact.side_effect = lambda *args, **kwargs: threads.append(threading.current_thread().name)
+
+        # When
+        await hooks.on_task_end(
+            TaskEnd(
+                eval_set_id=None,
+                run_id="test-run",
+                eval_id="test-eval",
+                log=task_end_eval_log
+            )
+        )
+        await asyncio.gather(*hooks._artifact_uploads)
+        hooks._writer.stop()
+
+        # Then
+        assert threads == ["inspect-wandb-writer"]
+
+    @pytest.mark.asyncio
+    async def test_task_log_not_uploaded_as_artifact_by_default(self, mock_wandb_run: Run, task_end_eval_log: EvalLog) -> None:
+        # Given
+        task_end_eval_log.location = "test_task.eval"
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project"
+        )
+        hooks._hooks_enabled = True
+        hooks._wandb_initialized = True
+
+        # When
+        await hooks.on_task_end(
+            TaskEnd(
+                eval_set_id=None,
+                run_id="test-run",
+                eval_id="test-eval",
+                log=task_end_eval_log
+            )
+        )
+
+        # Then
+        assert hooks._artifact_uploads == set()
+        hooks.run.log_artifact.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_files_saved_on_run_end_when_file_exists(self, mock_wandb_run: Run, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
         """Test that existing files are saved to wandb"""
         # Given
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "test-file.txt").write_text("test")
         hooks = WandBModelHooks()
         hooks.run = mock_wandb_run
         hooks.settings = ModelsSettings(
@@ -279,24 +1041,24 @@ class TestWandBModelHooks:
         hooks._wandb_initialized = True
         hooks._active_runs = {"test-run": {"running": True, "exception": None}}
 
-        # When - mock Path.exists() to return True
-        with patch('inspect_wandb.models.hooks.Path.exists', return_value=True):
-            await hooks.on_run_end(
-                RunEnd(
-                    eval_set_id=None,
-                    run_id="test-run",
-                    exception=None,
-                    logs=[]
-                )
+        # When
+        await hooks.on_run_end(
+            RunEnd(
+                eval_set_id=None,
+                run_id="test-run",
+                exception=None,
+                logs=[]
             )
+        )
 
         # Then
         hooks.run.save.assert_called_once_with("test-file.txt", policy="now")
 
     @pytest.mark.asyncio
-    async def test_files_not_saved_when_file_missing(self, mock_wandb_run: Run) -> None:
+    async def test_files_not_saved_when_file_missing(self, mock_wandb_run: Run, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
         """Test that missing files are skipped with warning"""
         # Given
+        monkeypatch.chdir(tmp_path)
         hooks = WandBModelHooks()
         hooks.run = mock_wandb_run
         hooks.settings = ModelsSettings(
@@ -309,9 +1071,8 @@ class TestWandBModelHooks:
         hooks._wandb_initialized = True
         hooks._active_runs = {"test-run": {"running": True, "exception": None}}
 
-        # When - mock Path.exists() to return False and capture logger
-        with patch('inspect_wandb.models.hooks.Path.exists', return_value=False), \
-             patch('inspect_wandb.models.hooks.logger') as mock_logger:
+        # When
+        with patch('inspect_wandb.models.uploads.logger') as mock_logger:
             await hooks.on_run_end(
                 RunEnd(
                     eval_set_id=None,
@@ -326,9 +1087,11 @@ class TestWandBModelHooks:
         mock_logger.warning.assert_called_with("File or folder 'missing-file.txt' does not exist. Skipping wandb upload.")
 
     @pytest.mark.asyncio
-    async def test_files_save_handles_exceptions(self, mock_wandb_run: Run) -> None:
+    async def test_files_save_handles_exceptions(self, mock_wandb_run: Run, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
         """Test that exceptions during file save are handled gracefully"""
         # Given
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "test-file.txt").write_text("test")
         hooks = WandBModelHooks()
         hooks.run = mock_wandb_run
         hooks.run.save.side_effect = Exception("Upload failed")
@@ -342,9 +1105,8 @@ class TestWandBModelHooks:
         hooks._wandb_initialized = True
         hooks._active_runs = {"test-run": {"running": True, "exception": None}}
 
-        # When - mock Path.exists() to return True and capture logger
-        with patch('inspect_wandb.models.hooks.Path.exists', return_value=True), \
-             patch('inspect_wandb.models.hooks.logger') as mock_logger:
+        # When
+        with patch('inspect_wandb.models.uploads.logger') as mock_logger:
             await hooks.on_run_end(
                 RunEnd(
                     eval_set_id=None,
@@ -359,9 +1121,12 @@ class TestWandBModelHooks:
         mock_logger.warning.assert_called_with("Failed to save test-file.txt to wandb: Upload failed")
 
     @pytest.mark.asyncio
-    async def test_multiple_files_mixed_existence(self, mock_wandb_run: Run) -> None:
+    async def test_multiple_files_mixed_existence(self, mock_wandb_run: Run, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
         """Test handling multiple files with mixed existence"""
         # Given
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "existing-file.txt").write_text("test")
+        (tmp_path / "another-existing.txt").write_text("test")
         hooks = WandBModelHooks()
         hooks.run = mock_wandb_run
         hooks.settings = ModelsSettings(
@@ -374,14 +1139,8 @@ class TestWandBModelHooks:
         hooks._wandb_initialized = True
         hooks._active_runs = {"test-run": {"running": True, "exception": None}}
 
-        # When - mock Path constructor to control exists() method
-        def mock_path_constructor(file_str):
-            mock_path = MagicMock()
-            mock_path.exists.return_value = file_str in ["existing-file.txt", "another-existing.txt"]
-            return mock_path
-
-        with patch('inspect_wandb.models.hooks.Path', side_effect=mock_path_constructor), \
-             patch('inspect_wandb.models.hooks.logger') as mock_logger:
+        # When
+        with patch('inspect_wandb.models.uploads.logger') as mock_logger:
             await hooks.on_run_end(
                 RunEnd(
                     eval_set_id=None,
@@ -397,6 +1156,48 @@ class TestWandBModelHooks:
         hooks.run.save.assert_any_call("another-existing.txt", policy="now")
         mock_logger.warning.assert_called_with("File or folder 'missing-file.txt' does not exist. Skipping wandb upload.")
 
+    @pytest.mark.asyncio
+    async def test_files_already_saved_to_run_are_skipped_on_later_run_end(self, mock_wandb_run: Run, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test that eval-set retries only upload files which have changed since the previous run end"""
+        # Given
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "logs" / "nested").mkdir(parents=True)
+        (tmp_path / "logs" / "a.eval").write_text("a")
+        (tmp_path / "logs" / "nested" / "b.eval").write_text("b")
+        hooks = WandBModelHooks()
+        hooks.run = mock_wandb_run
+        hooks.settings = ModelsSettings(
+            enabled=True, 
+            entity="test-entity", 
+            project="test-project",
+            files=["logs"]
+        )
+        hooks._hooks_enabled = True
+        run_end = RunEnd(
+            eval_set_id=None,
+            run_id="test-run",
+            exception=None,
+            logs=[]
+        )
+
+        # When
+        hooks._wandb_initialized = True
+        hooks._active_runs = {"test-run": {"running": True, "exception": None}}
+        await hooks.on_run_end(run_end)
+        first_run_saves = hooks.run.save.call_count
+
+        (tmp_path / "logs" / "a.eval").write_text("a, retried")
+        hooks._wandb_initialized = True
+        hooks._active_runs = {"test-run": {"running": True, "exception": None}}
+        await hooks.on_run_end(run_end)
+
+        # Then
+        assert first_run_saves == 2
+        hooks.run.save.assert_any_call(str(Path("logs") / "nested" / "b.eval"), base_path=".", policy="now")
+        assert hooks.run.save.call_count == 3
+        hooks.run.save.assert_called_with(str(Path("logs") / "a.eval"), base_path=".", policy="now")
+
+
     @pytest.mark.asyncio
     async def test_wandb_run_url_added_to_eval_metadata(self, mock_wandb_run: Run, create_task_start: Callable[dict | None, TaskStart]) -> None:
         """Test wandb_run_url is added to eval metadata"""
@@ -0,0 +1,178 @@
+import random
+import statistics
+import pytest
+from inspect_ai.scorer import Score
+from inspect_wandb.models.stats import QuantileSketch, RunningStat, ScoreAggregator, TaskMetrics, score_value_to_float
+
+
+class TestRunningStat:
+
+    def test_matches_batch_mean_and_variance(self) -> None:
+        # Given
+        values = [0.0, 1.0, 1.0, 0.5, 0.25, 1.0]
+        stat = RunningStat()
+
+        # When
+        for value in values:
+            stat.add(value)
+
+        # Then
+        assert stat.count == len(values)
+        assert stat.mean == pytest.approx(statistics.fmean(values))
+        assert stat.variance == pytest.approx(statistics.pvariance(values))
+
+    def test_restored_stat_continues_from_previous_values(self) -> None:
+        # Given
+        first = RunningStat()
+        for value in [1.0, 0.0]:
+            first.add(value)
+
+        # When
+        restored = RunningStat(**first.to_dict())
+        restored.add(1.0)
+
+        # Then
+        assert restored.count == 3
+        assert restored.mean == pytest.approx(2 / 3)
+        assert restored.variance == pytest.approx(statistics.pvariance([1.0, 0.0, 1.0]))
+
+
+class TestScoreAggregator:
+
+    def test_round_trips_through_summary(self) -> None:
+        # Given
+        aggregator = ScoreAggregator()
+        aggregator.add({"match": Score(value="C"), "rubric": Score(value={"style": 0.5})})
+        aggregator.add({"match": Score(value="I"), "rubric": Score(value={"style": 1.0})})
+
+        # When
+        restored = ScoreAggregator.from_summary(aggregator.summary())
+
+        # Then
+        assert restored.summary() == aggregator.summary()
+
+    def test_skips_values_that_are_not_numeric(self) -> None:
+        # Given
+        aggregator = ScoreAggregator()
+
+        # When
+        metrics = aggregator.add({"explain": Score(value="not a number"), "list": Score(value=[1, 2])})
+
+        # Then
+        assert metrics == {}
+        assert aggregator.stats == {}
+
+    @pytest.mark.parametrize("value, expected", [
+        ("C", 1.0),
+        ("I", 0.0),
+        ("P", 0.5),
+        ("N", 0.0),
+        (True, 1.0),
+        (3, 3.0),
+        ("0.25", 0.25),
+        ("abc", None),
+        ("nan", None),
+        ("inf", None),
+        ("-inf", None),
+        (float("nan"), None),
+        (float("inf"), None),
+    ])
+    def test_score_value_to_float(self, value: str | bool | int | float, expected: float | None) -> None:
+        assert score_value_to_float(value) == expected
+
+
+class TestQuantileSketch:
+
+    def test_quantiles_within_relative_accuracy(self) -> None:
+        # Given
+        rng = random.Random(0)
+        values = [rng.lognormvariate(1.0, 1.5) for _ in range(10_000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+
+        # When
+        for value in values:
+            sketch.add(value)
+
+        # Then
+        ordered = sorted(values)
+        for q in (0.5, 0.9, 0.99):
+            expected = ordered[int(q * (len(values) - 1))]
+            assert sketch.quantile(q) == pytest.approx(expected, rel=0.01)
+        assert sketch.quantiles((0.5, 0.9, 0.99)) == [sketch.quantile(q) for q in (0.5, 0.9, 0.99)]
+
+    def test_merged_sketch_matches_single_sketch(self) -> None:
+        # Given
+        values = [float(i) for i in range(1, 1001)]
+        first, second, combined = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for i, value in enumerate(values):
+            (first if i % 2 else second).add(value)
+            combined.add(value)
+
+        # When
+        first.merge(QuantileSketch.from_dict(second.to_dict()))
+
+        # Then
+        assert first.count == combined.count
+        assert first.buckets == combined.buckets
+
+    def test_bucket_count_is_bounded_and_upper_quantiles_stay_accurate(self) -> None:
+        # Given
+        sketch = QuantileSketch(relative_accuracy=0.01, max_buckets=64)
+
+        values = [mantissa * 10.0 ** exponent for exponent in range(-6, 7) for mantissa in range(1, 100)]
+
+        # When
+        for value in values:
+            sketch.add(value)
+
+        # Then
+        assert len(sketch.buckets) <= 64
+        assert sketch.quantile(0.99) == pytest.approx(sorted(values)[int(0.99 * (len(values) - 1))], rel=0.01)
+
+    def test_empty_sketch_and_zero_values(self) -> None:
+        # Given
+        sketch = QuantileSketch()
+
+        # When
+        empty = sketch.quantile(0.5)
+        sketch.add(0.0)
+
+        # Then
+        assert empty is None
+        assert sketch.quantile(0.5) == 0.0
+
+
+class TestTaskMetrics:
+
+    def test_round_trips_through_summary(self) -> None:
+        # Given
+        task_metrics = TaskMetrics(prefix="task/model")
+        task_metrics.add({"match": Score(value="C")}, correct=True)
+        task_metrics.add({"match": Score(value="I")}, correct=False)
+
+        # When
+        restored = TaskMetrics.from_summary("task/model", task_metrics.summary())
+
+        # Then
+        assert restored.total_samples == 2
+        assert restored.correct_samples == 1
+        assert restored.summary() == task_metrics.summary()
+
+    def test_latency_quantiles_logged_once_per_update_and_merged_on_resume(self) -> None:
+        # Given
+        first_attempt = TaskMetrics(prefix="task/model")
+        for total_time in [1.0, 2.0, 3.0]:
+            first_attempt.add_latency(total_time, None)
+
+        # When
+        metrics = first_attempt.latency_metrics()
+        repeated = first_attempt.latency_metrics()
+        retry = TaskMetrics.from_summary("task/model", first_attempt.summary())
+        retry.add_latency(100.0, 50.0)
+
+        # Then
+        assert metrics["task/model/total_time/p50"] == pytest.approx(2.0, rel=0.01)
+        assert "task/model/working_time/p50" not in metrics
+        assert repeated == {}
+        assert retry.latency["total_time"].count == 4
+        assert retry.latency_metrics()["task/model/working_time/p50"] == pytest.approx(50.0, rel=0.01)
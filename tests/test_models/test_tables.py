@@ -0,0 +1,75 @@
+from inspect_ai._util.error import EvalError
+from inspect_ai.log import EvalSample
+from inspect_ai.model import ModelUsage
+from inspect_ai.scorer import Score
+
+from inspect_wandb.models.tables import SampleTable
+
+
+def make_sample(id: int, scores: dict[str, Score], **kwargs) -> EvalSample:
+    return EvalSample(id=id, epoch=1, input="input", target="target", scores=scores, **kwargs)
+
+
+class TestSampleTable:
+
+    def test_row_holds_sample_fields_and_flattened_scores(self) -> None:
+        # Given
+        table = SampleTable()
+        table.register_task("eval-a", "task_a", "mockllm/model")
+
+        # When
+        table.add(
+            "eval-a",
+            make_sample(
+                1,
+                {"match": Score(value="C"), "judge": Score(value={"helpful": 0.5, "notes": "n/a"})},
+                total_time=2.5,
+                model_usage={
+                    "mockllm/model": ModelUsage(input_tokens=10, output_tokens=5, total_tokens=15),
+                    "mockllm/grader": ModelUsage(input_tokens=3, output_tokens=2, total_tokens=5),
+                },
+            ),
+        )
+        chunk = table.flush()
+
+        # Then
+        assert chunk is not None
+        assert chunk.columns == [
+            "task", "model", "sample_id", "epoch", "total_time", "working_time", "total_tokens", "error",
+            "score/match", "score/judge/helpful",
+        ]
+        assert chunk.data == [["task_a", "mockllm/model", "1", 1, 2.5, None, 20, None, 1.0, 0.5]]
+
+    def test_flush_resets_chunk_and_scorer_columns(self) -> None:
+        # Given
+        table = SampleTable(chunk_size=2)
+        table.add("eval-a", make_sample(1, {"first": Score(value=1)}))
+        table.add("eval-a", make_sample(2, {"first": Score(value=0)}))
+
+        # When
+        full = table.full()
+        first_chunk = table.flush()
+        table.add("eval-a", make_sample(3, {"second": Score(value=1)}, error=EvalError(message="boom", traceback="", traceback_ansi="")))
+        second_chunk = table.flush()
+
+        # Then
+        assert full
+        assert first_chunk is not None and len(first_chunk.data) == 2
+        assert second_chunk is not None
+        assert second_chunk.columns[-1] == "score/second"
+        assert second_chunk.data[0][7] == "boom"
+        assert table.rows_logged == 3
+        assert table.flush() is None
+
+    def test_rows_missing_a_scorer_are_filled_with_none(self) -> None:
+        # Given
+        table = SampleTable()
+        table.add("eval-a", make_sample(1, {"first": Score(value=1)}))
+        table.add("eval-b", make_sample(2, {"second": Score(value=1)}))
+
+        # When
+        chunk = table.flush()
+
+        # Then
+        assert chunk is not None
+        assert [row[-2:] for row in chunk.data] == [[1.0, None], [None, 1.0]]
@@ -0,0 +1,137 @@
+import pytest
+from inspect_ai.model import ModelUsage
+
+from inspect_wandb.config.settings.models import ModelPrice
+from inspect_wandb.models.throughput import RateWindow, ThroughputTracker
+
+
+class FakeClock:
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRateWindow:
+
+    def test_rates_only_include_entries_within_window(self) -> None:
+        # Given
+        clock = FakeClock()
+        window = RateWindow(window=10.0, clock=clock)
+
+        # When
+        clock.now = 1.0
+        window.add(100.0)
+        clock.now = 15.0
+        window.add(50.0)
+        clock.now = 20.0
+        rates = window.rates()
+
+        # Then
+        assert rates == (5.0,)
+        assert len(window) == 1
+
+    def test_rate_uses_elapsed_time_before_window_is_full(self) -> None:
+        # Given
+        clock = FakeClock()
+        window = RateWindow(window=60.0, clock=clock)
+
+        # When
+        clock.now = 2.0
+        window.add(10.0, 4.0)
+        rates = window.rates()
+
+        # Then
+        assert rates == (5.0, 2.0)
+
+    def test_full_buffer_rates_use_span_of_retained_entries(self) -> None:
+        # Given
+        clock = FakeClock()
+        window = RateWindow(window=60.0, capacity=2, clock=clock)
+
+        # When
+        for now in [10.0, 20.0, 30.0]:
+            clock.now = now
+            window.add(1.0)
+        clock.now = 40.0
+        rates = window.rates()
+
+        # Then
+        assert rates == (2 / 20.0,)
+
+    def test_running_totals_match_entries_after_evictions(self) -> None:
+        # Given
+        clock = FakeClock()
+        window = RateWindow(window=10.0, capacity=8, clock=clock)
+
+        # When
+        for step in range(1, 41):
+            clock.now = step * 0.5
+            window.add(float(step), 1.0)
+            rates = window.rates()
+
+        # Then
+        retained = [step for step in range(1, 41) if step * 0.5 >= clock.now - 10.0][-8:]
+        elapsed = clock.now - retained[0] * 0.5
+        assert rates == pytest.approx((sum(retained) / elapsed, len(retained) / elapsed))
+
+    def test_no_rates_when_window_is_empty(self) -> None:
+        # Given
+        clock = FakeClock()
+        window = RateWindow(window=10.0, clock=clock)
+
+        # When
+        clock.now = 5.0
+        rates = window.rates()
+
+        # Then
+        assert rates is None
+
+
+class TestThroughputTracker:
+
+    def test_per_model_token_and_cost_rates(self) -> None:
+        # Given
+        clock = FakeClock()
+        tracker = ThroughputTracker(
+            window=60.0,
+            prices={"openai/gpt-4o": ModelPrice(input=2.5, output=10.0)},
+            clock=clock,
+        )
+
+        # When
+        tracker.add_usage("openai/gpt-4o", ModelUsage(input_tokens=1000, output_tokens=200, total_tokens=1200))
+        tracker.add_usage("mockllm/model", ModelUsage(input_tokens=10, output_tokens=10, total_tokens=20))
+        tracker.add_sample({"openai/gpt-4o": ModelUsage(total_tokens=1200), "mockllm/model": ModelUsage(total_tokens=20)})
+        clock.now = 4.0
+        metrics = tracker.metrics()
+
+        # Then
+        assert metrics == pytest.approx({
+            "throughput/openai__gpt_4o/input_tokens_per_sec": 250.0,
+            "throughput/openai__gpt_4o/output_tokens_per_sec": 50.0,
+            "throughput/openai__gpt_4o/total_tokens_per_sec": 300.0,
+            "throughput/openai__gpt_4o/cost_per_sec": (1000 * 2.5 + 200 * 10.0) / 1_000_000 / 4.0,
+            "throughput/mockllm__model/input_tokens_per_sec": 2.5,
+            "throughput/mockllm__model/output_tokens_per_sec": 2.5,
+            "throughput/mockllm__model/total_tokens_per_sec": 5.0,
+            "throughput/samples_per_sec": 0.25,
+            "throughput/tokens_per_sample": 1220.0,
+        })
+
+    def test_metrics_only_returned_after_new_usage(self) -> None:
+        # Given
+        clock = FakeClock()
+        tracker = ThroughputTracker(window=60.0, clock=clock)
+        tracker.add_usage("mockllm/model", ModelUsage(input_tokens=10, output_tokens=10, total_tokens=20))
+        clock.now = 1.0
+
+        # When
+        first = tracker.metrics()
+        second = tracker.metrics()
+
+        # Then
+        assert first["throughput/mockllm__model/total_tokens_per_sec"] == 20.0
+        assert second == {}
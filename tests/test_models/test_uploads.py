@@ -0,0 +1,143 @@
+import os
+import threading
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from inspect_ai.log import EvalLog
+
+from inspect_wandb.models.uploads import FileUploader, UploadManifest, eval_log_artifact
+
+
+class TestFileUploader:
+
+    def test_second_upload_skips_unchanged_files(self, tmp_path: Path) -> None:
+        # Given
+        file = tmp_path / "results.json"
+        file.write_text("{}")
+        run = MagicMock()
+        manifest_path = tmp_path / "manifest.json"
+
+        # When
+        FileUploader(run, UploadManifest(manifest_path)).upload([str(file)])
+        uploader = FileUploader(run, UploadManifest(manifest_path))
+        uploader.upload([str(file)])
+
+        # Then
+        run.save.assert_called_once_with(str(file), policy="now")
+        assert uploader.skipped == 1
+        assert uploader.uploaded == 0
+
+    def test_new_files_are_not_hashed(self, tmp_path: Path) -> None:
+        # Given
+        file = tmp_path / "results.json"
+        file.write_text("{}")
+        run = MagicMock()
+
+        # When
+        with patch("inspect_wandb.models.uploads._file_digest") as file_digest:
+            FileUploader(run, UploadManifest(tmp_path / "manifest.json")).upload([str(file)])
+
+        # Then
+        file_digest.assert_not_called()
+        run.save.assert_called_once_with(str(file), policy="now")
+
+    def test_touched_file_with_same_contents_is_skipped_once_hashed(self, tmp_path: Path) -> None:
+        # Given
+        file = tmp_path / "results.json"
+        file.write_text("{}")
+        run = MagicMock()
+        manifest = UploadManifest(tmp_path / "manifest.json")
+        FileUploader(run, manifest).upload([str(file)])
+
+        # When
+        uploaders = []
+        for touch in range(1, 3):
+            stat = file.stat()
+            os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + touch * 1_000_000_000))
+            uploaders.append(FileUploader(run, manifest))
+            uploaders[-1].upload([str(file)])
+
+        # Then
+        assert run.save.call_count == 2
+        assert uploaders[0].uploaded == 1
+        assert uploaders[1].skipped == 1
+
+    def test_changed_file_is_uploaded_again(self, tmp_path: Path) -> None:
+        # Given
+        file = tmp_path / "results.json"
+        file.write_text("{}")
+        run = MagicMock()
+        manifest = UploadManifest(tmp_path / "manifest.json")
+        FileUploader(run, manifest).upload([str(file)])
+
+        # When
+        file.write_text('{"accuracy": 1.0}')
+        FileUploader(run, manifest).upload([str(file)])
+
+        # Then
+        assert run.save.call_count == 2
+
+    def test_folder_contents_are_saved_relative_to_folder_parent(self, tmp_path: Path) -> None:
+        # Given
+        (tmp_path / "logs" / "nested").mkdir(parents=True)
+        (tmp_path / "logs" / "a.eval").write_text("a")
+        (tmp_path / "logs" / "nested" / "b.eval").write_text("b")
+        run = MagicMock()
+
+        # When
+        uploader = FileUploader(run, UploadManifest(tmp_path / "manifest.json"), max_workers=1)
+        uploader.upload([str(tmp_path / "logs")])
+
+        # Then
+        assert uploader.uploaded == 2
+        run.save.assert_any_call(str(tmp_path / "logs" / "a.eval"), base_path=str(tmp_path), policy="now")
+        run.save.assert_any_call(str(tmp_path / "logs" / "nested" / "b.eval"), base_path=str(tmp_path), policy="now")
+
+    def test_saves_on_worker_threads(self, tmp_path: Path) -> None:
+        # Given
+        (tmp_path / "logs").mkdir()
+        for name in ("a.eval", "b.eval"):
+            (tmp_path / "logs" / name).write_text(name)
+        run = MagicMock()
+        threads: list[str] = []
+        run.save.side_effect = lambda *args, **kwargs: threads.append(threading.current_thread().name)
+
+        # When
+        uploader = FileUploader(run, UploadManifest(tmp_path / "manifest.json"))
+        uploader.upload([str(tmp_path / "logs")])
+
+        # Then
+        assert uploader.uploaded == 2
+        assert all(name.startswith("inspect-wandb-upload") for name in threads)
+
+    def test_unreadable_manifest_uploads_everything(self, tmp_path: Path) -> None:
+        # Given
+        file = tmp_path / "results.json"
+        file.write_text("{}")
+        manifest_path = tmp_path / "manifest.json"
+        manifest_path.write_text("not json")
+        run = MagicMock()
+
+        # When
+        FileUploader(run, UploadManifest(manifest_path)).upload([str(file)])
+
+        # Then
+        run.save.assert_called_once_with(str(file), policy="now")
+
+
+class TestEvalLogArtifact:
+
+    def test_local_log_added_as_file(self, task_end_eval_log: EvalLog, tmp_path: Path) -> None:
+        # Given
+        log_file = tmp_path / "2025-01-01_test-task_abc.eval"
+        log_file.write_text("log")
+        task_end_eval_log.location = log_file.as_uri()
+
+        # When
+        artifact = eval_log_artifact(task_end_eval_log)
+
+        # Then
+        assert artifact.name == "test_task-mockllm__model"
+        assert list(artifact.manifest.entries) == ["2025-01-01_test-task_abc.eval"]
+        assert artifact.metadata["task"] == "test_task"
+        assert artifact.metadata["status"] == "started"
@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import MagicMock
+from inspect_wandb.models.writer import WandBWriter
+
+
+class TestWandBWriter:
+
+    def test_runs_calls_inline_when_not_started(self) -> None:
+        # Given
+        writer = WandBWriter()
+        fn = MagicMock(return_value="result")
+
+        # When
+        future = writer.submit(fn, 1, key="value")
+
+        # Then
+        fn.assert_called_once_with(1, key="value")
+        assert future.result() == "result"
+
+    @pytest.mark.asyncio
+    async def test_runs_calls_in_order_on_background_thread(self) -> None:
+        # Given
+        writer = WandBWriter()
+        writer.start()
+        calls: list[tuple[int, str]] = []
+
+        # When
+        for i in range(5):
+            writer.submit(lambda i=i: calls.append((i, threading.current_thread().name)))
+        drained = await writer.drain(timeout=5)
+        writer.stop()
+
+        # Then
+        assert drained
+        assert [i for i, _ in calls] == [0, 1, 2, 3, 4]
+        assert all(name == "inspect-wandb-writer" for _, name in calls)
+
+    @pytest.mark.asyncio
+    async def test_drops_droppable_calls_when_queue_is_full(self) -> None:
+        # Given
+        writer = WandBWriter(max_queue_size=1)
+        writer.start()
+        release = threading.Event()
+        writer.submit(release.wait)
+        fn = MagicMock()
+
+        # When - the first call is blocked, so the queue holds one further call
+        while writer.queue_depth > 0:
+            await asyncio.sleep(0.01)
+        writer.submit(fn, droppable=True)
+        dropped = writer.submit(fn, droppable=True)
+        max_queue_depth = writer.max_queue_depth
+        release.set()
+        await writer.drain(timeout=5)
+        writer.stop()
+
+        # Then
+        assert dropped.cancelled()
+        assert writer.dropped_events == 1
+        assert max_queue_depth == 1
+        fn.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_drain_returns_false_on_timeout(self) -> None:
+        # Given
+        writer = WandBWriter()
+        writer.start()
+        release = threading.Event()
+        writer.submit(release.wait)
+
+        # When
+        drained = await writer.drain(timeout=0.05)
+        release.set()
+        writer.stop()
+
+        # Then
+        assert not drained
+
+    @pytest.mark.asyncio
+    async def test_call_returns_result_from_background_thread(self) -> None:
+        # Given
+        writer = WandBWriter()
+        writer.start()
+
+        # When
+        result = await writer.call(lambda: threading.current_thread().name)
+        writer.stop()
+
+        # Then
+        assert result == "inspect-wandb-writer"
+
+    @pytest.mark.asyncio
+    async def test_call_runs_off_event_loop_when_not_started(self) -> None:
+        # Given
+        writer = WandBWriter()
+
+        # When
+        result = await writer.call(lambda: threading.current_thread() is threading.main_thread())
+
+        # Then
+        assert result is False
+
+    @pytest.mark.asyncio
+    async def test_queues_other_calls_without_blocking_when_queue_is_full(self) -> None:
+        # Given
+        writer = WandBWriter(max_queue_size=1)
+        writer.start()
+        release = threading.Event()
+        writer.submit(release.wait)
+        calls: list[int] = []
+
+        # When
+        for i in range(3):
+            writer.submit(calls.append, i)
+        drained_while_blocked = await writer.drain(timeout=0.05)
+        release.set()
+        drained = await writer.drain(timeout=5)
+        writer.stop()
+
+        # Then
+        assert not drained_while_blocked
+        assert drained
+        assert calls == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_runs_calls_submitted_while_stopping_on_background_thread_in_order(self) -> None:
+        # Given
+        writer = WandBWriter()
+        writer.start()
+        release = threading.Event()
+        calls: list[tuple[int, str]] = []
+        writer.submit(release.wait)
+
+        # When
+        writer.submit(lambda: calls.append((0, threading.current_thread().name)))
+        writer.stop()
+        writer.submit(lambda: calls.append((1, threading.current_thread().name)))
+        release.set()
+        writer.join(timeout=5)
+        writer.submit(lambda: calls.append((2, threading.current_thread().name)))
+
+        # Then
+        assert not writer.running
+        assert calls == [(0, "inspect-wandb-writer"), (1, "inspect-wandb-writer"), (2, threading.current_thread().name)]
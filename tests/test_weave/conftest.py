@@ -1,6 +1,7 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from weave.trace.weave_client import WeaveClient
+from weave.trace_server import trace_server_interface as tsi
 from typing import Generator
 from weave.trace.weave_client import Op, Call, ObjectRef
 from concurrent.futures import Future
@@ -90,3 +91,20 @@ def weave_test_client() -> Generator[WeaveTestClient, None, None]:
     client = WeaveTestClient()
     with patch("weave.trace.context.weave_client_context.get_weave_client", return_value=client):
         yield client
+
+
+@pytest.fixture(scope="function")
+def weave_client() -> Generator[WeaveClient, None, None]:
+    """
+    A Weave client backed by a mocked-out trace server, so calls are created and finished as in a real evaluation.
+    """
+    server = MagicMock(spec=tsi.TraceServerInterface)
+    server.obj_create.return_value = tsi.ObjCreateRes(digest="test_digest")
+    server.file_create.return_value = tsi.FileCreateRes(digest="test_digest")
+    server.table_create.return_value = tsi.TableCreateRes(digest="test_digest", row_digests=[])
+    server.call_start.return_value = tsi.CallStartRes(id="test_id", trace_id="test_trace_id")
+    server.call_end.return_value = tsi.CallEndRes()
+    client = WeaveClient("test-entity", "test-project", server, ensure_project_exists=False)
+    with patch("weave.trace.context.weave_client_context.get_weave_client", return_value=client):
+        yield client
+        client.finish(use_progress_bar=False)
@@ -1,14 +1,27 @@
+import gc
+import weakref
+import weave
 from inspect_ai import task, Task, eval
-from inspect_ai.solver import generate
+from inspect_ai.solver import generate, system_message, use_tools
+from inspect_ai.tool import bash
 from inspect_ai.scorer import exact, match, Target
 from inspect_ai.dataset import Sample
-from inspect_ai.solver import TaskState
-from inspect_ai.model import ModelOutput
-from typing import Generator
+from inspect_ai.solver import Plan, TaskState
+from inspect_ai.model import Model, ModelOutput, ModelUsage, get_model
+from typing import Any, Generator
 import pytest
 from unittest.mock import MagicMock, patch
 from .conftest import WeaveTestClient
 from inspect_wandb.weave.autopatcher.scorer import PatchedScorer
+from inspect_wandb.weave.autopatcher.ops import cached_op
+from inspect_wandb.config.settings.weave import TraceFilter
+from weave.trace.context.call_context import get_tracing_enabled, set_tracing_enabled
+from inspect_wandb.weave.autopatcher.model import patched_model_generate, patched_log_model_retry
+from inspect_wandb.weave.autopatcher.spans import span, payload_size
+from inspect_wandb.weave.autopatcher.plan import PatchedPlan
+from inspect_wandb.weave.autopatcher.inspect import patch_plan_and_scorers, release_patched_task
+from inspect_wandb.weave.autopatcher import sample_calls
+from inspect_wandb.weave.autopatcher.sample_calls import register_sample_call, unregister_sample_call
 from inspect_ai._util.registry import registry_info, is_registry_object, set_registry_info
 from inspect_ai.scorer._metric import Score
 
@@ -42,13 +55,16 @@ def test_inspect_quickstart(
 
     calls = list(patch_weave_client_in_hooks.get_test_calls())
 
-    assert len([call.name for call in calls]) == 9
+    call_names = [call.name for call in calls]
+    assert len(call_names) == 8
 
-    # check for inspect AI patched calls
-    assert "sample" in calls[1].name
-    assert "inspect_ai/generate" in calls[2].name
+    # check for inspect AI patched calls, where the sample call is created off the event loop so may be recorded after its first span
+    assert sorted(call_names[1:3]) == ["inspect-sample", "inspect_ai/generate"]
     assert "scorer_inspect_ai/exact" in calls[3].name
 
+    # all of the sample's scores are logged to the evaluation as a single score call
+    assert calls[6].name == "inspect_scores"
+
 
 class TestPatchedScorerRegistryManagement:
     """Test suite for PatchedScorer's registry management functionality."""
@@ -107,6 +123,12 @@ class TestPatchedScorerRegistryManagement:
 class TestPatchedScorerCall:
     """Test suite for PatchedScorer.__call__ functionality."""
 
+    @pytest.fixture(autouse=True)
+    def clear_sample_calls(self) -> Generator[None, None, None]:
+        yield
+        for sample_uuid in list(sample_calls._sample_calls):
+            unregister_sample_call(sample_uuid)
+
     @pytest.mark.asyncio
     async def test_patched_scorer_call_with_sample_context(self):
         # Given
@@ -128,11 +150,9 @@ class TestPatchedScorerCall:
         mock_sample_call.id = "sample_call_123"
         mock_sample_call.attributes = {"sample_id": 1, "epoch": 1}
 
-        mock_parent_call = MagicMock()
-        mock_parent_call._children = [mock_sample_call]
+        register_sample_call(state.uuid, mock_sample_call)
 
         with patch("inspect_wandb.weave.autopatcher.scorer.call_context") as mock_call_context:
-            mock_call_context.get_current_call.return_value = mock_parent_call
 
             # When
             result = await patched_scorer(state, target)
@@ -160,7 +180,6 @@ class TestPatchedScorerCall:
         target = Target("Hello World")
 
         with patch("inspect_wandb.weave.autopatcher.scorer.call_context") as mock_call_context:
-            mock_call_context.get_current_call.return_value = None
 
             # When
             result = await patched_scorer(state, target)
@@ -202,11 +221,9 @@ class TestPatchedScorerCall:
         mock_sample_call.id = "sample_call_123"
         mock_sample_call.attributes = {"sample_id": 1, "epoch": 1}
 
-        mock_parent_call = MagicMock()
-        mock_parent_call._children = [mock_sample_call]
+        register_sample_call(state.uuid, mock_sample_call)
 
         with patch("inspect_wandb.weave.autopatcher.scorer.call_context") as mock_call_context:
-            mock_call_context.get_current_call.return_value = mock_parent_call
 
             # When/Then
             with pytest.raises(ValueError, match="Test error"):
@@ -236,11 +253,9 @@ class TestPatchedScorerCall:
         mock_sample_call.id = "sample_call_123"
         mock_sample_call.attributes = {"sample_id": 1, "epoch": 1}
 
-        mock_parent_call = MagicMock()
-        mock_parent_call._children = [mock_sample_call]
+        register_sample_call("other_sample_uuid", mock_sample_call)
 
         with patch("inspect_wandb.weave.autopatcher.scorer.call_context") as mock_call_context:
-            mock_call_context.get_current_call.return_value = mock_parent_call
 
             # When
             result = await patched_scorer(state, target)
@@ -250,3 +265,307 @@ class TestPatchedScorerCall:
             mock_call_context.push_call.assert_not_called()
             mock_call_context.pop_call.assert_not_called()
 
+
+
+    @pytest.mark.asyncio
+    async def test_patched_scorer_disables_tracing_for_untraced_sample(self):
+        # Given
+        tracing_enabled: list[bool] = []
+
+        class RecordingScorer:
+            __name__ = "RecordingScorer"
+
+            async def __call__(self, state: TaskState, target: Target) -> Score:
+                tracing_enabled.append(get_tracing_enabled())
+                return Score(value=1.0)
+
+        recording_scorer = RecordingScorer()
+        from inspect_ai._util.registry import RegistryInfo
+        set_registry_info(recording_scorer, RegistryInfo(name="test/recording_scorer", type="scorer"))
+        state = TaskState(
+            model="test_model",
+            sample_id=1,
+            epoch=1,
+            input="test input",
+            messages=[],
+            output=ModelOutput.from_content(model="test_model", content="Hello World"),
+            completed=False
+        )
+
+        # When
+        await PatchedScorer(recording_scorer)(state, Target("Hello World"))
+
+        # Then
+        assert tracing_enabled == [False]
+        assert get_tracing_enabled()
+
+
+class TestCachedOp:
+    """Test suite for the Weave op cache used by PatchedPlan and PatchedScorer."""
+
+    def test_reuses_op_for_the_same_object_and_prefix(self):
+        # Given
+        scorer = exact()
+
+        # When
+        first = cached_op(scorer, prefix="scorer_")
+        second = cached_op(scorer, prefix="scorer_")
+        unprefixed = cached_op(scorer)
+
+        # Then
+        assert first is second
+        assert first.name == "scorer_inspect_ai/exact"
+        assert unprefixed is not first
+        assert unprefixed.name == "inspect_ai/exact"
+
+    def test_op_is_freed_with_its_solver(self):
+        # Given
+        solver = generate()
+        cached_op(solver)
+        solver_ref = weakref.ref(solver)
+
+        # When
+        del solver
+        gc.collect()
+
+        # Then
+        assert solver_ref() is None
+
+    @pytest.mark.asyncio
+    async def test_patched_scorers_share_op_for_the_same_scorer(self):
+        # Given
+        scorer = exact()
+        state = TaskState(
+            model="test_model",
+            sample_id=1,
+            epoch=1,
+            input="test input",
+            messages=[],
+            output=ModelOutput.from_content(model="test_model", content="Hello World"),
+            completed=False
+        )
+
+        # When
+        with patch("inspect_wandb.weave.autopatcher.ops.weave.op", wraps=weave.op) as mock_op:
+            await PatchedScorer(scorer)(state, Target("Hello World"))
+            await PatchedScorer(scorer)(state, Target("Hello World"))
+
+        # Then
+        mock_op.assert_called_once_with(name="scorer_inspect_ai/exact")
+
+
+class TestPatchPlanAndScorers:
+    """Test suite for reusing a task's patched plan and scorers across its samples."""
+
+    def test_reuses_patched_plan_and_scorers_within_a_task(self):
+        # Given
+        plan = Plan([generate()], internal=True)
+        scorers = [exact()]
+
+        # When
+        first_plan, first_scorers = patch_plan_and_scorers("test_task_id", plan, scorers)
+        second_plan, second_scorers = patch_plan_and_scorers("test_task_id", plan, scorers)
+        release_patched_task("test_task_id")
+        released_plan, _ = patch_plan_and_scorers("test_task_id", plan, scorers)
+        release_patched_task("test_task_id")
+
+        # Then
+        assert isinstance(first_plan, PatchedPlan)
+        assert second_plan is first_plan
+        assert second_scorers is first_scorers
+        assert released_plan is not first_plan
+
+    def test_rebuilds_when_the_plan_changes(self):
+        # Given
+        scorers = [exact()]
+        first_plan, _ = patch_plan_and_scorers("test_task_id", Plan([generate()], internal=True), scorers)
+
+        # When
+        other_plan, other_scorers = patch_plan_and_scorers("test_task_id", Plan([generate()], internal=True), scorers)
+        release_patched_task("test_task_id")
+
+        # Then
+        assert other_plan is not first_plan
+        assert other_scorers is not None
+        assert isinstance(other_scorers[0], PatchedScorer)
+
+
+class TestTraceFilters:
+    """Test suite for excluding solvers and scorers from tracing."""
+
+    def test_excluded_solver_runs_without_op_wrapper(self):
+        # Given
+        traced_solver = generate()
+        excluded_solver = system_message("test system message")
+        plan = PatchedPlan(
+            [excluded_solver, traced_solver],
+            internal=True,
+            solver_filter=TraceFilter(exclude=["inspect_ai/system_message"]),
+        )
+
+        # Then
+        assert plan._steps[0] is excluded_solver
+        assert plan._steps[1] is cached_op(traced_solver)
+
+    @pytest.mark.asyncio
+    async def test_excluded_scorer_runs_without_op_wrapper(self):
+        # Given
+        scorer = exact()
+        patched_scorer = PatchedScorer(scorer, scorer_filter=TraceFilter(include=["inspect_ai/match"]))
+        state = TaskState(
+            model="test_model",
+            sample_id=1,
+            epoch=1,
+            input="test input",
+            messages=[],
+            output=ModelOutput.from_content(model="test_model", content="Hello World"),
+            completed=False
+        )
+
+        # When
+        with patch("inspect_wandb.weave.autopatcher.scorer.cached_op") as mock_cached_op:
+            result = await patched_scorer(state, Target("Hello World"))
+
+        # Then
+        assert not patched_scorer.traced
+        assert result is not None and result.value == "C"
+        mock_cached_op.assert_not_called()
+
+
+def test_records_model_call_spans_when_enabled(
+    patch_weave_client_in_hooks: WeaveTestClient,
+    reset_inspect_ai_hooks: None
+) -> None:
+    @task
+    def hello_world():
+        return Task(
+            dataset=[
+                Sample(
+                    input="Just reply with Hello World",
+                    target="Hello World",
+                )
+            ],
+            solver=[generate()],
+            scorer=exact(),
+            metadata={
+                "inspect_wandb_weave_enabled": "true",
+                "inspect_wandb_weave_trace_model_calls": "true",
+                "inspect_wandb_models_enabled": "false"
+            },
+            name="hello_world_model_spans"
+        )
+
+    eval(hello_world, model="mockllm/model")
+
+    calls = {call.name: call for call in patch_weave_client_in_hooks.get_test_calls()}
+
+    assert calls["inspect-model-generate"].inputs == {"model": "mockllm/model", "role": None}
+    # the patch is undone when the run ends
+    assert Model._generate.__qualname__ == "Model._generate"
+
+
+class TestPatchedModelGenerate:
+    """Test suite for the provider-agnostic model call span."""
+
+    @pytest.mark.asyncio
+    async def test_records_cache_retries_latency_and_usage(self, weave_test_client: WeaveTestClient):
+        # Given
+        output = ModelOutput.from_content(model="mockllm/model", content="Hello World")
+        output.usage = ModelUsage(input_tokens=10, output_tokens=5, total_tokens=15)
+        event = MagicMock(cache="read")
+        log_model_retry = patched_log_model_retry(MagicMock())
+
+        async def original_generate(model: Model, *args: Any, **kwargs: Any) -> tuple[ModelOutput, Any]:
+            log_model_retry("mockllm/model", MagicMock())
+            return output, event
+
+        # When
+        with patch.object(weave_test_client, "finish_call") as mock_finish_call:
+            result = await patched_model_generate(original_generate)(get_model("mockllm/model"))
+
+        # Then
+        assert result == (output, event)
+        span_output = mock_finish_call.call_args.kwargs["output"]
+        assert span_output["cache"] == "hit"
+        assert span_output["retries"] == 1
+        assert span_output["duration"] >= 0
+        assert span_output["usage"] == {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+
+    @pytest.mark.asyncio
+    async def test_skips_span_when_tracing_disabled(self, weave_test_client: WeaveTestClient):
+        # Given
+        output = ModelOutput.from_content(model="mockllm/model", content="Hello World")
+
+        async def original_generate(model: Model, *args: Any, **kwargs: Any) -> tuple[ModelOutput, Any]:
+            return output, MagicMock(cache=None)
+
+        # When
+        with set_tracing_enabled(False):
+            await patched_model_generate(original_generate)(get_model("mockllm/model"))
+
+        # Then
+        assert "inspect-model-generate" not in weave_test_client.calls
+
+
+def test_records_tool_and_sandbox_spans_when_enabled(
+    patch_weave_client_in_hooks: WeaveTestClient,
+    reset_inspect_ai_hooks: None
+) -> None:
+    @task
+    def hello_bash():
+        return Task(
+            dataset=[
+                Sample(
+                    input="Run echo Hello World",
+                    target="Hello World",
+                )
+            ],
+            solver=[use_tools([bash()]), generate()],
+            scorer=exact(),
+            sandbox="local",
+            metadata={
+                "inspect_wandb_weave_enabled": "true",
+                "inspect_wandb_weave_trace_tool_calls": "true",
+                "inspect_wandb_weave_trace_sandbox_calls": "true",
+                "inspect_wandb_models_enabled": "false"
+            },
+            name="hello_bash_tool_spans"
+        )
+
+    model = get_model(
+        "mockllm/model",
+        custom_outputs=[
+            ModelOutput.for_tool_call(model="mockllm/model", tool_name="bash", tool_arguments={"cmd": "echo Hello World"}),
+            ModelOutput.from_content(model="mockllm/model", content="Hello World"),
+        ],
+    )
+    eval(hello_bash, model=model)
+
+    calls = {call.name: call for call in patch_weave_client_in_hooks.get_test_calls()}
+
+    assert calls["inspect-tool-call"].inputs["tool"] == "bash"
+    assert calls["inspect-sandbox-exec"].inputs["command"] == "bash"
+
+
+class TestSpan:
+    """Test suite for the lightweight span used by the model, tool and sandbox patchers."""
+
+    @pytest.mark.asyncio
+    async def test_finishes_span_with_exception(self, weave_test_client: WeaveTestClient):
+        # When
+        with patch.object(weave_test_client, "finish_call") as mock_finish_call:
+            with pytest.raises(ValueError, match="Test error"):
+                async with span("test-span", {"size": 1}) as span_output:
+                    span_output["partial"] = True
+                    raise ValueError("Test error")
+
+        # Then
+        assert weave_test_client.calls["test-span"].inputs == {"size": 1}
+        assert mock_finish_call.call_args.kwargs["output"]["partial"] is True
+        assert isinstance(mock_finish_call.call_args.kwargs["exception"], ValueError)
+
+    def test_payload_size(self):
+        assert payload_size(None) == 0
+        assert payload_size("hello") == 5
+        assert payload_size(b"hello") == 5
+        assert payload_size(["hello", "world"]) == 10
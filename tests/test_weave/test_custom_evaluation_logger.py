@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from weave.trace.weave_client import WeaveClient
+from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger
+
+
+class TestStreamPredictions:
+
+    def test_releases_finished_predictions(self, weave_client: WeaveClient) -> None:
+        # Given
+        weave_eval_logger = CustomEvaluationLogger(name="test_task", model="test_model", dataset="test_dataset", stream_predictions=True)
+        assert weave_eval_logger._evaluate_call is not None
+
+        # When
+        for index in range(3):
+            weave_eval_logger.log_prediction(inputs={"input": index}, output="test_output").finish()
+        unfinished_prediction = weave_eval_logger.log_prediction(inputs={"input": 3}, output="test_output")
+
+        # Then
+        assert weave_eval_logger._accumulated_predictions == []
+        assert list(weave_eval_logger._open_predictions.values()) == [unfinished_prediction]
+        assert weave_eval_logger._evaluate_call._children == [unfinished_prediction.predict_and_score_call]
+
+    def test_evaluation_summary_matches_without_streaming(self, weave_client: WeaveClient) -> None:
+        # Given
+        summaries = []
+        for stream_predictions in (False, True):
+            weave_eval_logger = CustomEvaluationLogger(name="test_task", model="test_model", dataset="test_dataset", stream_predictions=stream_predictions)
+            assert weave_eval_logger._evaluate_call is not None
+
+            # When
+            for index in range(3):
+                weave_eval_logger.log_prediction(inputs={"input": index}, output="test_output").finish()
+            weave_eval_logger.log_prediction(inputs={"input": 3}, output="test_output")
+            weave_eval_logger.log_summary({"accuracy": 1.0})
+            summaries.append(weave_eval_logger._evaluate_call.summary)
+
+        # Then
+        assert weave_eval_logger._open_predictions == {}
+        assert summaries[0] == summaries[1]
+        assert summaries[1]["status_counts"]
+
+    @pytest.mark.asyncio
+    async def test_sample_calls_finished_in_threads_released_once_finished(self, weave_client: WeaveClient) -> None:
+        # Given
+        summaries = []
+        for stream_predictions in (False, True):
+            weave_eval_logger = CustomEvaluationLogger(name="test_task", model="test_model", dataset="test_dataset", stream_predictions=stream_predictions)
+            evaluate_call = weave_eval_logger._evaluate_call
+            assert evaluate_call is not None
+
+            async def finish_sample(index: int) -> None:
+                sample_call = weave_client.create_call("inspect-sample", {"index": index}, parent=evaluate_call, use_stack=False)
+                weave_client.create_call("child", {}, parent=sample_call, use_stack=False)
+                await asyncio.to_thread(weave_client.finish_call, sample_call, output=index)
+                weave_eval_logger.release_call(sample_call)
+
+            async def finish_prediction(index: int) -> None:
+                await asyncio.sleep(0)
+                weave_eval_logger.log_prediction(inputs={"input": index}, output="test_output").finish()
+
+            # When
+            await asyncio.gather(*[finish_sample(index) for index in range(50)], *[finish_prediction(index) for index in range(50)])
+            weave_eval_logger.log_summary({"accuracy": 1.0})
+            summaries.append(evaluate_call.summary)
+
+        # Then
+        assert weave_eval_logger._finished_call_ids == set()
+        assert summaries[0] == summaries[1]
+        assert summaries[1]["status_counts"]
+
+    def test_predictions_under_sample_calls_are_released_with_them(self, weave_client: WeaveClient) -> None:
+        # Given
+        weave_eval_logger = CustomEvaluationLogger(name="test_task", model="test_model", dataset="test_dataset", stream_predictions=True)
+        evaluate_call = weave_eval_logger._evaluate_call
+        assert evaluate_call is not None
+
+        # When
+        for index in range(3):
+            sample_call = weave_client.create_call("inspect-sample", {"index": index}, parent=evaluate_call, use_stack=False)
+            weave_eval_logger.log_prediction(inputs={"input": index}, output="test_output", parent_call=sample_call).finish()
+            weave_client.finish_call(sample_call, output=index)
+            weave_eval_logger.release_call(sample_call)
+
+        # Then
+        assert weave_eval_logger._finished_call_ids == set()
+        assert weave_eval_logger._open_predictions == {}
+        assert evaluate_call._children == []
+        assert weave_eval_logger._released_calls == 3
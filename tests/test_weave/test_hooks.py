@@ -1,15 +1,20 @@
+import asyncio
 from inspect_ai.log import EvalLog
-from unittest.mock import MagicMock, PropertyMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, PropertyMock, patch
 from inspect_ai.hooks import SampleEnd, TaskEnd, RunEnd, TaskStart, SampleStart
-from inspect_ai.model import ChatCompletionChoice, ModelOutput, ChatMessageAssistant
+from inspect_ai.model import ChatCompletionChoice, ModelOutput, ChatMessageAssistant, ModelUsage
 from inspect_ai.log import EvalSample,EvalSampleSummary
 from inspect_ai._eval.eval import EvalLogs
 from inspect_wandb.weave.hooks import WeaveEvaluationHooks
+from inspect_wandb.weave.autopatcher import get_sample_call
+from inspect_wandb.weave.utils import payload_digest
 from inspect_ai.scorer import Score
 import pytest
-from weave.evaluation.eval_imperative import ScoreLogger, EvaluationLogger
+from inspect_wandb.weave.custom_evaluation_logger import CustomEvaluationLogger, InspectScoreLogger
 from inspect_wandb.config.settings import WeaveSettings
+from inspect_wandb.config.settings.weave import TraceFilter
 from weave.trace.weave_client import WeaveClient, Call
+from weave.trace.context import call_context
 from typing import Callable
 from .conftest import WeaveTestClient
 
@@ -49,8 +54,8 @@ class TestWeaveEvaluationHooks:
             )
         )
 
-        mock_weave_eval_logger = MagicMock(spec=EvaluationLogger)
-        mock_score_logger = MagicMock(spec=ScoreLogger)
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
+        mock_score_logger = MagicMock(spec=InspectScoreLogger)
         mock_weave_eval_logger.log_prediction.return_value = mock_score_logger
         hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
 
@@ -63,9 +68,9 @@ class TestWeaveEvaluationHooks:
             output="test_output",
             parent_call=None
         )
-        mock_score_logger.alog_score.assert_called_once_with(
-            scorer="test_score",
-            score=1.0,
+        mock_score_logger.alog_scores.assert_called_once_with(
+            {"test_score": 1.0},
+            score_attributes={},
         )
         mock_score_logger.finish.assert_called_once()
 
@@ -90,8 +95,8 @@ class TestWeaveEvaluationHooks:
             )
         )
 
-        mock_weave_eval_logger = MagicMock(spec=EvaluationLogger)
-        mock_score_logger = MagicMock(spec=ScoreLogger)
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
+        mock_score_logger = MagicMock(spec=InspectScoreLogger)
         mock_weave_eval_logger.log_prediction.return_value = mock_score_logger
         hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
 
@@ -104,12 +109,94 @@ class TestWeaveEvaluationHooks:
             output="test_output",
             parent_call=None
         )
-        mock_score_logger.alog_score.assert_called_once_with(
-            scorer="test_score",
-            score=1.0
+        mock_score_logger.alog_scores.assert_called_once_with(
+            {"test_score": 1.0},
+            score_attributes={"test_score": {"test": "test"}},
         )
         mock_score_logger.finish.assert_called_once()
 
+    @pytest.mark.asyncio
+    async def test_truncates_sample_payloads_over_size_limit(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings.model_copy(update={"max_payload_bytes": 300})
+        sample = SampleEnd(
+            eval_set_id=None,
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="test_sample_id",
+            sample=EvalSample(
+                id=1,
+                epoch=1,
+                input="test_input " * 100,
+                target="test_output",
+                scores={},
+                output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))])
+            )
+        )
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
+        hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
+
+        # When
+        await hooks._log_sample_to_weave_async(sample)
+
+        # Then
+        inputs = mock_weave_eval_logger.log_prediction.call_args.kwargs["inputs"]
+        assert inputs["input"].startswith("test_input ")
+        assert "...[truncated 1102 bytes, sha256:" in inputs["input"]
+        assert mock_weave_eval_logger.log_prediction.call_args.kwargs["output"] == "test_output"
+
+    @pytest.mark.asyncio
+    async def test_sends_sample_input_once_across_epochs(self, task_end_eval_log: EvalLog, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings.model_copy(update={"autopatch": True, "deduplicate_inputs": True})
+        hooks._hooks_enabled = True
+        hooks.weave_client = MagicMock(spec=WeaveClient)
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
+        mock_weave_eval_logger._evaluate_call = MagicMock(spec=Call)
+        hooks.weave_eval_loggers["dedup_eval_id"] = mock_weave_eval_logger
+
+        def sample_start(epoch: int) -> SampleStart:
+            return SampleStart(
+                eval_set_id=None,
+                run_id="test_run_id",
+                eval_id="dedup_eval_id",
+                sample_id=f"dedup_sample_uuid_{epoch}",
+                summary=EvalSampleSummary(id=1, epoch=epoch, input="long input", target="test_output", uuid=f"dedup_sample_uuid_{epoch}")
+            )
+
+        def sample_end(epoch: int) -> SampleEnd:
+            return SampleEnd(
+                eval_set_id=None,
+                run_id="test_run_id",
+                eval_id="dedup_eval_id",
+                sample_id=f"dedup_sample_uuid_{epoch}",
+                sample=EvalSample(
+                    id=1,
+                    epoch=epoch,
+                    input="long input",
+                    target="test_output",
+                    output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))])
+                )
+            )
+
+        # When
+        await hooks.on_sample_start(sample_start(1))
+        await hooks.on_sample_start(sample_start(2))
+        await hooks._log_sample_to_weave_async(sample_end(2))
+        await hooks._log_sample_to_weave_async(sample_end(1))
+        await hooks.on_task_end(TaskEnd(eval_set_id=None, run_id="test_run_id", eval_id="dedup_eval_id", log=task_end_eval_log))
+        hooks.weave_eval_loggers.pop("dedup_eval_id")
+
+        # Then
+        reference = {"input_ref": f"sha256:{payload_digest('long input')}", "epoch": 1}
+        call_inputs = [call.kwargs["inputs"]["input"] for call in hooks.weave_client.create_call.call_args_list]
+        prediction_inputs = [call.kwargs["inputs"]["input"] for call in mock_weave_eval_logger.log_prediction.call_args_list]
+        assert call_inputs == ["long input", reference]
+        assert prediction_inputs == [reference, "long input"]
+        assert "dedup_eval_id" not in hooks._sample_inputs
+
     @pytest.mark.asyncio
     async def test_writes_inspect_eval_summary_metrics_to_weave_on_task_end(self, task_end_eval_log: EvalLog, test_settings: WeaveSettings) -> None:
         # Given
@@ -123,7 +210,7 @@ class TestWeaveEvaluationHooks:
             log=task_end_eval_log
         )
 
-        mock_weave_eval_logger = MagicMock(spec=EvaluationLogger)
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
         mock_weave_eval_logger._evaluate_call = MagicMock(spec=Call)
         hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
 
@@ -141,6 +228,41 @@ class TestWeaveEvaluationHooks:
             expected_summary
         )
 
+    @pytest.mark.asyncio
+    async def test_waits_for_queued_samples_before_logging_summary_on_task_end(self, task_end_eval_log: EvalLog, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings
+        hooks._hooks_enabled = True
+        events: list[str] = []
+
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
+        mock_weave_eval_logger._evaluate_call = MagicMock(spec=Call)
+        mock_weave_eval_logger.log_summary.side_effect = lambda *args, **kwargs: events.append("summary")
+        hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
+
+        async def log_sample(data: SampleEnd) -> None:
+            await asyncio.sleep(0.01)
+            events.append(f"sample_{data.sample.id}")
+
+        sample = SampleEnd(
+            eval_set_id=None,
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="test_sample_id",
+            sample=EvalSample(id=1, epoch=1, input="test_input", target="test_output", scores={})
+        )
+
+        # When
+        with patch.object(hooks, '_log_sample_to_weave_async', new=log_sample):
+            await hooks.on_sample_end(sample)
+            await hooks.on_task_end(TaskEnd(eval_set_id=None, run_id="test_run_id", eval_id="test_eval_id", log=task_end_eval_log))
+
+        # Then
+        assert events == ["sample_1", "summary"]
+        assert hooks._sample_queue is not None
+        await hooks._sample_queue.stop()
+
     @pytest.mark.asyncio
     async def test_passes_exception_to_weave_on_error_run_end(self, test_settings: WeaveSettings) -> None:
         # Given
@@ -157,10 +279,11 @@ class TestWeaveEvaluationHooks:
             exception=e
         )
 
-        mock_weave_eval_logger = MagicMock(spec=EvaluationLogger)
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
         mock_weave_eval_logger.finish = MagicMock()
         mock_weave_eval_logger._is_finalized = False
         hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
+        hooks.sample_calls["test_interrupted_sample_id"] = MagicMock(spec=Call)
 
         # When
         await hooks.on_run_end(task_end)
@@ -169,6 +292,7 @@ class TestWeaveEvaluationHooks:
         mock_weave_eval_logger.finish.assert_called_once_with(
             exception=e
         )
+        assert hooks.sample_calls == {}
 
     @pytest.mark.asyncio
     async def test_adds_sample_call_with_metadata_on_sample_start(self, test_settings: WeaveSettings) -> None:
@@ -199,11 +323,14 @@ class TestWeaveEvaluationHooks:
 
         # When  
         await hooks.on_sample_start(sample)
+        sample_call = hooks.sample_calls.pop("test_sample_id")
+        await hooks._sample_call_starts.pop("test_sample_id")
 
         # Then
         hooks.weave_client.create_call.assert_called_once_with(
             op="inspect-sample",
             inputs={"input": "test_input"},
+            parent=ANY,
             attributes={
                 "sample_id": 1, 
                 "sample_uuid": "test_sample_id", 
@@ -212,8 +339,178 @@ class TestWeaveEvaluationHooks:
                 "task_id": "test_eval_id",
                 "metadata": {}
             },
-            display_name="test_task-sample-1-epoch-1"
+            display_name="test_task-sample-1-epoch-1",
+            use_stack=False,
+            _call_id_override=sample_call.id
+        )
+        assert hooks.weave_client.create_call.call_args.kwargs["parent"].trace_id == sample_call.trace_id
+        assert call_context.get_current_call() is sample_call
+        assert hooks.weave_client.create_call.return_value._children is sample_call._children
+        call_context.pop_call(sample_call.id)
+
+    @pytest.mark.asyncio
+    async def test_sample_call_without_parent_keeps_trace_id_of_its_spans(self, test_settings: WeaveSettings, weave_client: WeaveClient) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings
+        hooks.settings.autopatch = True
+        hooks._hooks_enabled = True
+        hooks.weave_client = weave_client
+        hooks.task_mapping["test_eval_id_no_parent"] = "test_task"
+
+        # When
+        await hooks.on_sample_start(
+            SampleStart(
+                eval_set_id=None,
+                run_id="test_run_id",
+                eval_id="test_eval_id_no_parent",
+                sample_id="test_sample_id_no_parent",
+                summary=EvalSampleSummary(id=1, epoch=1, input="test_input", target="test_output", uuid="test_sample_id_no_parent")
+            )
         )
+        sample_call = hooks.sample_calls.pop("test_sample_id_no_parent")
+        call = await hooks._sample_call_starts.pop("test_sample_id_no_parent")
+        call_context.pop_call(sample_call.id)
+        hooks.task_mapping.pop("test_eval_id_no_parent")
+
+        # Then
+        assert call.id == sample_call.id
+        assert call.trace_id == sample_call.trace_id
+        assert call.parent_id is None
+
+    @pytest.mark.asyncio
+    async def test_indexes_sample_call_by_uuid_until_sample_end(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings.model_copy(update={"autopatch": True})
+        hooks._hooks_enabled = True
+        hooks.weave_client = MagicMock(spec=WeaveClient)
+        hooks.task_mapping["test_eval_id"] = "test_task"
+        sample_start = SampleStart(
+            eval_set_id=None,
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="test_sample_uuid",
+            summary=EvalSampleSummary(id=1, epoch=1, input="test_input", target="test_output", uuid="test_sample_uuid")
+        )
+        sample_end = SampleEnd(
+            eval_set_id=None,
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="test_sample_uuid",
+            sample=EvalSample(id=1, epoch=1, input="test_input", target="test_output", scores={})
+        )
+
+        # When
+        await hooks.on_sample_start(sample_start)
+        indexed_call = get_sample_call("test_sample_uuid")
+        with patch.object(hooks, '_log_sample_to_weave_async', new=AsyncMock()):
+            await hooks.on_sample_end(sample_end)
+            assert hooks._sample_queue is not None
+            assert await hooks._sample_queue.drain(timeout=1)
+            await hooks._sample_queue.stop()
+
+        # Then
+        assert indexed_call is hooks.sample_calls.pop("test_sample_uuid")
+        assert get_sample_call("test_sample_uuid") is None
+        await hooks._sample_call_starts.pop("test_sample_uuid")
+        call_context.pop_call(indexed_call.id)
+
+    @pytest.mark.asyncio
+    async def test_untraced_sample_logs_prediction_without_sample_call(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings.model_copy(update={"autopatch": True, "trace_sample_rate": 0.0})
+        hooks._hooks_enabled = True
+        hooks.weave_client = MagicMock(spec=WeaveClient)
+        hooks.task_mapping["test_eval_id"] = "test_task"
+        mock_score_logger = MagicMock(spec=InspectScoreLogger)
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
+        mock_weave_eval_logger.log_prediction.return_value = mock_score_logger
+        hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
+        sample_start = SampleStart(
+            eval_set_id=None,
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="untraced_sample_uuid",
+            summary=EvalSampleSummary(id=1, epoch=1, input="test_input", target="test_output", uuid="untraced_sample_uuid")
+        )
+        sample_end = SampleEnd(
+            eval_set_id=None,
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="untraced_sample_uuid",
+            sample=EvalSample(
+                id=1,
+                epoch=1,
+                input="test_input",
+                target="test_output",
+                scores={"test_score": Score(value=1.0)},
+                output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))])
+            )
+        )
+
+        # When
+        await hooks.on_sample_start(sample_start)
+        await hooks._log_sample_to_weave_async(sample_end)
+
+        # Then
+        hooks.weave_client.create_call.assert_not_called()
+        hooks.weave_client.finish_call.assert_not_called()
+        assert get_sample_call("untraced_sample_uuid") is None
+        mock_weave_eval_logger.log_prediction.assert_called_once_with(
+            inputs={"input": "test_input"},
+            output="test_output",
+            parent_call=None
+        )
+        mock_score_logger.alog_scores.assert_called_once()
+
+    def test_patches_only_integrations_for_included_providers(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings.model_copy(update={"trace_providers": TraceFilter(include=["openai", "anthropic"])})
+
+        # When
+        with patch("inspect_wandb.weave.hooks.integrations") as mock_integrations:
+            hooks._patch_integrations(["openai/gpt-4o", "anthropic/claude-sonnet-4-0", "groq/llama-3.1-8b"])
+
+        # Then
+        mock_integrations.patch_openai.assert_called_once()
+        mock_integrations.patch_anthropic.assert_called_once()
+        mock_integrations.patch_groq.assert_not_called()
+
+    def test_patches_integrations_for_new_providers_on_demand(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings
+
+        # When
+        with patch("inspect_wandb.weave.hooks.integrations") as mock_integrations:
+            hooks._patch_integrations(["openrouter/openai/gpt-4o", "mockllm/model"])
+            first_task_calls = set(call[0] for call in mock_integrations.method_calls)
+            hooks._patch_integrations(["openai/gpt-4o", "anthropic/claude-sonnet-4-0"])
+
+        # Then
+        assert first_task_calls == {"patch_openai"}
+        mock_integrations.patch_openai.assert_called_once()
+        assert mock_integrations.patch_openai.call_args.args[0].op_settings.name == "openrouter.api.call"
+        mock_integrations.patch_anthropic.assert_called_once()
+        mock_integrations.patch_google_genai.assert_not_called()
+
+    def test_patches_every_provider_integration_for_unknown_providers(self, test_settings: WeaveSettings) -> None:
+        # Given
+        hooks = WeaveEvaluationHooks()
+        hooks.settings = test_settings
+
+        # When
+        with patch("inspect_wandb.weave.hooks.integrations") as mock_integrations:
+            hooks._patch_integrations(["custom_provider/model"])
+
+        # Then
+        mock_integrations.patch_openai.assert_called_once()
+        mock_integrations.patch_anthropic.assert_called_once()
+        mock_integrations.patch_google_genai.assert_called_once()
+        mock_integrations.patch_mistral.assert_called_once()
 
     @pytest.mark.parametrize("metadata_key", [
         "INSPECT_WANDB_WEAVE_ENABLED",
@@ -348,7 +645,7 @@ class TestWeaveEnablementPriority:
         hooks._weave_initialized = True  # Mark as initialized for cleanup
         
         # Mock CustomEvaluationLogger to return our mock with proper ui_url
-        mock_evaluation_logger = MagicMock(spec=EvaluationLogger)
+        mock_evaluation_logger = MagicMock(spec=CustomEvaluationLogger)
         mock_call = MagicMock()
         type(mock_call).ui_url = PropertyMock(return_value="test_url")
         mock_evaluation_logger._evaluate_call = mock_call
@@ -394,7 +691,7 @@ class TestConcurrencyOnSampleEnd:
             )
         )
 
-        mock_weave_eval_logger = MagicMock(spec=EvaluationLogger)
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
         hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
 
         start_time = time.time()
@@ -404,32 +701,37 @@ class TestConcurrencyOnSampleEnd:
         assert duration < 0.01
 
     @pytest.mark.asyncio
-    async def test_on_sample_end_creates_background_task(self, test_settings: WeaveSettings) -> None:
-        """Test that on_sample_end creates a background task for Weave operations"""
-        from unittest.mock import patch
-
+    async def test_on_sample_end_queues_sample_for_worker_pool(self, test_settings: WeaveSettings) -> None:
+        """Test that on_sample_end queues samples for a fixed pool of background workers"""
         hooks = WeaveEvaluationHooks()
-        hooks.settings = test_settings
+        hooks.settings = test_settings.model_copy(update={"sample_log_workers": 2})
         hooks._hooks_enabled = True
 
-        sample = SampleEnd(
-            eval_set_id=None,
-            run_id="test_run_id",
-            eval_id="test_eval_id",
-            sample_id="test_sample_id",
-            sample=EvalSample(
-                id=1,
-                epoch=1,
-                input="test_input",
-                target="test_output",
-                scores={},
-                output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))])
+        def sample(id: int) -> SampleEnd:
+            return SampleEnd(
+                eval_set_id=None,
+                run_id="test_run_id",
+                eval_id="test_eval_id",
+                sample_id=f"test_sample_id_{id}",
+                sample=EvalSample(
+                    id=id,
+                    epoch=1,
+                    input="test_input",
+                    target="test_output",
+                    scores={},
+                    output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))])
+                )
             )
-        )
 
-        with patch('asyncio.create_task') as mock_create_task:
-            await hooks.on_sample_end(sample)
-            mock_create_task.assert_called_once()
+        with patch.object(hooks, '_log_sample_to_weave_async', new=AsyncMock()) as mock_log_sample:
+            for id in range(5):
+                await hooks.on_sample_end(sample(id))
+            assert hooks._sample_queue is not None
+            assert len(hooks._sample_queue._worker_tasks) == 2
+            assert await hooks._sample_queue.drain(timeout=1)
+            await hooks._sample_queue.stop()
+
+        assert mock_log_sample.await_count == 5
 
     @pytest.mark.asyncio
     async def test_prevents_double_finish_on_concurrent_samples(self, test_settings: WeaveSettings) -> None:
@@ -453,8 +755,8 @@ class TestConcurrencyOnSampleEnd:
             )
         )
 
-        mock_weave_eval_logger = MagicMock(spec=EvaluationLogger)
-        mock_score_logger = MagicMock(spec=ScoreLogger)
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
+        mock_score_logger = MagicMock(spec=InspectScoreLogger)
         mock_score_logger._has_finished = False
         mock_weave_eval_logger.log_prediction.return_value = mock_score_logger
         hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
@@ -467,8 +769,8 @@ class TestConcurrencyOnSampleEnd:
         mock_score_logger.finish.assert_called_once()
 
     @pytest.mark.asyncio
-    async def test_uses_alog_score_instead_of_log_score(self, test_settings: WeaveSettings) -> None:
-        """Test that alog_score is used instead of log_score to avoid event loop conflicts"""
+    async def test_logs_all_scores_in_one_batch(self, test_settings: WeaveSettings) -> None:
+        """Test that every scorer, plus total_time and total_tokens, is logged in a single batch before finishing"""
         hooks = WeaveEvaluationHooks()
         hooks.settings = test_settings
         hooks._hooks_enabled = True
@@ -483,23 +785,27 @@ class TestConcurrencyOnSampleEnd:
                 epoch=1,
                 input="test_input",
                 target="test_output",
-                scores={"test_score": Score(value=1.0)},
-                output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))])
+                scores={"test_score": Score(value=1.0), "graded": Score(value="C", explanation="looks right")},
+                output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))]),
+                total_time=2.5,
+                model_usage={"mockllm/model": ModelUsage(input_tokens=3, output_tokens=2, total_tokens=5)}
             )
         )
 
-        mock_weave_eval_logger = MagicMock(spec=EvaluationLogger)
-        mock_score_logger = MagicMock(spec=ScoreLogger)
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
+        mock_score_logger = MagicMock(spec=InspectScoreLogger)
         mock_weave_eval_logger.log_prediction.return_value = mock_score_logger
         hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
 
         await hooks._log_sample_to_weave_async(sample)
 
-        mock_score_logger.alog_score.assert_called_once_with(
-            scorer="test_score",
-            score=1.0
+        mock_score_logger.alog_scores.assert_called_once_with(
+            {"test_score": 1.0, "graded": {"score": "C"}, "total_time": 2.5, "total_tokens": 5},
+            score_attributes={"graded": {"explanation": "looks right"}},
         )
+        mock_score_logger.alog_score.assert_not_called()
         mock_score_logger.log_score.assert_not_called()
+        mock_score_logger.finish.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_background_task_exceptions_handled_properly(self, test_settings: WeaveSettings) -> None:
@@ -508,8 +814,29 @@ class TestConcurrencyOnSampleEnd:
         hooks.settings = test_settings
         hooks._hooks_enabled = True
 
-        mock_weave_eval_logger = MagicMock(spec=EvaluationLogger)
+        sample = SampleEnd(
+            eval_set_id=None,
+            run_id="test_run_id",
+            eval_id="test_eval_id",
+            sample_id="test_sample_id",
+            sample=EvalSample(
+                id=1,
+                epoch=1,
+                input="test_input",
+                target="test_output",
+                scores={},
+                output=ModelOutput(model="mockllm/model", choices=[ChatCompletionChoice(message=ChatMessageAssistant(content="test_output"))])
+            )
+        )
+
+        mock_weave_eval_logger = MagicMock(spec=CustomEvaluationLogger)
         mock_weave_eval_logger.log_prediction.side_effect = Exception("Weave error")
         hooks.weave_eval_loggers["test_eval_id"] = mock_weave_eval_logger
-        with pytest.raises(Exception, match="Weave error"):
-            hooks._handle_weave_task_result(MagicMock(exception=lambda: Exception("Weave error")))
+        with patch('inspect_wandb.weave.sample_queue.logger') as mock_logger:
+            await hooks.on_sample_end(sample)
+            assert hooks._sample_queue is not None
+            assert await hooks._sample_queue.drain(timeout=1)
+
+        mock_logger.error.assert_called_once_with("Failed to log sample 1 (epoch 1) to Weave: Weave error")
+        assert hooks._sample_queue.running
+        await hooks._sample_queue.stop()
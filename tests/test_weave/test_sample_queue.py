@@ -0,0 +1,239 @@
+import asyncio
+import threading
+from pathlib import Path
+import pytest
+from inspect_ai.hooks import SampleEnd
+from inspect_ai.log import EvalSample
+from inspect_ai.scorer import Score
+from inspect_wandb.weave import sample_queue
+from inspect_wandb.weave.sample_queue import SampleLogQueue
+
+
+def make_sample_end(id: int, eval_id: str = "test_eval_id") -> SampleEnd:
+    return SampleEnd(
+        eval_set_id=None,
+        run_id="test_run_id",
+        eval_id=eval_id,
+        sample_id=f"test_sample_id_{id}",
+        sample=EvalSample(id=id, epoch=1, input="test_input", target="test_output", scores={"score": Score(value=id)})
+    )
+
+
+class TestSampleLogQueue:
+
+    @pytest.mark.asyncio
+    async def test_block_policy_waits_for_space(self) -> None:
+        # Given
+        release = asyncio.Event()
+        logged: list[int] = []
+
+        async def handler(data: SampleEnd) -> None:
+            await release.wait()
+            logged.append(data.sample.id)
+
+        queue = SampleLogQueue(handler, workers=1, max_size=1, policy="block")
+        await queue.put(make_sample_end(1))
+        await queue.put(make_sample_end(2))
+
+        # When
+        blocked_put = asyncio.create_task(queue.put(make_sample_end(3)))
+        await asyncio.sleep(0.01)
+        blocked = not blocked_put.done()
+        release.set()
+        await blocked_put
+        drained = await queue.drain(timeout=1)
+
+        # Then
+        assert blocked
+        assert drained
+        assert logged == [1, 2, 3]
+        assert queue.max_depth == 1
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_put_is_not_waited_for(self) -> None:
+        # Given
+        release = asyncio.Event()
+
+        async def handler(data: SampleEnd) -> None:
+            await release.wait()
+
+        queue = SampleLogQueue(handler, workers=1, max_size=1, policy="block")
+        await queue.put(make_sample_end(1))
+        await queue.put(make_sample_end(2))
+        blocked_put = asyncio.create_task(queue.put(make_sample_end(3, eval_id="other_eval_id")))
+        await asyncio.sleep(0.01)
+
+        # When
+        blocked_put.cancel()
+        await asyncio.gather(blocked_put, return_exceptions=True)
+        release.set()
+        drained = await queue.drain(timeout=1)
+
+        # Then
+        assert drained
+        assert queue.pending() == 0
+        assert await queue.drain(eval_id="other_eval_id", timeout=0)
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_drop_oldest_policy_drops_oldest_queued_sample(self) -> None:
+        # Given
+        release = asyncio.Event()
+        logged: list[int] = []
+        dropped: list[int] = []
+
+        async def handler(data: SampleEnd) -> None:
+            await release.wait()
+            logged.append(data.sample.id)
+
+        queue = SampleLogQueue(
+            handler, workers=1, max_size=2, policy="drop_oldest", on_drop=lambda data: dropped.append(data.sample.id)
+        )
+
+        # When
+        for id in range(1, 6):
+            await queue.put(make_sample_end(id))
+            await asyncio.sleep(0)
+        release.set()
+        drained = await queue.drain(timeout=1)
+
+        # Then
+        assert drained
+        assert dropped == [2, 3]
+        assert logged == [1, 4, 5]
+        assert queue.gauges()["dropped"] == 2
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_spill_policy_logs_spilled_samples_once_queue_drains(self, tmp_path: Path) -> None:
+        # Given
+        release = asyncio.Event()
+        logged: list[int] = []
+
+        async def handler(data: SampleEnd) -> None:
+            await release.wait()
+            logged.append(data.sample.id)
+
+        queue = SampleLogQueue(handler, workers=1, max_size=1, policy="spill", spill_dir=tmp_path)
+
+        # When
+        for id in range(1, 5):
+            await queue.put(make_sample_end(id))
+            await asyncio.sleep(0)
+        spilled_depth = queue.depth
+        release.set()
+        drained = await queue.drain(timeout=1)
+
+        # Then
+        assert drained
+        assert spilled_depth == 3
+        assert queue.spilled == 2
+        assert sorted(logged) == [1, 2, 3, 4]
+        assert list(tmp_path.iterdir()) == []
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("drain", [True, False])
+    async def test_temporary_spill_dir_removed_on_drain_and_stop(self, drain: bool) -> None:
+        # Given
+        release = asyncio.Event()
+
+        async def handler(data: SampleEnd) -> None:
+            await release.wait()
+
+        queue = SampleLogQueue(handler, workers=1, max_size=1, policy="spill")
+        for id in range(1, 5):
+            await queue.put(make_sample_end(id))
+            await asyncio.sleep(0)
+        spill_dir = queue.spill_dir
+        assert spill_dir is not None and any(spill_dir.iterdir())
+
+        # When
+        if drain:
+            release.set()
+            assert await queue.drain(timeout=1)
+        await queue.stop()
+
+        # Then
+        assert not spill_dir.exists()
+
+    @pytest.mark.asyncio
+    async def test_unspill_leaves_sample_spilled_if_queue_fills_while_reading(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+        # Given
+        async def handler(data: SampleEnd) -> None:
+            pass
+
+        queue = SampleLogQueue(handler, workers=0, max_size=1, policy="spill", spill_dir=tmp_path)
+        await queue.put(make_sample_end(1))
+        await queue.put(make_sample_end(2))
+        queue._queue.get_nowait()
+        reading = threading.Event()
+        read = threading.Event()
+        read_spill_file = sample_queue._read_spill_file
+
+        def slow_read_spill_file(path: Path):
+            reading.set()
+            read.wait(timeout=5)
+            return read_spill_file(path)
+
+        monkeypatch.setattr(sample_queue, "_read_spill_file", slow_read_spill_file)
+
+        # When
+        unspill = asyncio.create_task(queue._unspill())
+        await asyncio.to_thread(reading.wait, 5)
+        await queue.put(make_sample_end(3))
+        read.set()
+        await asyncio.wait_for(unspill, timeout=1)
+
+        # Then
+        assert queue._queue.get_nowait()[1].sample.id == 3
+        assert len(queue._spill_files) == 1
+        assert queue._spill_files[0].exists()
+
+    @pytest.mark.asyncio
+    async def test_drain_times_out_while_samples_are_pending(self) -> None:
+        # Given
+        async def handler(data: SampleEnd) -> None:
+            await asyncio.sleep(10)
+
+        queue = SampleLogQueue(handler, workers=1)
+        await queue.put(make_sample_end(1))
+
+        # When
+        drained = await queue.drain(timeout=0.01)
+
+        # Then
+        assert not drained
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_drain_by_eval_id_waits_only_for_that_task(self) -> None:
+        # Given
+        release_slow = asyncio.Event()
+        logged: list[int] = []
+
+        async def handler(data: SampleEnd) -> None:
+            if data.eval_id == "slow_eval_id":
+                await release_slow.wait()
+            logged.append(data.sample.id)
+
+        queue = SampleLogQueue(handler, workers=2)
+        await queue.put(make_sample_end(1, eval_id="slow_eval_id"))
+        await queue.put(make_sample_end(2, eval_id="fast_eval_id"))
+        await queue.put(make_sample_end(3, eval_id="fast_eval_id"))
+
+        # When
+        fast_drained = await queue.drain("fast_eval_id", timeout=1)
+        slow_pending = queue.pending("slow_eval_id")
+        release_slow.set()
+        slow_drained = await queue.drain("slow_eval_id", timeout=1)
+
+        # Then
+        assert fast_drained
+        assert slow_pending == 1
+        assert slow_drained
+        assert logged == [2, 3, 1]
+        assert queue.pending() == 0
+        assert await queue.drain("unknown_eval_id", timeout=0)
+        await queue.stop()
@@ -1,5 +1,9 @@
-from inspect_wandb.weave.utils import format_score_types, format_sample_display_name
+from inspect_wandb.weave.utils import format_score_types, format_sample_display_name, should_trace_sample, truncate_payload, IMAGE_STRIPPED, PROVIDER_INTEGRATIONS
+from inspect_ai._util.registry import registry_find, registry_info, registry_unqualified_name
+from inspect_ai.model._providers import providers  # noqa: F401 (registers Inspect's model providers)
+from inspect_ai.model import ChatMessageUser, ContentImage, ContentText
 from inspect_wandb.shared.utils import format_wandb_id_string as format_model_name
+import json
 import pytest
 import re
 
@@ -160,4 +164,78 @@ class TestFormatSampleDisplayName:
     def test_template_variations(self, template, task_name, sample_id, epoch, expected):
         """Test various template patterns."""
         result = format_sample_display_name(template, task_name, sample_id, epoch)
-        assert result == expected
\ No newline at end of file
+        assert result == expected
+
+class TestShouldTraceSample:
+    """Test cases for should_trace_sample function."""
+
+    def test_rate_of_one_traces_every_sample(self):
+        """Test that a rate of 1 traces every sample."""
+        assert all(should_trace_sample(sample_id, 1.0) for sample_id in range(100))
+
+    def test_rate_of_zero_traces_no_samples(self):
+        """Test that a rate of 0 traces no samples."""
+        assert not any(should_trace_sample(sample_id, 0.0) for sample_id in range(100))
+
+    def test_decision_is_deterministic_by_sample_id(self):
+        """Test that a sample gets the same decision every time, so all its epochs are traced together."""
+        decisions = [should_trace_sample(f"sample-{i}", 0.5) for i in range(100)]
+        assert decisions == [should_trace_sample(f"sample-{i}", 0.5) for i in range(100)]
+        assert should_trace_sample(7, 0.5) == should_trace_sample("7", 0.5)
+
+    def test_traces_roughly_the_given_fraction_of_samples(self):
+        """Test that the fraction of traced samples is close to the rate."""
+        traced = sum(should_trace_sample(sample_id, 0.25) for sample_id in range(10_000))
+        assert 2_300 < traced < 2_700
+
+
+class TestTruncatePayload:
+    """Test cases for truncate_payload function."""
+
+    def test_returns_value_unchanged_without_limits(self):
+        """Test that values are passed through untouched when no limit is set."""
+        value = [ChatMessageUser(content="hello")]
+        assert truncate_payload(value, None) is value
+
+    def test_keeps_small_values(self):
+        """Test that values within the limit are kept, as JSON-compatible data."""
+        result = truncate_payload([ChatMessageUser(content="hello")], 1000)
+        assert result[0]["content"] == "hello"
+        assert result[0]["role"] == "user"
+
+    def test_truncates_long_strings_with_marker(self):
+        """Test that long strings are cut to the limit with a marker giving their size and hash."""
+        result = truncate_payload("a" * 1000, 200)
+        assert re.fullmatch(r"a+\.\.\.\[truncated 1002 bytes, sha256:[0-9a-f]{64}\]", result)
+        assert len(json.dumps(result).encode()) == 200
+
+    def test_replaces_large_structured_values_with_summary(self):
+        """Test that oversized structured values are replaced with their size, hash and a preview."""
+        result = truncate_payload({"transcript": ["turn " * 100] * 10}, 300)
+        assert result["truncated"] is True
+        assert result["bytes"] > 300
+        assert len(result["sha256"]) == 64
+        assert result["preview"].startswith('{"transcript"')
+
+    @pytest.mark.parametrize("value", ["a" * 1000, "é\n\"" * 1000, {"transcript": ['"turn"\n' * 100] * 10}, ["é" * 1000]])
+    @pytest.mark.parametrize("max_bytes", [1, 50, 150, 300, 1000])
+    def test_result_fits_within_max_bytes(self, value, max_bytes):
+        """Test that truncated values, including their marker or summary, are never larger than the limit as JSON."""
+        result = truncate_payload(value, max_bytes)
+        assert len(json.dumps(result).encode()) <= max(max_bytes, 2)
+
+    def test_strips_images(self):
+        """Test that image content and data URIs are replaced with a marker."""
+        message = ChatMessageUser(content=[ContentText(text="look"), ContentImage(image="data:image/png;base64," + "A" * 1000)])
+        result = truncate_payload({"messages": [message], "thumbnail": "data:image/jpeg;base64,AAAA"}, None, strip_images=True)
+        assert result["messages"][0]["content"][1]["image"] == IMAGE_STRIPPED
+        assert result["messages"][0]["content"][0]["text"] == "look"
+        assert result["thumbnail"] == IMAGE_STRIPPED
+
+
+class TestProviderIntegrations:
+
+    def test_covers_every_inspect_provider(self):
+        """Test that the provider table has an entry for exactly the model providers Inspect registers."""
+        registered = {registry_unqualified_name(registry_info(api)) for api in registry_find(lambda info: info.type == "modelapi")}
+        assert set(PROVIDER_INTEGRATIONS) == registered